@@ -399,8 +399,14 @@ class BPMNConverter:
         
         updated_count = 0
         
+        # Индекс элементов по ID (первый в порядке документа, как у root.find):
+        # целевой элемент каждого потока ищется по словарю, а не обходом дерева
+        elements_by_id = {}
+        
         # Для каждого элемента процесса обновляем ссылки
         for element in root.findall('.//*[@id]', self.namespaces):
+            elements_by_id.setdefault(element.get('id'), element)
+            
             # Обновляем incoming ссылки
             for incoming in element.findall('bpmn:incoming', self.namespaces):
                 flow_id = incoming.text
@@ -424,7 +430,7 @@ class BPMNConverter:
             
             if target_ref:
                 # Находим целевой элемент
-                target_element = root.find(f'.//*[@id="{target_ref}"]', self.namespaces)
+                target_element = elements_by_id.get(target_ref)
                 if target_element is not None:
                     # Проверяем, есть ли уже ссылка на этот поток
                     has_incoming = False
@@ -1059,6 +1065,11 @@ class BPMNConverter:
         
         fixed_count = 0
         
+        # Потоки индексируются один раз, вместо поиска по дереву для каждого шлюза
+        flows_by_id = {}
+        for flow in root.findall('.//bpmn:sequenceFlow', self.namespaces):
+            flows_by_id.setdefault(flow.get('id'), flow)
+        
         # Находим все exclusiveGateway элементы
         for gateway in root.findall('.//bpmn:exclusiveGateway', self.namespaces):
             gateway_id = gateway.get('id')
@@ -1067,7 +1078,7 @@ class BPMNConverter:
             # Если у шлюза есть атрибут default
             if default_flow_id:
                 # Находим соответствующий sequenceFlow
-                default_flow = root.find(f'.//bpmn:sequenceFlow[@id="{default_flow_id}"]', self.namespaces)
+                default_flow = flows_by_id.get(default_flow_id)
                 
                 if default_flow is not None:
                     # Проверяем, есть ли у потока условие
@@ -1103,22 +1114,22 @@ class BPMNConverter:
             print("⚠️ BPMNDiagram не найден")
             return
         
+        # Родитель каждого элемента диаграммы определяется одним проходом iter(),
+        # а не обходом всего документа для каждого удаляемого элемента
+        parents = {child: parent for parent in bpmn_diagram.iter() for child in parent}
+        
         # Удаляем диаграммные элементы для удаленных элементов процесса
         for shape in bpmn_diagram.findall('.//bpmndi:BPMNShape', self.namespaces):
             bpmn_element = shape.get('bpmnElement')
             if bpmn_element in self.removed_elements:
-                parent = self._find_parent(root, shape)
-                if parent is not None:
-                    parent.remove(shape)
-                    removed_count += 1
+                parents[shape].remove(shape)
+                removed_count += 1
         
         for edge in bpmn_diagram.findall('.//bpmndi:BPMNEdge', self.namespaces):
             bpmn_element = edge.get('bpmnElement')
             if bpmn_element in self.removed_elements or bpmn_element in self.removed_flows:
-                parent = self._find_parent(root, edge)
-                if parent is not None:
-                    parent.remove(edge)
-                    removed_count += 1
+                parents[edge].remove(edge)
+                removed_count += 1
         
         print(f"✅ Удалено {removed_count} диаграммных элементов")
     
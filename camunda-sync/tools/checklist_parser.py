@@ -122,6 +122,18 @@ class ChecklistParser:
             (r'–\s*([^<\n]+)', 'dash'),
         ]
         
+        # Паттерны компилируются один раз. Граница области пунктов - ближайший
+        # следующий заголовок любого формата: одна альтернация находит его за
+        # один проход вместо отдельного поиска по каждому паттерну
+        self._compiled_header_patterns = [
+            (re.compile(pattern, re.IGNORECASE | re.MULTILINE), format_type)
+            for pattern, format_type in self.header_patterns
+        ]
+        self._next_header_re = re.compile(
+            '|'.join(f'(?:{pattern})' for pattern, _ in self.header_patterns),
+            re.IGNORECASE
+        )
+        
         # Настройки Bitrix24 API - используем существующую конфигурацию
         if BITRIX_CONFIG_AVAILABLE:
             self.bitrix_webhook_url = bitrix_config.webhook_url
@@ -168,8 +180,8 @@ class ChecklistParser:
         clean_description = html.unescape(description)
         
         # Ищем заголовки чек-листов
-        for header_pattern, format_type in self.header_patterns:
-            header_matches = list(re.finditer(header_pattern, clean_description, re.IGNORECASE | re.MULTILINE))
+        for header_re, format_type in self._compiled_header_patterns:
+            header_matches = list(header_re.finditer(clean_description))
             
             for match in header_matches:
                 # Специальная обработка для ссылок на Bitrix24
@@ -189,11 +201,8 @@ class ChecklistParser:
                 start_pos = match.end()
                 
                 # Определяем область поиска пунктов (до следующего заголовка или конца)
-                end_pos = len(clean_description)
-                for next_pattern, _ in self.header_patterns:
-                    next_match = re.search(next_pattern, clean_description[start_pos:], re.IGNORECASE)
-                    if next_match:
-                        end_pos = min(end_pos, start_pos + next_match.start())
+                next_match = self._next_header_re.search(clean_description, start_pos)
+                end_pos = next_match.start() if next_match else len(clean_description)
                 
                 search_area = clean_description[start_pos:end_pos]
                 
@@ -103,6 +103,12 @@ class BPMNDiagramAnalyzer:
             'bpmn': 'http://www.omg.org/spec/BPMN/20100524/MODEL',
             'bpmndi': 'http://www.omg.org/spec/BPMN/20100524/DI'
         }
+        
+        # Полные имена тегов ({namespace}localName) -> тип элемента
+        self.supported_tags = {
+            f"{{{self.namespaces['bpmn']}}}{element_type}": element_type
+            for element_type in self.supported_elements
+        }
     
     def parse_bpmn_file(self, bpmn_file_path: str) -> List[Dict[str, Any]]:
         """Парсинг BPMN файла для извлечения задач и подпроцессов"""
@@ -110,17 +116,14 @@ class BPMNDiagramAnalyzer:
         logger.info(f"📖 Парсинг BPMN файла: {bpmn_file_path}")
         
         try:
-            tree = ET.parse(bpmn_file_path)
-            root = tree.getroot()
-            
             elements = []
             
-            # Поиск всех поддерживаемых элементов
-            for element_type in self.supported_elements:
-                xpath = f".//bpmn:{element_type}"
-                found_elements = root.findall(xpath, self.namespaces)
-                
-                for element in found_elements:
+            # Один потоковый проход по документу вместо отдельного поиска .//
+            # по всему дереву для каждого типа элемента. Разобранные элементы
+            # очищаются, поэтому дерево целиком в памяти не удерживается
+            for _, element in ET.iterparse(bpmn_file_path, events=('end',)):
+                element_type = self.supported_tags.get(element.tag)
+                if element_type is not None:
                     element_id = element.get('id', '')
                     element_name = element.get('name', '')
                     
@@ -134,6 +137,8 @@ class BPMNDiagramAnalyzer:
                         })
                         
                         logger.debug(f"  Найден {element_type}: {element_id} - '{element_name}'")
+                
+                element.clear()
             
             logger.info(f"✅ Извлечено {len(elements)} элементов из BPMN файла")
             
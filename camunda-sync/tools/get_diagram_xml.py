@@ -10,14 +10,14 @@
     Идеально подходит для полного экспорта процессов из StormBPMN с сохранением метаданных.
 
 ИСПОЛЬЗОВАНИЕ:
-    python get_diagram_xml.py <diagram_id>
+    python get_diagram_xml.py <diagram_id> [<diagram_id> ...]
 
 ПРИМЕРЫ:
     # Загрузить диаграмму по ID
     python get_diagram_xml.py 9d5687e5-6108-4f05-b46a-2d24b120ba9d
     
-    # Загрузить несколько диаграмм (bash/cmd)
-    for id in abc123 def456 ghi789; do python get_diagram_xml.py $id; done
+    # Загрузить несколько диаграмм (параллельно, одним запуском)
+    python get_diagram_xml.py abc123 def456 ghi789
 
 РЕЗУЛЬТАТ:
     Создаются два файла в папке ./bpmn:
@@ -59,6 +59,8 @@
     - Автоматическое добавление метаданных диаграммы в BPMN XML через extensionElements в элементе process
     - Использование custom namespace (xmlns:custom="http://eg-holding.ru/bpmn/custom")
     - Обработка ошибок при недоступности ответственных или метаданных
+    - Несколько диаграмм загружаются параллельно (до DOWNLOAD_WORKERS потоков)
+      через один StormBPMN клиент
 
 ТРЕБОВАНИЯ:
     - Python 3.6+
@@ -91,6 +93,8 @@ from pathlib import Path
 from loguru import logger
 import xml.etree.ElementTree as ET
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional
 
 # Добавляем родительскую папку в путь для импорта
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -101,6 +105,9 @@ from tools.logging_utils import setup_tool_logging
 # Настройка полноценного логирования (консоль + файлы)
 setup_tool_logging("get_diagram_xml")
 
+# Число параллельных загрузок при передаче нескольких ID диаграмм
+DOWNLOAD_WORKERS = 8
+
 def sanitize_filename(filename: str) -> str:
     """Очистка имени файла от недопустимых символов"""
     # Удаляем или заменяем недопустимые символы
@@ -112,13 +119,19 @@ def sanitize_filename(filename: str) -> str:
         sanitized = sanitized[:200]
     return sanitized
 
-def add_diagram_metadata(xml_file_path: Path, diagram_data: dict) -> None:
+def add_diagram_metadata(diagram_body: str, diagram_data: dict) -> Optional[bytes]:
     """
-    Добавить метаданные диаграммы в BPMN XML файл
+    Добавить метаданные диаграммы в BPMN XML
+    
+    XML обрабатывается в памяти: файл записывается один раз уже с метаданными,
+    без промежуточной записи, повторного чтения и перезаписи.
     
     Args:
-        xml_file_path: Путь к XML файлу диаграммы
+        diagram_body: BPMN XML диаграммы
         diagram_data: Данные диаграммы из API StormBPMN
+    
+    Returns:
+        XML с метаданными (UTF-8) или None, если структура схемы не подходит
     """
     try:
         # Регистрируем namespaces для правильного парсинга
@@ -129,11 +142,10 @@ def add_diagram_metadata(xml_file_path: Path, diagram_data: dict) -> None:
         ET.register_namespace('di', 'http://www.omg.org/spec/DD/20100524/DI')
         ET.register_namespace('custom', 'http://eg-holding.ru/bpmn/custom')
         
-        # Парсим XML файл
-        tree = ET.parse(xml_file_path)
-        root = tree.getroot()
+        # Парсим XML
+        root = ET.fromstring(diagram_body)
         
-        logger.debug(f"Парсинг XML файла: {xml_file_path}")
+        logger.debug("Парсинг XML диаграммы")
         
         # Ищем элемент definitions (корневой элемент)
         definitions = root
@@ -143,7 +155,7 @@ def add_diagram_metadata(xml_file_path: Path, diagram_data: dict) -> None:
             logger.debug("Добавлен custom namespace в definitions")
         else:
             logger.error(f"Не найден элемент definitions. Найден: {definitions.tag}")
-            return
+            return None
         
         # Ищем элемент process (правильное место для extensionElements)
         process_element = None
@@ -155,7 +167,7 @@ def add_diagram_metadata(xml_file_path: Path, diagram_data: dict) -> None:
         
         if process_element is None:
             logger.error("Не найден элемент process в BPMN схеме")
-            return
+            return None
         
         # Проверяем, есть ли уже extensionElements в process
         extension_elements = None
@@ -213,12 +225,10 @@ def add_diagram_metadata(xml_file_path: Path, diagram_data: dict) -> None:
         processed_element.text = datetime.now().isoformat()
         added_count += 1
         
-        # Сохраняем обновленный XML
-        # Используем метод write с xml_declaration для корректного UTF-8 вывода
-        tree.write(xml_file_path, encoding='utf-8', xml_declaration=True)
-        
         logger.info(f"✅ Добавлены метаданные диаграммы: {added_count} полей")
-        logger.debug(f"Метаданные добавлены в файл: {xml_file_path}")
+        
+        # Сериализация с xml_declaration для корректного UTF-8 вывода
+        return ET.tostring(root, encoding='utf-8', xml_declaration=True)
         
     except ET.ParseError as e:
         logger.error(f"Ошибка парсинга XML: {e}")
@@ -227,13 +237,14 @@ def add_diagram_metadata(xml_file_path: Path, diagram_data: dict) -> None:
         logger.error(f"Ошибка при добавлении метаданных: {e}")
         raise
 
-def save_diagram_xml(diagram_id: str) -> None:
-    """Получить и сохранить XML схемы по ID"""
+def save_diagram_xml(diagram_id: str, client: Optional[StormBPMNClient] = None) -> None:
+    """Получить и сохранить XML схемы по ID (client - общий клиент при пакетной загрузке)"""
     
     try:
         # Создание клиента
-        client = StormBPMNClient()
-        logger.info(f"StormBPMN Client создан")
+        if client is None:
+            client = StormBPMNClient()
+            logger.info(f"StormBPMN Client создан")
         
         # Получение данных схемы
         logger.info(f"Запрос схемы с ID: {diagram_id}")
@@ -265,10 +276,22 @@ def save_diagram_xml(diagram_id: str) -> None:
         
         file_path = bpmn_path / filename
         
+        # Добавление метаданных диаграммы в XML (до записи файла)
+        logger.info(f"📝 Добавление метаданных диаграммы...")
+        xml_content = None
+        try:
+            xml_content = add_diagram_metadata(diagram_body, diagram)
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось добавить метаданные: {e}")
+            logger.info("Продолжаем без метаданных...")
+        
+        if xml_content is None:
+            xml_content = diagram_body.encode('utf-8')
+        
         # Сохранение XML файла
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(diagram_body)
+            with open(file_path, 'wb') as f:
+                f.write(xml_content)
             
             logger.info(f"✅ XML схемы сохранена в файл: {file_path}")
             
@@ -276,14 +299,6 @@ def save_diagram_xml(diagram_id: str) -> None:
             logger.error(f"Ошибка при сохранении XML файла: {e}")
             sys.exit(1)
         
-        # Добавление метаданных диаграммы в XML
-        logger.info(f"📝 Добавление метаданных диаграммы...")
-        try:
-            add_diagram_metadata(file_path, diagram)
-        except Exception as e:
-            logger.warning(f"⚠️ Не удалось добавить метаданные: {e}")
-            logger.info("Продолжаем без метаданных...")
-        
         # Получение и сохранение списка ответственных
         logger.info(f"📋 Запрос списка ответственных...")
         try:
@@ -323,23 +338,61 @@ def save_diagram_xml(diagram_id: str) -> None:
         logger.error(f"❌ Ошибка: {e}")
         sys.exit(1)
 
+def save_diagrams_xml(diagram_ids: list) -> None:
+    """
+    Параллельная загрузка нескольких схем.
+    
+    Запросы к StormBPMN ограничены сетевыми задержками, поэтому выполняются в
+    пуле потоков через один клиент: пул соединений requests.Session по умолчанию
+    (10) не меньше DOWNLOAD_WORKERS. Ошибка загрузки одной схемы не прерывает
+    остальные; при наличии ошибок процесс завершается с кодом 1.
+    """
+    logger.info(f"🚀 Начинаем загрузку {len(diagram_ids)} XML схем...")
+    client = StormBPMNClient()
+    failed = []
+    
+    try:
+        with ThreadPoolExecutor(max_workers=min(DOWNLOAD_WORKERS, len(diagram_ids))) as executor:
+            futures = {
+                executor.submit(save_diagram_xml, diagram_id, client): diagram_id
+                for diagram_id in diagram_ids
+            }
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except SystemExit:
+                    # save_diagram_xml завершает процесс при ошибке - в пакетном
+                    # режиме ошибка уже залогирована, фиксируем ID схемы
+                    failed.append(futures[future])
+    finally:
+        client.close()
+    
+    logger.info(f"📊 Загружено схем: {len(diagram_ids) - len(failed)} из {len(diagram_ids)}")
+    if failed:
+        logger.error(f"❌ Не удалось загрузить: {', '.join(failed)}")
+        sys.exit(1)
+
 def main():
     """Главная функция"""
     
     # Проверка аргументов
-    if len(sys.argv) != 2:
-        logger.error("Использование: python get_diagram_xml.py <diagram_id>")
+    if len(sys.argv) < 2:
+        logger.error("Использование: python get_diagram_xml.py <diagram_id> [<diagram_id> ...]")
         logger.error("Пример: python get_diagram_xml.py 9d5687e5-6108-4f05-b46a-2d24b120ba9d")
         sys.exit(1)
     
-    diagram_id = sys.argv[1].strip()
+    diagram_ids = [arg.strip() for arg in sys.argv[1:]]
     
-    if not diagram_id:
+    if not all(diagram_ids):
         logger.error("ID диаграммы не может быть пустым")
         sys.exit(1)
     
-    logger.info("🚀 Начинаем загрузку XML схемы...")
-    save_diagram_xml(diagram_id)
+    if len(diagram_ids) == 1:
+        logger.info("🚀 Начинаем загрузку XML схемы...")
+        save_diagram_xml(diagram_ids[0])
+        return
+    
+    save_diagrams_xml(diagram_ids)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -4,13 +4,178 @@ BPMN Metadata Cache
 Кэширование и парсинг метаданных из BPMN XML схем для External Tasks
 """
 
+import multiprocessing
+import os
+import re
+import tempfile
 import time
 import threading
-import xml.etree.ElementTree as ET
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import Dict, Any, Optional, Tuple
 from loguru import logger
+from lxml import etree
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
+
+
+# Namespace mapping BPMN
+BPMN_NAMESPACES = {
+    'bpmn': 'http://www.omg.org/spec/BPMN/20100524/MODEL',
+    'camunda': 'http://camunda.org/schema/1.0/bpmn'
+}
+
+# Выражения XPath компилируются один раз при импорте модуля (в том числе в каждом
+# процессе пула парсинга), а не разбираются заново при каждом вызове поиска
+_XP_PROCESSES = etree.XPath(".//bpmn:process", namespaces=BPMN_NAMESPACES)
+_XP_EXTENSION_ELEMENTS = etree.XPath(".//bpmn:extensionElements", namespaces=BPMN_NAMESPACES)
+_XP_PROPERTIES_CONTAINERS = etree.XPath(".//camunda:properties", namespaces=BPMN_NAMESPACES)
+_XP_PROPERTIES = etree.XPath(".//camunda:property", namespaces=BPMN_NAMESPACES)
+_XP_SERVICE_TASKS = etree.XPath(".//bpmn:serviceTask", namespaces=BPMN_NAMESPACES)
+_XP_FIELDS = etree.XPath(".//camunda:field", namespaces=BPMN_NAMESPACES)
+_XP_FIELD_STRING = etree.XPath("camunda:string", namespaces=BPMN_NAMESPACES)
+_XP_INPUT_OUTPUT = etree.XPath(".//camunda:inputOutput", namespaces=BPMN_NAMESPACES)
+_XP_INPUT_PARAMETERS = etree.XPath("camunda:inputParameter", namespaces=BPMN_NAMESPACES)
+_XP_OUTPUT_PARAMETERS = etree.XPath("camunda:outputParameter", namespaces=BPMN_NAMESPACES)
+
+# Парсеры lxml по потокам: экземпляр XMLParser нельзя использовать из нескольких
+# потоков одновременно, а без пула процессов парсинг идет в потоках обработчиков
+_parser_local = threading.local()
+
+# Графическая часть схемы (BPMN DI: координаты фигур и линий) при извлечении
+# метаданных не используется и вырезается из байтов до разбора XML
+_DIAGRAM_RE = re.compile(rb'<bpmndi:BPMNDiagram\b.*?</bpmndi:BPMNDiagram>', re.DOTALL)
+
+
+def _xml_parser() -> etree.XMLParser:
+    """
+    Парсер lxml текущего потока.
+    
+    XML из Camunda передается строкой: кодировка задается явно (объявление в
+    документе игнорируется, как и при разборе строки в ElementTree), внешние
+    сущности не раскрываются.
+    """
+    parser = getattr(_parser_local, 'parser', None)
+    if parser is None:
+        parser = _parser_local.parser = etree.XMLParser(encoding='utf-8', resolve_entities=False)
+    return parser
+
+
+def parse_bpmn_metadata(bpmn_xml: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Парсинг BPMN XML для извлечения метаданных всех активностей и свойств уровня процесса
+    
+    Функция уровня модуля (picklable) - выполняется в дочернем процессе
+    ProcessPoolExecutor, поэтому ничего не логирует: итоги парсинга
+    логирует вызывающая сторона.
+    
+    Returns:
+        Словарь с метаданными активностей и свойствами процесса:
+        {
+            "processProperties": {...},
+            "activities": {activity_id -> metadata}
+        }
+    """
+    try:
+        root = etree.fromstring(_DIAGRAM_RE.sub(b'', bpmn_xml.encode('utf-8')), _xml_parser())
+    except etree.XMLSyntaxError as e:
+        # Исключение lxml не сериализуется pickle и не передается из процесса пула
+        raise ValueError(f"Некорректный BPMN XML: {e}") from None
+    
+    # Извлечение свойств уровня процесса
+    process_properties = {}
+    
+    for process in _XP_PROCESSES(root):
+        # Поиск extensionElements в процессе (первый найденный)
+        extension_elements = _XP_EXTENSION_ELEMENTS(process)
+        if extension_elements:
+            # Поиск camunda:properties и отдельных camunda:property
+            for props_container in _XP_PROPERTIES_CONTAINERS(extension_elements[0]):
+                for prop in _XP_PROPERTIES(props_container):
+                    name = prop.get('name')
+                    value = prop.get('value')
+                    if name and value:
+                        process_properties[name] = value
+    
+    activities_metadata = {}
+    
+    # Поиск всех serviceTask элементов
+    for task in _XP_SERVICE_TASKS(root):
+        activity_id = task.get('id')
+        if not activity_id:
+            continue
+        
+        activity_metadata = {}
+        
+        # Extension Properties
+        properties = _XP_PROPERTIES(task)
+        if properties:
+            activity_metadata['extensionProperties'] = {}
+            for prop in properties:
+                name = prop.get('name')
+                value = prop.get('value')
+                if name and value:
+                    activity_metadata['extensionProperties'][name] = value
+        
+        # Field Injections
+        fields = _XP_FIELDS(task)
+        if fields:
+            activity_metadata['fieldInjections'] = {}
+            for field in fields:
+                name = field.get('name')
+                # Проверяем атрибут stringValue
+                value = field.get('stringValue')
+                if not value:
+                    # Ищем child element camunda:string
+                    string_elems = _XP_FIELD_STRING(field)
+                    if string_elems and string_elems[0].text:
+                        value = string_elems[0].text
+                
+                if name and value:
+                    activity_metadata['fieldInjections'][name] = value
+        
+        # Input/Output Parameters
+        input_outputs = _XP_INPUT_OUTPUT(task)
+        if input_outputs:
+            input_output = input_outputs[0]
+            
+            # Input Parameters
+            input_params = _XP_INPUT_PARAMETERS(input_output)
+            if input_params:
+                activity_metadata['inputParameters'] = {}
+                for param in input_params:
+                    name = param.get('name')
+                    value = param.text
+                    if name and value:
+                        activity_metadata['inputParameters'][name] = value
+            
+            # Output Parameters
+            output_params = _XP_OUTPUT_PARAMETERS(input_output)
+            if output_params:
+                activity_metadata['outputParameters'] = {}
+                for param in output_params:
+                    name = param.get('name')
+                    value = param.text
+                    if name and value:
+                        activity_metadata['outputParameters'][name] = value
+        
+        # Основные атрибуты активности
+        activity_metadata['activityInfo'] = {
+            'id': activity_id,
+            'name': task.get('name', ''),
+            'type': task.get('{http://camunda.org/schema/1.0/bpmn}type', ''),
+            'topic': task.get('{http://camunda.org/schema/1.0/bpmn}topic', '')
+        }
+        
+        activities_metadata[activity_id] = activity_metadata
+    
+    # Возвращаем структуру с processProperties и activities
+    return {
+        "processProperties": process_properties,
+        "activities": activities_metadata
+    }
 
 
 class BPMNMetadataCache:
@@ -20,7 +185,8 @@ class BPMNMetadataCache:
     """
     
     def __init__(self, base_url: str, auth_username: str = None, auth_password: str = None, 
-                 max_cache_size: int = 150, ttl_hours: int = 24):
+                 max_cache_size: int = 150, ttl_hours: int = 24, parse_workers: int = 0,
+                 xml_cache_dir: Optional[str] = None):
         """
         Инициализация кэша
         
@@ -30,26 +196,62 @@ class BPMNMetadataCache:
             auth_password: Пароль для аутентификации  
             max_cache_size: Максимальный размер кэша (по умолчанию 150 для ~100 процессов)
             ttl_hours: Время жизни записи в кэше в часах
+            parse_workers: Количество процессов для парсинга BPMN XML (0 - по числу CPU)
+            xml_cache_dir: Каталог дискового кэша BPMN XML (None - не использовать)
         """
         self.base_url = base_url.rstrip('/')
         self.auth = HTTPBasicAuth(auth_username, auth_password) if auth_username else None
+        
+        # Общая HTTP сессия: загрузки XML переиспользуют keep-alive соединения,
+        # кратковременные 502/503/504 повторяются с небольшой паузой
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504), raise_on_status=False)
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._session.auth = self.auth
+        
         self.max_cache_size = max_cache_size
+        
+        # XML определения процесса неизменен для его ID (новый деплой - новый ID),
+        # поэтому сохраненный на диск XML переживает перезапуск worker'а без повторной загрузки
+        self.xml_cache_dir = xml_cache_dir
+        if xml_cache_dir:
+            os.makedirs(xml_cache_dir, exist_ok=True)
         self.ttl_seconds = ttl_hours * 3600
         
         # Структура кэша: process_definition_id -> metadata
         self._cache: Dict[str, Dict[str, Any]] = {}
         self._lock = threading.RLock()
         
+        # Загрузки, выполняемые в данный момент: process_definition_id -> Future
+        # (параллельные промахи по одному процессу ждут одну загрузку)
+        self._pending: Dict[str, Future] = {}
+        
+        # Пул процессов для CPU-bound парсинга XML (spawn - безопасно для многопоточного родителя)
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self._parse_pool: Optional[ProcessPoolExecutor] = ProcessPoolExecutor(
+            max_workers=self.parse_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        
         # Статистика
         self.stats = {
             "cache_hits": 0,
             "cache_misses": 0,
             "xml_requests": 0,
+            "disk_hits": 0,
             "parse_operations": 0,
             "cache_evictions": 0
         }
         
-        logger.info(f"Инициализирован BPMN Metadata Cache (max_size={max_cache_size}, ttl={ttl_hours}h)")
+        logger.info(
+            f"Инициализирован BPMN Metadata Cache (max_size={max_cache_size}, ttl={ttl_hours}h, "
+            f"parse_workers={self.parse_workers})"
+        )
     
     def get_activity_metadata(self, process_definition_id: str, activity_id: str) -> Dict[str, Any]:
         """
@@ -69,40 +271,64 @@ class BPMNMetadataCache:
             if cache_entry:
                 # Данные найдены в кэше
                 self.stats["cache_hits"] += 1
-                activity_metadata = cache_entry.get("activities", {}).get(activity_id, {})
-                process_properties = cache_entry.get("processProperties", {})
-                
                 logger.debug(f"Cache HIT: {process_definition_id}/{activity_id}")
-                
-                # Возвращаем метаданные активности с добавлением свойств процесса
-                return {
-                    **activity_metadata,  # метаданные активности
-                    "processProperties": process_properties
-                }
+                return self._build_activity_metadata(cache_entry, activity_id)
             
             # Данных нет в кэше - загружаем
             self.stats["cache_misses"] += 1
             logger.debug(f"Cache MISS: {process_definition_id}/{activity_id}")
             
-            # Загрузка и парсинг BPMN XML
-            bpmn_xml = self._fetch_bpmn_xml(process_definition_id)
-            if not bpmn_xml:
-                return {}
-            
-            # Парсинг всех активностей процесса и свойств процесса
-            parsed_metadata = self._parse_bpmn_metadata(bpmn_xml)
-            
-            # Сохранение в кэш
+            pending = self._pending.get(process_definition_id)
+            is_loader = pending is None
+            if is_loader:
+                pending = Future()
+                self._pending[process_definition_id] = pending
+        
+        # Загрузка и парсинг выполняются без блокировки кэша,
+        # чтобы промахи не останавливали потоки с попаданиями в кэш
+        if not is_loader:
+            parsed_metadata = pending.result()
+        else:
+            parsed_metadata = None
+            try:
+                parsed_metadata = self._load_metadata(process_definition_id)
+            finally:
+                with self._lock:
+                    self._pending.pop(process_definition_id, None)
+                pending.set_result(parsed_metadata)
+        
+        if parsed_metadata is None:
+            return {}
+        
+        # Возврат метаданных конкретной активности с добавлением свойств процесса
+        return self._build_activity_metadata(parsed_metadata, activity_id)
+    
+    def _load_metadata(self, process_definition_id: str) -> Optional[Dict[str, Any]]:
+        """Загрузка, парсинг и сохранение в кэш метаданных процесса"""
+        # Загрузка и парсинг BPMN XML
+        bpmn_xml = self._fetch_bpmn_xml(process_definition_id)
+        if not bpmn_xml:
+            return None
+        
+        # Парсинг всех активностей процесса и свойств процесса
+        parsed_metadata = self._parse_bpmn_metadata(bpmn_xml)
+        
+        # Сохранение в кэш
+        with self._lock:
             self._save_to_cache(process_definition_id, bpmn_xml, parsed_metadata)
-            
-            # Возврат метаданных конкретной активности с добавлением свойств процесса
-            activity_metadata = parsed_metadata.get("activities", {}).get(activity_id, {})
-            process_properties = parsed_metadata.get("processProperties", {})
-            
-            return {
-                **activity_metadata,  # метаданные активности
-                "processProperties": process_properties
-            }
+        
+        return parsed_metadata
+    
+    @staticmethod
+    def _build_activity_metadata(process_metadata: Dict[str, Any], activity_id: str) -> Dict[str, Any]:
+        """Метаданные активности с добавлением свойств процесса"""
+        activity_metadata = process_metadata.get("activities", {}).get(activity_id, {})
+        process_properties = process_metadata.get("processProperties", {})
+        
+        return {
+            **activity_metadata,  # метаданные активности
+            "processProperties": process_properties
+        }
     
     def _get_from_cache(self, process_definition_id: str) -> Optional[Dict[str, Any]]:
         """Получение записи из кэша с проверкой TTL"""
@@ -122,15 +348,59 @@ class BPMNMetadataCache:
         entry["last_accessed"] = current_time
         return entry
     
+    def _xml_cache_path(self, process_definition_id: str) -> str:
+        """Путь файла дискового кэша для определения процесса"""
+        filename = re.sub(r'[^\w.-]', '_', process_definition_id) + ".bpmn"
+        return os.path.join(self.xml_cache_dir, filename)
+    
+    def _read_cached_xml(self, process_definition_id: str) -> Optional[str]:
+        """Чтение BPMN XML из дискового кэша"""
+        if not self.xml_cache_dir:
+            return None
+        try:
+            with open(self._xml_cache_path(process_definition_id), encoding="utf-8") as f:
+                bpmn_xml = f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Ошибка чтения дискового кэша BPMN XML для {process_definition_id}: {e}")
+            return None
+        
+        with self._lock:
+            self.stats["disk_hits"] += 1
+        logger.debug(f"BPMN XML загружен из дискового кэша: {process_definition_id}")
+        return bpmn_xml or None
+    
+    def _write_cached_xml(self, process_definition_id: str, bpmn_xml: str):
+        """Сохранение BPMN XML в дисковый кэш (атомарная замена файла)"""
+        if not self.xml_cache_dir:
+            return
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.xml_cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(bpmn_xml)
+                os.replace(tmp_path, self._xml_cache_path(process_definition_id))
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.warning(f"Ошибка записи дискового кэша BPMN XML для {process_definition_id}: {e}")
+    
     def _fetch_bpmn_xml(self, process_definition_id: str) -> Optional[str]:
-        """Загрузка BPMN XML из Camunda REST API"""
+        """Загрузка BPMN XML из дискового кэша или Camunda REST API"""
+        bpmn_xml = self._read_cached_xml(process_definition_id)
+        if bpmn_xml:
+            return bpmn_xml
+        
         try:
             url = f"{self.base_url}/process-definition/{process_definition_id}/xml"
-            self.stats["xml_requests"] += 1
+            with self._lock:
+                self.stats["xml_requests"] += 1
             
             logger.info(f"Загрузка BPMN XML для процесса: {process_definition_id}")
             
-            response = requests.get(url, auth=self.auth, timeout=10)
+            response = self._session.get(url, timeout=10)
             response.raise_for_status()
             
             xml_data = response.json()
@@ -141,6 +411,7 @@ class BPMNMetadataCache:
                 return None
             
             logger.info(f"Успешно загружен BPMN XML для процесса: {process_definition_id} ({len(bpmn_xml)} символов)")
+            self._write_cached_xml(process_definition_id, bpmn_xml)
             return bpmn_xml
             
         except Exception as e:
@@ -159,124 +430,41 @@ class BPMNMetadataCache:
             }
         """
         try:
-            self.stats["parse_operations"] += 1
-            root = ET.fromstring(bpmn_xml)
-            
-            # Namespace mapping
-            namespaces = {
-                'bpmn': 'http://www.omg.org/spec/BPMN/20100524/MODEL',
-                'camunda': 'http://camunda.org/schema/1.0/bpmn'
-            }
-            
-            # Извлечение свойств уровня процесса
-            process_properties = {}
-            processes = root.findall(".//bpmn:process", namespaces)
+            with self._lock:
+                self.stats["parse_operations"] += 1
             
-            for process in processes:
-                # Поиск extensionElements в процессе
-                extension_elements = process.find(".//bpmn:extensionElements", namespaces)
-                if extension_elements is not None:
-                    # Поиск camunda:properties
-                    properties = extension_elements.findall(".//camunda:properties", namespaces)
-                    for props_container in properties:
-                        # Поиск отдельных camunda:property
-                        prop_elements = props_container.findall(".//camunda:property", namespaces)
-                        for prop in prop_elements:
-                            name = prop.get('name')
-                            value = prop.get('value')
-                            if name and value:
-                                process_properties[name] = value
-                                logger.debug(f"Найдено свойство процесса: {name} = {value}")
+            parsed_metadata = self._run_parser(bpmn_xml)
             
+            process_properties = parsed_metadata["processProperties"]
             if process_properties:
                 logger.info(f"Извлечены свойства уровня процесса: {list(process_properties.keys())}")
             else:
                 logger.debug("Свойства уровня процесса не найдены")
             
-            activities_metadata = {}
-            
-            # Поиск всех serviceTask элементов
-            service_tasks = root.findall(".//bpmn:serviceTask", namespaces)
-            
-            for task in service_tasks:
-                activity_id = task.get('id')
-                if not activity_id:
-                    continue
-                
-                activity_metadata = {}
-                
-                # Extension Properties
-                properties = task.findall(".//camunda:property", namespaces)
-                if properties:
-                    activity_metadata['extensionProperties'] = {}
-                    for prop in properties:
-                        name = prop.get('name')
-                        value = prop.get('value')
-                        if name and value:
-                            activity_metadata['extensionProperties'][name] = value
-                
-                # Field Injections
-                fields = task.findall(".//camunda:field", namespaces)
-                if fields:
-                    activity_metadata['fieldInjections'] = {}
-                    for field in fields:
-                        name = field.get('name')
-                        # Проверяем атрибут stringValue
-                        value = field.get('stringValue')
-                        if not value:
-                            # Ищем child element camunda:string
-                            string_elem = field.find('camunda:string', namespaces)
-                            if string_elem is not None and string_elem.text:
-                                value = string_elem.text
-                        
-                        if name and value:
-                            activity_metadata['fieldInjections'][name] = value
-                
-                # Input/Output Parameters
-                input_output = task.find(".//camunda:inputOutput", namespaces)
-                if input_output is not None:
-                    # Input Parameters
-                    input_params = input_output.findall("camunda:inputParameter", namespaces)
-                    if input_params:
-                        activity_metadata['inputParameters'] = {}
-                        for param in input_params:
-                            name = param.get('name')
-                            value = param.text
-                            if name and value:
-                                activity_metadata['inputParameters'][name] = value
-                    
-                    # Output Parameters
-                    output_params = input_output.findall("camunda:outputParameter", namespaces)
-                    if output_params:
-                        activity_metadata['outputParameters'] = {}
-                        for param in output_params:
-                            name = param.get('name')
-                            value = param.text
-                            if name and value:
-                                activity_metadata['outputParameters'][name] = value
-                
-                # Основные атрибуты активности
-                activity_metadata['activityInfo'] = {
-                    'id': activity_id,
-                    'name': task.get('name', ''),
-                    'type': task.get('{http://camunda.org/schema/1.0/bpmn}type', ''),
-                    'topic': task.get('{http://camunda.org/schema/1.0/bpmn}topic', '')
-                }
-                
-                activities_metadata[activity_id] = activity_metadata
-                
-            logger.info(f"Извлечены метаданные для {len(activities_metadata)} активностей")
-            
-            # Возвращаем структуру с processProperties и activities
-            return {
-                "processProperties": process_properties,
-                "activities": activities_metadata
-            }
+            logger.info(f"Извлечены метаданные для {len(parsed_metadata['activities'])} активностей")
+            return parsed_metadata
             
         except Exception as e:
             logger.error(f"Ошибка парсинга BPMN XML: {e}")
             return {}
     
+    def _run_parser(self, bpmn_xml: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Парсинг в пуле процессов: ElementTree держит GIL, поэтому разбор
+        больших схем в потоках worker'а блокировал бы остальные топики.
+        При недоступности пула парсинг выполняется в текущем процессе.
+        """
+        pool = self._parse_pool
+        if pool is not None:
+            try:
+                return pool.submit(parse_bpmn_metadata, bpmn_xml).result()
+            except BrokenProcessPool as e:
+                logger.warning(f"Пул парсинга BPMN недоступен, парсинг в текущем процессе: {e}")
+                self._parse_pool = None
+                pool.shutdown(wait=False)
+        
+        return parse_bpmn_metadata(bpmn_xml)
+    
     def _save_to_cache(self, process_definition_id: str, bpmn_xml: str, parsed_metadata: Dict[str, Any]):
         """Сохранение данных в кэш с управлением размером"""
         current_time = time.time()
@@ -340,6 +528,7 @@ class BPMNMetadataCache:
                 **self.stats,
                 "cache_size": cache_size,
                 "max_cache_size": self.max_cache_size,
+                "parse_workers": self.parse_workers,
                 "cache_size_mb": round(total_size_mb, 2),
                 "hit_rate_percent": round(hit_rate, 2),
                 "total_requests": total_requests
@@ -359,4 +548,12 @@ class BPMNMetadataCache:
                 del self._cache[process_definition_id]
                 logger.info(f"Удален из кэша: {process_definition_id}")
                 return True
-            return False 
\ No newline at end of file
+            return False 
+    
+    def close(self):
+        """Остановка пула процессов парсинга и закрытие HTTP сессии"""
+        pool = self._parse_pool
+        self._parse_pool = None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        self._session.close()
@@ -4,14 +4,18 @@ Universal Camunda Worker на базе ExternalTaskClient
 Stateless архитектура для обработки External Tasks
 """
 import json
+import queue
 import time
 import signal
 import sys
 import threading
-import traceback
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 import os
-from typing import Dict, Any, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from loguru import logger
 
 # SSL Patch - ДОЛЖЕН быть импортирован ДО ExternalTaskClient
@@ -20,13 +24,54 @@ from tenant_external_task_client import TenantAwareExternalTaskClient
 from camunda.external_task.external_task import ExternalTask
 from config import camunda_config, worker_config, routing_config, rabbitmq_config
 from rabbitmq_client import RabbitMQClient
+from response_consumer import ResponseConsumer
+from response_handler import PRESERIALIZED_JSON_KEY
 from bpmn_metadata_cache import BPMNMetadataCache
 
 
+# Тип переменной Camunda по точному типу значения Python (bool не попадает в int);
+# значения остальных типов передаются как Json
+_CAMUNDA_TYPES = {type(None): "Null", str: "String", bool: "Boolean", int: "Long", float: "Double"}
+
+
+@dataclass
+class WorkerStats:
+    """Счетчики Worker, обновляемые из потоков получения, обработки и мониторинга"""
+    processed_tasks: int = 0
+    successful_tasks: int = 0
+    failed_tasks: int = 0
+    start_time: Optional[float] = None        # wall-clock время запуска (для отчетов)
+    start_monotonic: Optional[float] = None   # монотонное время запуска (для расчета uptime)
+    last_fetch: Optional[float] = None
+    # Статистика обработки ответов
+    processed_responses: int = 0
+    successful_completions: int = 0
+    failed_completions: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+    
+    def increment(self, name: str, value: int = 1):
+        """Атомарное увеличение счетчика"""
+        with self._lock:
+            setattr(self, name, getattr(self, name) + value)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Согласованный снимок всех счетчиков в виде словаря"""
+        with self._lock:
+            return {name: value for name, value in self.__dict__.items() if name != "_lock"}
+
+
 class UniversalCamundaWorker:
     """Universal Worker на базе ExternalTaskClient с Stateless архитектурой"""
     
-    def __init__(self):
+    # Количество попыток отправки задачи в RabbitMQ
+    MAX_PUBLISH_ATTEMPTS = 3
+    
+    def __init__(self, on_ready: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            on_ready: Вызывается из start(), когда подключения установлены
+                      и все потоки запущены
+        """
         self.config = camunda_config
         self.worker_config = worker_config
         self.routing_config = routing_config
@@ -36,29 +81,81 @@ class UniversalCamundaWorker:
         self.client: Optional[TenantAwareExternalTaskClient] = None
         self.rabbitmq_client = RabbitMQClient()
         self.metadata_cache: Optional[BPMNMetadataCache] = None
+        self.response_consumer: Optional[ResponseConsumer] = None
+        
+        # Готовность: подключения установлены, потоки запущены
+        self.ready = threading.Event()
+        self._on_ready = on_ready
+        
+        # Маршрутизация вычисляется один раз: топики worker'а и их целевые системы
+        self._topics = tuple(self.routing_config.TOPIC_TO_SYSTEM_MAPPING)
+        self._topic_to_system = dict(self.routing_config.TOPIC_TO_SYSTEM_MAPPING)
+        
+        # Топики, для которых задаче нужны метаданные BPMN
+        self._metadata_topics = frozenset(self.routing_config.TOPICS_NEEDING_METADATA)
+        
+        # Пул обработки ответов: HTTP запросы к Camunda не блокируют IO loop потребителя.
+        # По умолчанию потоков столько же, сколько prefetch: каждое доставленное
+        # сообщение обрабатывается сразу, в работе до prefetch HTTP запросов
+        self.response_threads_count = (
+            self.worker_config.response_processing_threads or self.worker_config.response_prefetch_count
+        )
+        self._response_pool = ThreadPoolExecutor(
+            max_workers=self.response_threads_count,
+            thread_name_prefix="Response"
+        )
         
         # Управление работой
         self.running = False
         self.stop_event = threading.Event()
         self.worker_threads = []
         
+        # Общая очередь задач: потоки топиков только получают задачи (fetch_and_lock),
+        # обработку выполняет общий пул потоков - любой свободный поток берет задачу любого топика
+        self.processor_threads_count = self.worker_config.processor_threads or max(4, os.cpu_count() or 1)
+        self.task_queue: "queue.Queue[Tuple[Dict[str, Any], str]]" = queue.Queue(
+            maxsize=self.processor_threads_count * self.config.max_tasks
+        )
+        
+        # Текущая пауза между запросами fetch_and_lock по топикам
+        self._poll_sleep: Dict[str, float] = {}
+        
+        # HTTP сессия Camunda REST API (переменные процесса, завершение задач)
+        self.http = self._create_http_session()
+        
+        # URL и неизменная часть payload завершения задач вычисляются один раз:
+        # на каждую задачу остаются только конкатенация с task_id и копия словаря
+        base_url = self.config.base_url.rstrip('/')
+        if not base_url.endswith('/engine-rest'):
+            base_url = f"{base_url}/engine-rest"
+        self._complete_url_prefix = base_url + "/external-task/"
+        self._complete_url_suffix = "/complete"
+        self._complete_base_payload = {"workerId": self.config.worker_id}
+        
         # Статистика
-        self.stats = {
-            "processed_tasks": 0,
-            "successful_tasks": 0,
-            "failed_tasks": 0,
-            "start_time": None,
-            "last_fetch": None,
-            # Добавляем статистику для обработки ответов
-            "processed_responses": 0,
-            "successful_completions": 0,
-            "failed_completions": 0
-        }
+        self.stats = WorkerStats()
         
         # Настройка обработки сигналов
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
     
+    def _create_http_session(self) -> requests.Session:
+        """
+        HTTP сессия с keep-alive пулом соединений к Camunda.
+        
+        Завершения задач и запросы переменных выполняются параллельно из
+        потоков обработки, поэтому пул рассчитан на все эти потоки: соединения
+        (и TLS рукопожатия) переиспользуются вместо установки на каждый запрос.
+        """
+        session = requests.Session()
+        pool_size = self.processor_threads_count + self.response_threads_count
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if self.config.auth_enabled:
+            session.auth = (self.config.auth_username, self.config.auth_password)
+        return session
+    
     def _save_response_message_debug(self, message_data: Dict[str, Any]) -> None:
         """
         ОТЛАДОЧНАЯ ФУНКЦИЯ: Сохранение сообщения из camunda.responses.queue в JSON файл
@@ -150,7 +247,9 @@ class UniversalCamundaWorker:
                 auth_username=self.config.auth_username if self.config.auth_enabled else None,
                 auth_password=self.config.auth_password if self.config.auth_enabled else None,
                 max_cache_size=150,  # Для ~100 процессов с запасом
-                ttl_hours=24         # Кэш живет 24 часа
+                ttl_hours=24,        # Кэш живет 24 часа
+                parse_workers=self.worker_config.bpmn_parse_workers,
+                xml_cache_dir=self.worker_config.bpmn_xml_cache_dir or None
             )
             
             # DEBUG: Создаем директорию для отладочных файлов
@@ -167,18 +266,24 @@ class UniversalCamundaWorker:
             logger.error(f"Ошибка инициализации: {e}")
             return False
     
-    def _fetch_and_process_loop(self, topic: str):
-        """Основной цикл получения и обработки задач для топика"""
-        logger.info(f"Запущен поток для топика: {topic}")
+    def _fetch_loop(self, topic: str):
+        """Цикл получения задач топика и передачи их в общую очередь обработки"""
+        logger.info(f"Запущен поток получения задач для топика: {topic}")
         
         consecutive_errors = 0
         max_consecutive_errors = 5
         
+        # Адаптивная пауза между запросами (AIMD): при получении задач уменьшается вдвое,
+        # при пустом ответе растет на 1с до 4 * CAMUNDA_SLEEP_SECONDS
+        min_sleep = 0.05
+        max_sleep = self.config.sleep_seconds * 4
+        sleep = min(1.0, max_sleep)
+        
         while not self.stop_event.is_set():
             try:
                 # Получение задач
                 tasks = self.client.fetch_and_lock(topic)
-                self.stats["last_fetch"] = time.time()
+                self.stats.last_fetch = time.time()
                 
                 if tasks:
                     consecutive_errors = 0  # Сброс счетчика ошибок при успешном получении
@@ -186,19 +291,25 @@ class UniversalCamundaWorker:
                         logger.info(f"Получено {len(tasks)} задач для топика {topic}")
                     
                     for task_data in tasks:
-                        if self.stop_event.is_set():
+                        if not self._enqueue_task(task_data, topic):
                             break
-                        self._process_task(task_data, topic)
                     
-                    # Короткая пауза между обработками
-                    self.stop_event.wait(1)
+                    sleep = max(min_sleep, sleep * 0.5)
                 else:
-                    # Нет задач - ждем дольше
-                    self.stop_event.wait(self.config.sleep_seconds)
+                    sleep = min(max_sleep, sleep + 1.0)
+                
+                self._poll_sleep[topic] = sleep
+                
+                # Получена полная пачка - в Camunda, вероятно, есть еще задачи: запрашиваем сразу.
+                # Ограничение нагрузки обеспечивает общая очередь обработки (put блокируется при заполнении)
+                if tasks and len(tasks) >= self.config.max_tasks:
+                    continue
+                
+                self.stop_event.wait(sleep)
                 
             except Exception as e:
                 consecutive_errors += 1
-                logger.error(f"Ошибка в цикле обработки топика {topic}: {e}")
+                logger.error(f"Ошибка в цикле получения задач топика {topic}: {e}")
                 
                 if consecutive_errors >= max_consecutive_errors:
                     logger.error(f"Слишком много ошибок подряд ({consecutive_errors}) для топика {topic}, останавливаю поток")
@@ -209,123 +320,178 @@ class UniversalCamundaWorker:
                 logger.warning(f"Пауза {error_sleep}s после ошибки для топика {topic}")
                 self.stop_event.wait(error_sleep)
         
-        logger.info(f"Поток для топика {topic} завершен")
+        logger.info(f"Поток получения задач для топика {topic} завершен")
     
-    def _process_task(self, task_data: Dict[str, Any], topic: str):
-        """Обработка одной задачи с получением метаданных BPMN"""
-        task_id = task_data.get('id', 'unknown')
+    def _enqueue_task(self, task_data: Dict[str, Any], topic: str) -> bool:
+        """
+        Передача задачи в общую очередь обработки.
         
-        try:
-            self.stats["processed_tasks"] += 1
-            
-            # Создание объекта ExternalTask
-            task = ExternalTask(task_data)
-            
-            # Получение метаданных активности из BPMN XML
-            process_definition_id = task_data.get('processDefinitionId')
-            activity_id = task.get_activity_id()
-            process_instance_id = task.get_process_instance_id()
-            
-            logger.debug(f"Получение метаданных для задачи {task_id}: process_definition_id={process_definition_id}, activity_id={activity_id}")
+        Очередь ограничена: при заполнении поток топика ждет и не блокирует
+        в Camunda новые задачи, пока обработчики не освободятся.
+        """
+        while not self.stop_event.is_set():
+            try:
+                self.task_queue.put((task_data, topic), timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def _processor_loop(self):
+        """Цикл обработки задач из общей очереди (задачи любых топиков)"""
+        while True:
+            try:
+                batch = [self.task_queue.get(timeout=1)]
+            except queue.Empty:
+                # При остановке выходим только после разбора уже полученных задач
+                if self.stop_event.is_set():
+                    break
+                continue
             
-            metadata = {}
-            if self.metadata_cache and process_definition_id and activity_id:
+            # Задачи, уже накопившиеся в очереди (пачка long-poll), публикуются вместе
+            while len(batch) < self.config.max_tasks:
                 try:
-                    logger.debug(f"Вызов get_activity_metadata для {process_definition_id}/{activity_id}")
-                    metadata = self.metadata_cache.get_activity_metadata(process_definition_id, activity_id)
-                    logger.debug(f"Получены метаданные: {metadata}")
-                except Exception as e:
-                    logger.warning(f"Ошибка получения метаданных для задачи {task_id}: {e}")
-            else:
-                logger.debug(f"Пропуск получения метаданных: metadata_cache={self.metadata_cache is not None}, process_definition_id={process_definition_id}, activity_id={activity_id}")
-            
-            # Получение переменных процесса из Camunda
-            process_variables = self._get_process_variables(process_instance_id, task_id)
-            if isinstance(metadata, dict):
-                metadata.setdefault("processVariables", process_variables)
-            
-            # Логирование исходных данных для отладки
-            logger.debug(f"Исходные данные задачи {task_id}: {json.dumps(task_data, ensure_ascii=False, indent=2)}")
-            
-            # Подготовка расширенных данных для RabbitMQ
-            task_payload = {
-                "id": task_id,
-                "topic": topic,
-                "variables": task.get_variables(),
-                "processInstanceId": process_instance_id,
-                "processDefinitionId": process_definition_id,
-                "processDefinitionKey": task_data.get("processDefinitionKey"),  # Из исходных данных задачи
-                "activityId": activity_id,
-                "activityInstanceId": task_data.get("activityInstanceId"),
-                "workerId": task.get_worker_id(),
-                "retries": task_data.get("retries"),
-                "createTime": task_data.get("createTime"),
-                "priority": task_data.get("priority", 0),
-                "tenantId": task.get_tenant_id(),
-                "businessKey": task.get_business_key(),
-                # Добавляем метаданные BPMN
-                "metadata": metadata,
-                # Добавляем переменные процесса уровня процесса
-                "processVariables": process_variables
-            }
+                    batch.append(self.task_queue.get_nowait())
+                except queue.Empty:
+                    break
             
-            # Логирование processDefinitionKey для отладки
-            process_def_key = task_data.get("processDefinitionKey")
-            if process_def_key:
-                logger.info(f"processDefinitionKey найден для задачи {task_id}: {process_def_key}")
-            else:
-                logger.error(f"processDefinitionKey НЕ найден для задачи {task_id}. Доступные поля: {list(task_data.keys())}")
-                # Попытка извлечь ключ из processDefinitionId
-                if process_definition_id:
-                    try:
-                        # processDefinitionId обычно имеет формат "key:version:id"
-                        extracted_key = process_definition_id.split(':')[0]
-                        logger.info(f"Извлечен ключ процесса из processDefinitionId: {extracted_key}")
-                        # Обновляем processDefinitionKey в task_payload
-                        task_payload["processDefinitionKey"] = extracted_key
-                    except Exception as e:
-                        logger.error(f"Ошибка извлечения ключа из processDefinitionId {process_definition_id}: {e}")
-            
-            # Определение целевой системы
-            system = self.routing_config.get_system_for_topic(topic)
-            
-            # ТРАНЗАКЦИОННАЯ БЕЗОПАСНОСТЬ: Сначала отправляем в RabbitMQ, только потом считаем задачу обработанной
-            logger.info(f"Подготовка к отправке задачи {task_id} в {system}...")
-            
-            # Отправка в RabbitMQ с повторными попытками
-            publish_success = False
-            max_publish_attempts = 3
-            
-            for attempt in range(max_publish_attempts):
-                try:
-                    if self.rabbitmq_client.publish_task(topic, task_payload):
-                        publish_success = True
-                        break
-                    else:
-                        logger.warning(f"Попытка {attempt + 1}/{max_publish_attempts} отправки задачи {task_id} не удалась")
-                        if attempt < max_publish_attempts - 1:
-                            time.sleep(2)  # Пауза перед повторной попыткой
-                except Exception as publish_error:
-                    logger.warning(f"Ошибка попытки {attempt + 1}/{max_publish_attempts} отправки задачи {task_id}: {publish_error}")
-                    if attempt < max_publish_attempts - 1:
-                        time.sleep(2)
-            
-            if publish_success:
-                self.stats["successful_tasks"] += 1
-                logger.info(f"✅ Задача {task_id} успешно отправлена в {system}, ожидает ответа")
-            else:
-                # КРИТИЧЕСКАЯ ОШИБКА: Задача заблокирована, но не отправлена в RabbitMQ
-                logger.error(f"❌ КРИТИЧЕСКАЯ ОШИБКА: Задача {task_id} заблокирована, но не удалось отправить в RabbitMQ после {max_publish_attempts} попыток")
-                raise Exception(f"Не удалось опубликовать задачу {task_id} в RabbitMQ после {max_publish_attempts} попыток")
+            self._process_tasks(batch)
+    
+    def _process_tasks(self, batch: List[Tuple[Dict[str, Any], str]]):
+        """Обработка пачки задач: подготовка каждой и публикация в RabbitMQ одной пачкой"""
+        prepared = []
+        for task_data, topic in batch:
+            task_id = task_data.get('id', 'unknown')
+            try:
+                prepared.append((task_id, topic, self._prepare_task_payload(task_data, topic)))
+            except Exception as e:
+                self._handle_task_error(task_id, topic, str(e))
+        
+        if not prepared:
+            return
+        
+        # ТРАНЗАКЦИОННАЯ БЕЗОПАСНОСТЬ: Сначала отправляем в RabbitMQ, только потом считаем задачу обработанной
+        results = self.rabbitmq_client.publish_tasks([(topic, payload) for _, topic, payload in prepared])
+        
+        for (task_id, topic, task_payload), published in zip(prepared, results):
+            try:
+                # Первая попытка выполнена пачкой, неудачные задачи повторяются по одной
+                if not published:
+                    logger.warning(f"Попытка 1/{self.MAX_PUBLISH_ATTEMPTS} отправки задачи {task_id} не удалась")
+                    self._publish_task_with_retries(task_id, topic, task_payload, first_attempt=1)
                 
-        except Exception as e:
-            self._handle_task_error(task_id, topic, str(e))
+                system = self._topic_to_system.get(topic) or self.routing_config.get_system_for_topic(topic)
+                self.stats.increment("successful_tasks")
+                logger.info(f"✅ Задача {task_id} успешно отправлена в {system}, ожидает ответа")
+            except Exception as e:
+                self._handle_task_error(task_id, topic, str(e))
+    
+    def _prepare_task_payload(self, task_data: Dict[str, Any], topic: str) -> Dict[str, Any]:
+        """Подготовка данных задачи для RabbitMQ с получением метаданных BPMN"""
+        task_id = task_data.get('id', 'unknown')
+        
+        self.stats.increment("processed_tasks")
+        
+        # Создание объекта ExternalTask
+        task = ExternalTask(task_data)
+        
+        # Получение метаданных активности из BPMN XML
+        process_definition_id = task_data.get('processDefinitionId')
+        activity_id = task.get_activity_id()
+        process_instance_id = task.get_process_instance_id()
+        
+        logger.debug("Получение метаданных для задачи {}: process_definition_id={}, activity_id={}", task_id, process_definition_id, activity_id)
+        
+        # Метаданные BPMN запрашиваются только для топиков, получатели которых их используют
+        metadata = {}
+        needs_metadata = topic in self._metadata_topics
+        if needs_metadata and self.metadata_cache and process_definition_id and activity_id:
+            try:
+                logger.debug("Вызов get_activity_metadata для {}/{}", process_definition_id, activity_id)
+                metadata = self.metadata_cache.get_activity_metadata(process_definition_id, activity_id)
+                logger.opt(lazy=True).debug("Получены метаданные: {}", lambda: metadata)
+            except Exception as e:
+                logger.warning(f"Ошибка получения метаданных для задачи {task_id}: {e}")
+        elif needs_metadata:
+            logger.debug("Пропуск получения метаданных: metadata_cache={}, process_definition_id={}, activity_id={}", self.metadata_cache is not None, process_definition_id, activity_id)
+        
+        # Получение переменных процесса из Camunda
+        process_variables = self._get_process_variables(process_instance_id, task_id)
+        if isinstance(metadata, dict):
+            metadata.setdefault("processVariables", process_variables)
+        
+        # Логирование исходных данных для отладки
+        logger.opt(lazy=True).debug(
+            "Исходные данные задачи {}: {}",
+            lambda: task_id,
+            lambda: json.dumps(task_data, ensure_ascii=False, indent=2)
+        )
+        
+        # Подготовка расширенных данных для RabbitMQ
+        task_payload = {
+            "id": task_id,
+            "topic": topic,
+            "variables": task.get_variables(),
+            "processInstanceId": process_instance_id,
+            "processDefinitionId": process_definition_id,
+            "processDefinitionKey": task_data.get("processDefinitionKey"),  # Из исходных данных задачи
+            "activityId": activity_id,
+            "activityInstanceId": task_data.get("activityInstanceId"),
+            "workerId": task.get_worker_id(),
+            "retries": task_data.get("retries"),
+            "createTime": task_data.get("createTime"),
+            "priority": task_data.get("priority", 0),
+            "tenantId": task.get_tenant_id(),
+            "businessKey": task.get_business_key(),
+            # Добавляем метаданные BPMN
+            "metadata": metadata,
+            # Добавляем переменные процесса уровня процесса
+            "processVariables": process_variables
+        }
+        
+        # Логирование processDefinitionKey для отладки
+        process_def_key = task_data.get("processDefinitionKey")
+        if process_def_key:
+            logger.debug("processDefinitionKey найден для задачи {}: {}", task_id, process_def_key)
+        else:
+            logger.error(f"processDefinitionKey НЕ найден для задачи {task_id}. Доступные поля: {list(task_data.keys())}")
+            # Попытка извлечь ключ из processDefinitionId
+            if process_definition_id:
+                try:
+                    # processDefinitionId обычно имеет формат "key:version:id"
+                    extracted_key = process_definition_id.split(':')[0]
+                    logger.info(f"Извлечен ключ процесса из processDefinitionId: {extracted_key}")
+                    # Обновляем processDefinitionKey в task_payload
+                    task_payload["processDefinitionKey"] = extracted_key
+                except Exception as e:
+                    logger.error(f"Ошибка извлечения ключа из processDefinitionId {process_definition_id}: {e}")
+        
+        return task_payload
+    
+    def _publish_task_with_retries(self, task_id: str, topic: str, task_payload: Dict[str, Any],
+                                   first_attempt: int = 0):
+        """Отправка задачи в RabbitMQ с повторными попытками"""
+        max_publish_attempts = self.MAX_PUBLISH_ATTEMPTS
+        
+        for attempt in range(first_attempt, max_publish_attempts):
+            if attempt > 0:
+                time.sleep(2)  # Пауза перед повторной попыткой
+            try:
+                if self.rabbitmq_client.publish_task(topic, task_payload):
+                    return
+                logger.warning(f"Попытка {attempt + 1}/{max_publish_attempts} отправки задачи {task_id} не удалась")
+            except Exception as publish_error:
+                logger.warning(f"Ошибка попытки {attempt + 1}/{max_publish_attempts} отправки задачи {task_id}: {publish_error}")
+        
+        # КРИТИЧЕСКАЯ ОШИБКА: Задача заблокирована, но не отправлена в RabbitMQ
+        logger.error(f"❌ КРИТИЧЕСКАЯ ОШИБКА: Задача {task_id} заблокирована, но не удалось отправить в RabbitMQ после {max_publish_attempts} попыток")
+        raise Exception(f"Не удалось опубликовать задачу {task_id} в RabbitMQ после {max_publish_attempts} попыток")
     
     def _handle_task_error(self, task_id: str, topic: str, error: str):
         """Обработка ошибки задачи"""
         try:
             logger.error(f"Ошибка обработки задачи {task_id}: {error}")
-            self.stats["failed_tasks"] += 1
+            self.stats.increment("failed_tasks")
             
             # Проверяем, является ли это критической ошибкой (задача заблокирована, но не отправлена)
             is_critical_error = "заблокирована, но не удалось отправить" in error or "КРИТИЧЕСКАЯ ОШИБКА" in error
@@ -370,25 +536,22 @@ class UniversalCamundaWorker:
     def _get_process_variables(self, process_instance_id: Optional[str], task_id: str) -> Dict[str, Any]:
         """Получение переменных процесса из Camunda по ID экземпляра процесса"""
         if not process_instance_id:
-            logger.debug(f"Пропуск получения переменных процесса для задачи {task_id}: отсутствует processInstanceId")
+            logger.debug("Пропуск получения переменных процесса для задачи {}: отсутствует processInstanceId", task_id)
             return {}
         
         base_url = self.config.base_url.rstrip('/')
         url = f"{base_url}/process-instance/{process_instance_id}/variables"
         timeout_seconds = max(1, int(self.config.http_timeout_millis)) / 1000
-        auth = None
-        if self.config.auth_enabled:
-            auth = (self.config.auth_username, self.config.auth_password)
         
         try:
-            logger.debug(f"Запрос переменных процесса для задачи {task_id}: {url}")
-            response = requests.get(url, auth=auth, timeout=timeout_seconds)
+            logger.debug("Запрос переменных процесса для задачи {}: {}", task_id, url)
+            response = self.http.get(url, timeout=timeout_seconds)
             response.raise_for_status()
             variables = response.json()
             if not isinstance(variables, dict):
                 logger.warning(f"Неверный формат переменных процесса для {process_instance_id}: ожидается dict, получено {type(variables)}")
                 return {}
-            logger.debug(f"Получены переменные процесса для задачи {task_id}: {list(variables.keys())}")
+            logger.opt(lazy=True).debug("Получены переменные процесса для задачи {}: {}", lambda: task_id, lambda: list(variables))
             return variables
         except requests.exceptions.RequestException as request_error:
             logger.warning(f"Ошибка получения переменных процесса {process_instance_id} для задачи {task_id}: {request_error}")
@@ -397,64 +560,28 @@ class UniversalCamundaWorker:
         
         return {}
     
-    def _check_response_queue(self):
-        """Проверка и обработка сообщений из очереди ответов"""
-        try:
-            if not self.rabbitmq_client.is_connected():
-                logger.warning("RabbitMQ соединение потеряно при проверке очереди ответов")
-                return
-            
-            # Проверяем количество сообщений в очереди ответов
-            queue_info = self.rabbitmq_client.get_queue_info(self.rabbitmq_config.responses_queue_name)
-            if not queue_info:
-                return
-            
-            message_count = queue_info.get("message_count", 0)
-            if message_count == 0:
-                return
-            
-            logger.info(f"Найдено {message_count} сообщений в очереди ответов, обрабатываем...")
-            
-            # Обрабатываем сообщения (по одному за раз)
-            processed_count = 0
-            max_messages_per_check = min(10, message_count)  # Не более 10 за раз
-            
-            for _ in range(max_messages_per_check):
-                if self._process_single_response_message():
-                    processed_count += 1
-                else:
-                    break  # Нет больше сообщений или ошибка
-            
-            if processed_count > 0:
-                logger.info(f"Обработано {processed_count} ответов из очереди")
-                
-        except Exception as e:
-            logger.error(f"Ошибка при проверке очереди ответов: {e}")
+    def _submit_response(self, body: bytes) -> Future:
+        """Передача сообщения из очереди ответов в пул обработки ответов"""
+        return self._response_pool.submit(self._handle_response_body, body)
     
-    def _process_single_response_message(self) -> bool:
+    def _handle_response_body(self, body: bytes) -> bool:
         """
         Обработка одного сообщения из очереди ответов.
         
         При ошибке обработки сообщение перемещается в очередь ошибок
         (errors.camunda_tasks.queue) для последующего анализа.
+        
+        Returns:
+            True - сообщение нужно подтвердить (ACK),
+            False - вернуть в очередь для повторной попытки (NACK)
         """
-        method_frame = None
         message_data = None
         
         try:
-            # Получаем сообщение без автоподтверждения
-            method_frame, header_frame, body = self.rabbitmq_client.channel.basic_get(
-                queue=self.rabbitmq_config.responses_queue_name,
-                auto_ack=False
-            )
-            
-            if method_frame is None:
-                return False  # Нет сообщений
-            
             # Парсим сообщение
             try:
-                message_data = json.loads(body.decode('utf-8'))
-            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                message_data = orjson.loads(body)
+            except orjson.JSONDecodeError as e:
                 logger.error(f"Ошибка парсинга сообщения из очереди ответов: {e}")
                 # Перемещаем в очередь ошибок даже при ошибке парсинга
                 self.rabbitmq_client.publish_response_processing_error(
@@ -466,14 +593,13 @@ class UniversalCamundaWorker:
                     task_id="unknown",
                     activity_id=None
                 )
-                self.rabbitmq_client.channel.basic_ack(delivery_tag=method_frame.delivery_tag)
                 return True
             
             # DEBUG: Сохраняем сообщение в отладочный файл перед обработкой (если включено)
             if self.config.debug_save_response_messages:
                 self._save_response_message_debug(message_data)
             
-            self.stats["processed_responses"] += 1
+            self.stats.increment("processed_responses")
             
             # Извлекаем task_id и activity_id для использования в ошибках
             original_message = message_data.get("original_message", {})
@@ -485,64 +611,59 @@ class UniversalCamundaWorker:
             
             if success:
                 # Успешная обработка - просто ACK
-                self.rabbitmq_client.channel.basic_ack(delivery_tag=method_frame.delivery_tag)
-            else:
-                # Ошибка обработки - перемещаем в очередь ошибок
-                logger.warning(f"Ошибка обработки задачи {task_id}, перемещаем в очередь ошибок...")
+                return True
+            
+            # Ошибка обработки - перемещаем в очередь ошибок
+            logger.warning(f"Ошибка обработки задачи {task_id}, перемещаем в очередь ошибок...")
+            
+            # Публикуем в очередь ошибок
+            error_published = self.rabbitmq_client.publish_response_processing_error(
+                original_message=message_data,
+                error_info=error_info or {"type": "unknown_error", "message": "Unknown error"},
+                task_id=task_id,
+                activity_id=activity_id
+            )
+            
+            if error_published:
+                # Успешно переместили в очередь ошибок - ACK оригинал
+                logger.info(f"Сообщение для задачи {task_id} перемещено в очередь ошибок")
+                return True
+            
+            # Не удалось переместить в очередь ошибок - NACK для повторной попытки
+            logger.error(f"Не удалось переместить задачу {task_id} в очередь ошибок, возвращаем в очередь")
+            return False
+            
+        except Exception as e:
+            logger.error(f"Критическая ошибка при обработке сообщения из очереди ответов: {e}")
+            
+            # Пытаемся переместить в очередь ошибок даже при критической ошибке
+            try:
+                task_id = "unknown"
+                activity_id = None
+                if message_data:
+                    task_id = message_data.get("original_message", {}).get("task_id", "unknown")
+                    activity_id = message_data.get("original_message", {}).get("activity_id")
                 
-                # Публикуем в очередь ошибок
                 error_published = self.rabbitmq_client.publish_response_processing_error(
-                    original_message=message_data,
-                    error_info=error_info or {"type": "unknown_error", "message": "Unknown error"},
+                    original_message=message_data or {"error": "message_data not available"},
+                    error_info={
+                        "type": "critical_exception",
+                        "message": f"Критическая ошибка: {e}"
+                    },
                     task_id=task_id,
                     activity_id=activity_id
                 )
                 
                 if error_published:
-                    # Успешно переместили в очередь ошибок - ACK оригинал
-                    self.rabbitmq_client.channel.basic_ack(delivery_tag=method_frame.delivery_tag)
-                    logger.info(f"Сообщение для задачи {task_id} перемещено в очередь ошибок")
+                    logger.info(f"Критическая ошибка для задачи {task_id} перемещена в очередь ошибок")
                 else:
-                    # Не удалось переместить в очередь ошибок - NACK для повторной попытки
-                    logger.error(f"Не удалось переместить задачу {task_id} в очередь ошибок, возвращаем в очередь")
-                    self.rabbitmq_client.channel.basic_nack(delivery_tag=method_frame.delivery_tag, requeue=True)
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"Критическая ошибка при обработке сообщения из очереди ответов: {e}")
-            
-            # Пытаемся переместить в очередь ошибок даже при критической ошибке
-            if method_frame:
-                try:
-                    task_id = "unknown"
-                    activity_id = None
-                    if message_data:
-                        task_id = message_data.get("original_message", {}).get("task_id", "unknown")
-                        activity_id = message_data.get("original_message", {}).get("activity_id")
-                    
-                    error_published = self.rabbitmq_client.publish_response_processing_error(
-                        original_message=message_data or {"error": "message_data not available"},
-                        error_info={
-                            "type": "critical_exception",
-                            "message": f"Критическая ошибка: {e}"
-                        },
-                        task_id=task_id,
-                        activity_id=activity_id
-                    )
-                    
-                    if error_published:
-                        self.rabbitmq_client.channel.basic_ack(delivery_tag=method_frame.delivery_tag)
-                        logger.info(f"Критическая ошибка для задачи {task_id} перемещена в очередь ошибок")
-                    else:
-                        # Если не удалось переместить в очередь ошибок - ACK чтобы не блокировать
-                        # (лучше потерять сообщение, чем заблокировать всю очередь)
-                        self.rabbitmq_client.channel.basic_ack(delivery_tag=method_frame.delivery_tag)
-                        logger.critical(f"ПОТЕРЯ ДАННЫХ: Не удалось сохранить ошибку для задачи {task_id}")
-                except Exception as ack_error:
-                    logger.critical(f"Не удалось обработать ошибку: {ack_error}")
-            
-            return False
+                    # Если не удалось переместить в очередь ошибок - ACK чтобы не блокировать
+                    # (лучше потерять сообщение, чем заблокировать всю очередь)
+                    logger.critical(f"ПОТЕРЯ ДАННЫХ: Не удалось сохранить ошибку для задачи {task_id}")
+                return True
+            except Exception as ack_error:
+                logger.critical(f"Не удалось обработать ошибку: {ack_error}")
+                return False
     
     def _convert_uf_result_answer(self, uf_result_answer_text: str) -> str:
         """
@@ -655,7 +776,7 @@ class UniversalCamundaWorker:
                 return
 
             # DEBUG: краткая сводка, сырой JSON не пишем в процесс
-            logger.debug(f"Questionnaires: taskId={questionnaires.get('taskId')} items={len(items)}")
+            logger.debug("Questionnaires: taskId={} items={}", questionnaires.get('taskId'), len(items))
 
             for qn in items:
                 if not isinstance(qn, dict):
@@ -721,9 +842,9 @@ class UniversalCamundaWorker:
             
             # Дополнительная информация о типе обработки
             if processing_status == "completed_by_tracker":
-                logger.info(f"Задача {task_id} завершена через tracker (автоматическое отслеживание)")
+                logger.debug("Задача {} завершена через tracker (автоматическое отслеживание)", task_id)
             else:
-                logger.info(f"Задача {task_id} завершена через прямой ответ системы")
+                logger.debug("Задача {} завершена через прямой ответ системы", task_id)
             
             # Подготавливаем переменные для Camunda
             original_variables = message_data.get("original_message", {}).get("variables", {})
@@ -766,19 +887,20 @@ class UniversalCamundaWorker:
                         # Создаем переменную с именем activity_id
                         variables.setdefault(activity_id, converted_value)
                         
-                        logger.debug(f"Создана переменная процесса: {activity_id} = '{converted_value}' (исходное: '{uf_result_answer_text}')")
+                        logger.debug("Создана переменная процесса: {} = '{}' (исходное: '{}')", activity_id, converted_value, uf_result_answer_text)
                     else:
                         # Ответ требуется, но не найден - используем значение по умолчанию
                         # Это может произойти, если задача была завершена без ответа
                         # ВАЖНО: не затираем существующее значение переменной (если оно уже есть в процессе).
                         # По умолчанию ставим 'no' (безопаснее для conditional flow, чем всегда 'ok').
                         variables.setdefault(activity_id, "no")
-                        logger.debug(f"Ответ требуется (ufResultExpected truthy), но ufResultAnswer_text не найден для activity_id: {activity_id}. Устанавливаем значение по умолчанию 'no'")
+                        logger.debug("Ответ требуется (ufResultExpected truthy), но ufResultAnswer_text не найден для activity_id: {}. Устанавливаем значение по умолчанию 'no'", activity_id)
                 else:
                     # Задача не требует ответа от пользователя — НЕ создаем переменную activity_id.
                     logger.debug(
-                        f"Задача {task_id} не требует ответа от пользователя "
-                        f"(ufResultExpected: {uf_result_expected}); переменная {activity_id} не будет создана"
+                        "Задача {} не требует ответа от пользователя "
+                        "(ufResultExpected: {}); переменная {} не будет создана",
+                        task_id, uf_result_expected, activity_id
                     )
             else:
                 logger.warning("Не найден activity_id в original_message")
@@ -801,7 +923,7 @@ class UniversalCamundaWorker:
             result = response_data.get("result", {})
             
             # Логируем структуру для отладки
-            logger.debug(f"Извлекаем данные из response_data.result: {result}")
+            logger.opt(lazy=True).debug("Извлекаем данные из response_data.result: {}", lambda: result)
             
             # Извлекаем данные задачи (например, от Bitrix24)
             task_data = result.get("task", {})
@@ -836,7 +958,7 @@ class UniversalCamundaWorker:
                 # так как они специфичны для конкретной задачи и не должны влиять на весь процесс
                 # УДаляем закомментированную секцию "Пользовательские поля (UF_)"
                 
-                logger.info(f"Извлечены данные задачи Bitrix24: ID={task_id}, Title={task_title}")
+                logger.debug("Извлечены данные задачи Bitrix24: ID={}, Title={}", task_id, task_title)
             
             # НЕ извлекаем системные данные из result в переменные процесса
             # так как они не нужны для логики процесса
@@ -860,40 +982,25 @@ class UniversalCamundaWorker:
                 - (False, error_info) при ошибке, где error_info содержит детали ошибки
         """
         try:
-            # Формируем URL для завершения задачи
-            base_url = self.config.base_url.rstrip('/')
-            if base_url.endswith('/engine-rest'):
-                api_base_url = base_url
-            else:
-                api_base_url = f"{base_url}/engine-rest"
-            
-            url = f"{api_base_url}/external-task/{task_id}/complete"
-            
-            # Подготавливаем payload
-            formatted_variables = self._format_variables(variables)
-            payload = {
-                "workerId": self.config.worker_id,
-                "variables": formatted_variables
-            }
+            url = self._complete_url_prefix + task_id + self._complete_url_suffix
             
-            # Настраиваем аутентификацию
-            auth = None
-            if self.config.auth_enabled:
-                auth = (self.config.auth_username, self.config.auth_password)
+            # Подготавливаем payload: сериализуем один раз в bytes и отправляем как есть
+            payload_bytes = orjson.dumps(
+                {**self._complete_base_payload, "variables": self._format_variables(variables)},
+                option=orjson.OPT_NON_STR_KEYS
+            )
             
-            import time
-            start_time = time.time()
+            start_time = time.monotonic()
             
             try:
-                response = requests.post(
+                response = self.http.post(
                     url, 
-                    json=payload, 
-                    auth=auth, 
+                    data=payload_bytes, 
                     timeout=10,  # Короткий таймаут - 10 секунд
                     headers={'Content-Type': 'application/json'}
                 )
                 
-                request_duration = time.time() - start_time
+                request_duration = time.monotonic() - start_time
                 
             except requests.exceptions.Timeout:
                 error_msg = f"Таймаут запроса к Camunda для задачи {task_id} (>10с)"
@@ -921,12 +1028,12 @@ class UniversalCamundaWorker:
                 }
             
             if response.status_code == 204:
-                self.stats["successful_completions"] += 1
+                self.stats.increment("successful_completions")
                 return True, None
             elif response.status_code == 404:
                 logger.warning(f"🔍 Задача {task_id} не найдена в Camunda (возможно уже завершена или истёк lock)")
                 # Считаем это успехом - задача больше не активна
-                self.stats["successful_completions"] += 1
+                self.stats.increment("successful_completions")
                 return True, None
             elif response.status_code == 500:
                 logger.error(f"💥 Внутренняя ошибка Camunda для задачи {task_id}: {response.text}")
@@ -947,12 +1054,12 @@ class UniversalCamundaWorker:
                     error_info["camunda_error_message"] = error_message
                 except:
                     pass
-                self.stats["failed_completions"] += 1
+                self.stats.increment("failed_completions")
                 return False, error_info
             else:
                 error_msg = f"Неожиданный код ответа от Camunda: HTTP {response.status_code}"
                 logger.error(f"❌ {error_msg} для задачи {task_id} - {response.text}")
-                self.stats["failed_completions"] += 1
+                self.stats.increment("failed_completions")
                 return False, {
                     "type": "unexpected_http_status",
                     "message": error_msg,
@@ -962,10 +1069,8 @@ class UniversalCamundaWorker:
                 
         except Exception as e:
             error_msg = f"Исключение при завершении задачи {task_id} в Camunda: {e}"
-            logger.error(f"💥 {error_msg}")
-            import traceback
-            traceback.print_exc()
-            self.stats["failed_completions"] += 1
+            logger.exception(f"💥 {error_msg}")
+            self.stats.increment("failed_completions")
             return False, {
                 "type": "exception",
                 "message": error_msg,
@@ -976,19 +1081,15 @@ class UniversalCamundaWorker:
         """Форматирование переменных для Camunda API"""
         formatted = {}
         for key, value in variables.items():
-            if value is None:
-                formatted[key] = {"value": None, "type": "Null"}
-            elif isinstance(value, str):
-                formatted[key] = {"value": value, "type": "String"}
-            elif isinstance(value, bool):
-                formatted[key] = {"value": value, "type": "Boolean"}
-            elif isinstance(value, int):
-                formatted[key] = {"value": value, "type": "Long"}
-            elif isinstance(value, float):
-                formatted[key] = {"value": value, "type": "Double"}
+            camunda_type = _CAMUNDA_TYPES.get(type(value))
+            if camunda_type is not None:
+                formatted[key] = {"value": value, "type": camunda_type}
+            elif type(value) is dict and len(value) == 1 and type(value.get(PRESERIALIZED_JSON_KEY)) is str:
+                # Уже сериализованный JSON передается без повторного разбора
+                formatted[key] = {"value": value[PRESERIALIZED_JSON_KEY], "type": "Json"}
             else:
-                # Для сложных типов используем JSON
-                formatted[key] = {"value": json.dumps(value, ensure_ascii=False), "type": "Json"}
+                # Для сложных типов используем JSON (Camunda ожидает строку в value)
+                formatted[key] = {"value": orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode(), "type": "Json"}
         return formatted
     
     def start(self):
@@ -999,25 +1100,45 @@ class UniversalCamundaWorker:
                 return False
             
             logger.info("Запуск Universal Camunda Worker...")
-            self.stats["start_time"] = time.time()
+            self.stats.start_time = time.time()
+            self.stats.start_monotonic = time.monotonic()
             self.running = True
             
             # Получение списка топиков
-            topics = list(self.routing_config.TOPIC_TO_SYSTEM_MAPPING.keys())
-            logger.info(f"Запуск обработки {len(topics)} топиков: {topics}")
+            topics = self._topics
+            logger.info(f"Запуск обработки {len(topics)} топиков: {list(topics)}")
+            
+            # Пул потоков обработки задач из общей очереди
+            for index in range(self.processor_threads_count):
+                thread = threading.Thread(
+                    target=self._processor_loop,
+                    daemon=True,
+                    name=f"Processor-{index + 1}"
+                )
+                thread.start()
+                self.worker_threads.append(thread)
+            logger.info(f"Запущено потоков обработки задач: {self.processor_threads_count}")
             
-            # Создание потоков для каждого топика
+            # Потоки получения задач для каждого топика
             for topic in topics:
                 thread = threading.Thread(
-                    target=self._fetch_and_process_loop,
+                    target=self._fetch_loop,
                     args=(topic,),
                     daemon=True,
-                    name=f"Worker-{topic}"
+                    name=f"Fetcher-{topic}"
                 )
                 thread.start()
                 self.worker_threads.append(thread)
                 logger.info(f"Запущен поток для топика: {topic}")
             
+            # Потребитель очереди ответов (push-модель на собственном IO loop)
+            self.response_consumer = self.rabbitmq_client.consume_responses_async(
+                self._submit_response,
+                prefetch_count=self.worker_config.response_prefetch_count,
+                ack_batch_size=self.worker_config.response_ack_batch_size,
+                ack_interval=self.worker_config.response_ack_interval
+            )
+            
             # Поток мониторинга
             monitor_thread = threading.Thread(
                 target=self._monitor_loop,
@@ -1028,6 +1149,9 @@ class UniversalCamundaWorker:
             self.worker_threads.append(monitor_thread)
             
             logger.info("Worker запущен и ожидает задачи...")
+            self.ready.set()
+            if self._on_ready:
+                self._on_ready()
             
             # Ожидание завершения
             try:
@@ -1038,34 +1162,29 @@ class UniversalCamundaWorker:
                 self.shutdown()
                 
         except Exception as e:
-            logger.error(f"Ошибка запуска Worker: {e}")
-            traceback.print_exc()
+            logger.exception(f"Ошибка запуска Worker: {e}")
             self.shutdown()
             return False
         
         return True
     
     def _monitor_loop(self):
-        """Поток мониторинга соединений и обработки ответов"""
-        last_response_check = 0
-        
+        """Поток мониторинга соединения с RabbitMQ"""
         while not self.stop_event.is_set():
             try:
-                current_time = time.time()
+                # Проверка каждые heartbeat_interval секунд либо сразу по запросу
+                # переподключения от путей публикации
+                reconnect_requested = self.rabbitmq_client.wait_reconnect_request(
+                    self.worker_config.heartbeat_interval
+                )
+                if self.stop_event.is_set():
+                    break
                 
-                if self.running and self.stats["start_time"]:
+                if self.running and self.stats.start_time:
                     # Проверка соединения с RabbitMQ
-                    if not self.rabbitmq_client.is_connected():
+                    if reconnect_requested or not self.rabbitmq_client.is_connected():
                         logger.warning("RabbitMQ соединение потеряно, попытка переподключения...")
                         self.rabbitmq_client.reconnect()
-                    
-                    # Проверка очереди ответов с интервалом heartbeat_interval
-                    if current_time - last_response_check >= self.worker_config.heartbeat_interval:
-                        self._check_response_queue()
-                        last_response_check = current_time
-                
-                # Проверка каждые heartbeat_interval секунд
-                self.stop_event.wait(self.worker_config.heartbeat_interval)
                 
             except Exception as e:
                 logger.error(f"Ошибка в мониторинге: {e}")
@@ -1077,6 +1196,15 @@ class UniversalCamundaWorker:
         self.running = False
         self.stop_event.set()
         
+        # Остановка потребителя ответов: неподтвержденные сообщения вернутся в очередь
+        if self.response_consumer:
+            self.response_consumer.stop()
+        self._response_pool.shutdown(wait=False, cancel_futures=True)
+        self.http.close()
+        
+        # Пробуждение потока мониторинга: при установленном stop_event он завершается без переподключения
+        self.rabbitmq_client.request_reconnect()
+        
         # Ожидание завершения потоков
         for thread in self.worker_threads:
             if thread.is_alive():
@@ -1085,29 +1213,39 @@ class UniversalCamundaWorker:
         # Закрытие RabbitMQ соединения
         self.rabbitmq_client.disconnect()
         
+        # Остановка пула парсинга BPMN
+        if self.metadata_cache:
+            self.metadata_cache.close()
+        
         # Финальная статистика
-        if self.stats["start_time"]:
-            uptime = time.time() - self.stats["start_time"]
+        if self.stats.start_monotonic:
+            stats = self.stats.snapshot()
+            uptime = time.monotonic() - stats["start_monotonic"]
             logger.info(
                 f"Финальная статистика - Uptime: {uptime:.0f}s | "
-                f"Обработано: {self.stats['processed_tasks']} | "
-                f"Успешно: {self.stats['successful_tasks']} | "
-                f"Ошибки: {self.stats['failed_tasks']}"
+                f"Обработано: {stats['processed_tasks']} | "
+                f"Успешно: {stats['successful_tasks']} | "
+                f"Ошибки: {stats['failed_tasks']}"
             )
         
         logger.info("Universal Worker завершен")
     
     def get_status(self) -> Dict[str, Any]:
         """Получение текущего статуса Worker с информацией о кэше метаданных и обработке ответов"""
-        uptime = time.time() - self.stats["start_time"] if self.stats["start_time"] else 0
+        stats = self.stats.snapshot()
+        uptime = time.monotonic() - stats["start_monotonic"] if stats["start_monotonic"] else 0
         
         status = {
             "is_running": self.running,
+            "is_ready": self.ready.is_set(),
             "uptime_seconds": uptime,
-            "stats": self.stats.copy(),
+            "stats": stats,
             "architecture": "stateless",
             "active_threads": len([t for t in self.worker_threads if t.is_alive()]),
-            "topics": list(self.routing_config.TOPIC_TO_SYSTEM_MAPPING.keys()),
+            "processor_threads": self.processor_threads_count,
+            "task_queue_size": self.task_queue.qsize(),
+            "poll_sleep_seconds": dict(self._poll_sleep),
+            "topics": list(self._topics),
             "lock_duration_minutes": self.config.lock_duration / (1000 * 60),
             "heartbeat_interval_seconds": self.worker_config.heartbeat_interval,
             "camunda_config": {
@@ -1121,10 +1259,12 @@ class UniversalCamundaWorker:
             "response_processing": {
                 "enabled": True,
                 "queue_name": self.rabbitmq_config.responses_queue_name,
-                "check_interval_seconds": self.worker_config.heartbeat_interval,
-                "processed_responses": self.stats["processed_responses"],
-                "successful_completions": self.stats["successful_completions"],
-                "failed_completions": self.stats["failed_completions"]
+                "consuming": bool(self.response_consumer and self.response_consumer.is_consuming()),
+                "prefetch_count": self.worker_config.response_prefetch_count,
+                "processing_threads": self.response_threads_count,
+                "processed_responses": stats["processed_responses"],
+                "successful_completions": stats["successful_completions"],
+                "failed_completions": stats["failed_completions"]
             }
         }
         
@@ -3,7 +3,8 @@
 """
 import os
 import sys
-from typing import Dict, List, Optional
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
@@ -63,6 +64,10 @@ class RabbitMQConfig(BaseSettings):
     virtual_host: str = Field(default="/", env="RABBITMQ_VIRTUAL_HOST")
     heartbeat: int = Field(default=600, env="RABBITMQ_HEARTBEAT")
     blocked_connection_timeout: int = Field(default=300, env="RABBITMQ_BLOCKED_CONNECTION_TIMEOUT")
+    # Количество каналов публикации на соединении издателя
+    publish_channels: int = Field(default=4, env="RABBITMQ_PUBLISH_CHANNELS")
+    # Емкость очереди сообщений, ожидающих публикации (back-pressure для потоков обработки)
+    publish_queue_size: int = Field(default=10000, env="RABBITMQ_PUBLISH_QUEUE_SIZE")
     
     # Exchange для исходящих задач
     tasks_exchange_name: str = Field(default="camunda.external.tasks", env="RABBITMQ_TASKS_EXCHANGE")
@@ -91,6 +96,26 @@ class WorkerConfig(BaseSettings):
     # Настройки для обработчика ответов
     response_handler_enabled: bool = Field(default=True, env="RESPONSE_HANDLER_ENABLED")
     response_processing_interval: int = Field(default=5, env="RESPONSE_PROCESSING_INTERVAL")  # секунды
+    # Prefetch (basic_qos) канала ответов. Малое значение простаивает на
+    # round trip брокера при каждом ACK, неограниченное - забирает в память
+    # клиента всю очередь; значение порядка числа сообщений, обрабатываемых
+    # за время HTTP запроса к Camunda, дает почти полную пропускную способность.
+    # Не меньше размера пачки ACK, иначе пачка не набирается
+    response_prefetch_count: int = Field(default=100, env="RESPONSE_PREFETCH_COUNT")
+    # Потоков обработки ответов (0 - по RESPONSE_PREFETCH_COUNT)
+    response_processing_threads: int = Field(default=0, env="RESPONSE_PROCESSING_THREADS")
+    # Подтверждение ответов пачкой: один basic_ack(multiple=True) на
+    # RESPONSE_ACK_BATCH_SIZE сообщений или раз в RESPONSE_ACK_INTERVAL секунд
+    response_ack_batch_size: int = Field(default=50, env="RESPONSE_ACK_BATCH_SIZE")
+    response_ack_interval: float = Field(default=0.2, env="RESPONSE_ACK_INTERVAL")  # секунды
+    
+    # Количество потоков обработки задач из общей очереди (0 - max(4, число CPU))
+    processor_threads: int = Field(default=0, env="WORKER_PROCESSOR_THREADS")
+    
+    # Количество процессов для парсинга BPMN XML (0 - по числу CPU)
+    bpmn_parse_workers: int = Field(default=0, env="BPMN_PARSE_WORKERS")
+    # Каталог дискового кэша BPMN XML по ID определения процесса (пусто - отключен)
+    bpmn_xml_cache_dir: str = Field(default="", env="BPMN_XML_CACHE_DIR")
     
     class Config:
         # Убираем env_prefix чтобы использовать переменные без префикса
@@ -138,6 +163,13 @@ class RoutingConfig:
         "data_processing": "python-services",
     }
     
+    # Топики, получатели которых используют метаданные BPMN (extensionProperties,
+    # processProperties и т.д.). Сейчас метаданные читает только обработчик Bitrix24,
+    # для остальных топиков BPMN XML не запрашивается и не парсится.
+    TOPICS_NEEDING_METADATA: FrozenSet[str] = frozenset(
+        topic for topic, system in TOPIC_TO_SYSTEM_MAPPING.items() if system == "bitrix24"
+    )
+    
     # Очереди для каждой системы
     SYSTEM_QUEUES: Dict[str, str] = {
         "bitrix24": "bitrix24.queue",
@@ -178,6 +210,18 @@ class RoutingConfig:
         system = cls.get_system_for_topic(topic)
         return f"{system}.{topic}"
     
+    @classmethod
+    @lru_cache(maxsize=256)
+    def resolve(cls, topic: str) -> Tuple[str, str]:
+        """
+        Routing key и система для топика за один вызов.
+        
+        Результат кэшируется: маппинг топиков статический, а вызов
+        выполняется на каждую публикацию задачи.
+        """
+        system = cls.get_system_for_topic(topic)
+        return f"{system}.{topic}", system
+    
     @classmethod
     def get_queue_for_system(cls, system: str) -> str:
         """Получить очередь для системы"""
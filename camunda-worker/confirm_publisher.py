@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Асинхронный издатель с подтверждениями (publisher confirms) на базе pika.SelectConnection
+"""
+import itertools
+import queue
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import partial
+from typing import List, Optional
+
+import pika
+from loguru import logger
+
+
+class _ConfirmChannel:
+    """Канал пула издателя: собственная нумерация delivery_tag и ожидающие подтверждения"""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.channel = None
+        self.delivery_tag = 0
+        # delivery_tag -> Future, в порядке публикации
+        self.pending: "OrderedDict[int, Future]" = OrderedDict()
+        self.ready = False
+
+
+class ConfirmPublisher:
+    """
+    Издатель сообщений с собственным IO loop и асинхронными подтверждениями.
+
+    publish() потокобезопасен и возвращает Future[bool]: True - брокер
+    подтвердил сообщение (Basic.Ack), False - отклонил (Basic.Nack). Сообщения
+    публикуются без ожидания подтверждения каждого, брокер подтверждает их
+    пачками (multiple=True), поэтому несколько потоков публикуют конвейером,
+    а не по одному round trip на сообщение.
+
+    publish() только кладет сообщение в ограниченную очередь и будит IO loop
+    (один раз на пачку, а не на каждое сообщение); basic_publish выполняет
+    только поток IO loop. При переполненной очереди publish() ждет до
+    put_timeout секунд (back-pressure), затем завершает Future ошибкой.
+
+    На одном соединении открывается пул из channel_count каналов. Публикации
+    с ключом шардирования (топик задачи) всегда идут в один и тот же канал
+    пула - независимые топики не делят канал, а порядок сообщений одного
+    топика сохраняется; остальные публикации распределяются по кругу. Закрытый брокером канал переоткрывается
+    без разрыва соединения; при потере соединения незавершенные Future
+    получают ConnectionError, издатель переподключается самостоятельно.
+    """
+
+    def __init__(self, parameters: pika.ConnectionParameters, channel_count: int = 4,
+                 queue_size: int = 10000, put_timeout: float = 5, reconnect_delay: int = 5):
+        """
+        Args:
+            parameters: Параметры подключения к RabbitMQ
+            channel_count: Количество каналов публикации на соединении
+            queue_size: Емкость очереди сообщений, ожидающих публикации
+            put_timeout: Максимальное ожидание места в очереди в секундах
+            reconnect_delay: Пауза перед переподключением в секундах
+        """
+        self.parameters = parameters
+        self.channel_count = max(1, channel_count)
+        self.put_timeout = put_timeout
+        self.reconnect_delay = reconnect_delay
+
+        self._outbox: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._wakeup_lock = threading.Lock()
+        self._wakeup_scheduled = False
+
+        self._connection: Optional[pika.SelectConnection] = None
+        self._channels: List[_ConfirmChannel] = [_ConfirmChannel(i) for i in range(self.channel_count)]
+        self._next_channel = itertools.count()
+        self._ready = threading.Event()
+        self._drained = threading.Event()
+        self._drained.set()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Запуск IO loop издателя в отдельном потоке"""
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="ConfirmPublisher")
+        self._thread.start()
+
+    def wait_ready(self, timeout: float) -> bool:
+        """Ожидание хотя бы одного открытого канала в режиме подтверждений"""
+        return self._ready.wait(timeout)
+
+    def is_ready(self) -> bool:
+        """Есть открытый канал, готовый к публикации"""
+        return self._ready.is_set()
+
+    def pending_count(self) -> int:
+        """Количество сообщений, ожидающих подтверждения"""
+        return sum(len(slot.pending) for slot in self._channels)
+
+    def queue_size(self) -> int:
+        """Количество сообщений, ожидающих публикации"""
+        return self._outbox.qsize()
+
+    def stop(self, timeout: float = 10):
+        """Остановка издателя: ожидание публикации очереди и оставшихся подтверждений, закрытие соединения"""
+        deadline = time.monotonic() + timeout
+        while self._ready.is_set() and (self._outbox.qsize() or not self._drained.is_set()):
+            if time.monotonic() >= deadline:
+                logger.warning(
+                    f"Не дождались публикации {self._outbox.qsize()} и подтверждения "
+                    f"{self.pending_count()} сообщений при остановке"
+                )
+                break
+            self._drained.wait(0.05)
+
+        self._stop_event.set()
+        connection = self._connection
+        if connection is not None:
+            try:
+                connection.ioloop.add_callback_threadsafe(self._close_connection)
+            except Exception as e:
+                logger.debug(f"IO loop издателя уже остановлен: {e}")
+
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=timeout)
+        logger.info("Издатель RabbitMQ остановлен")
+
+    def publish(self, exchange: str, routing_key: str, body, properties: pika.BasicProperties,
+                shard_key: Optional[str] = None) -> Future:
+        """
+        Публикация сообщения из любого потока.
+
+        Args:
+            shard_key: Ключ выбора канала пула (None - по кругу)
+
+        Returns:
+            Future[bool] с результатом подтверждения брокером
+        """
+        future = Future()
+        connection = self._connection
+        if connection is None or not self._ready.is_set():
+            future.set_exception(ConnectionError("Издатель RabbitMQ не подключен"))
+            return future
+        try:
+            self._outbox.put((exchange, routing_key, body, properties, shard_key, future),
+                             timeout=self.put_timeout)
+        except queue.Full:
+            future.set_exception(RuntimeError(
+                f"Очередь публикации переполнена ({self._outbox.maxsize} сообщений)"
+            ))
+            return future
+
+        with self._wakeup_lock:
+            if self._wakeup_scheduled:
+                return future
+            self._wakeup_scheduled = True
+        try:
+            connection.ioloop.add_callback_threadsafe(self._drain_outbox)
+        except Exception as e:
+            with self._wakeup_lock:
+                self._wakeup_scheduled = False
+            logger.warning(f"IO loop издателя недоступен: {e}")
+        return future
+
+    def _run(self):
+        """Цикл IO loop с переподключением при потере соединения"""
+        while not self._stop_event.is_set():
+            try:
+                self._connection = pika.SelectConnection(
+                    parameters=self.parameters,
+                    on_open_callback=self._on_connection_open,
+                    on_open_error_callback=self._on_connection_open_error,
+                    on_close_callback=self._on_connection_closed
+                )
+                self._connection.ioloop.start()
+            except Exception as e:
+                logger.error(f"Ошибка IO loop издателя: {e}")
+            finally:
+                self._ready.clear()
+                for slot in self._channels:
+                    slot.channel = None
+                    slot.ready = False
+                    self._fail_pending(slot, "Соединение издателя закрыто")
+                self._fail_outbox("Соединение издателя закрыто")
+
+            if not self._stop_event.is_set():
+                logger.warning(f"Переподключение издателя через {self.reconnect_delay}s...")
+                self._stop_event.wait(self.reconnect_delay)
+
+        self._connection = None
+
+    def _on_connection_open(self, connection):
+        if self._stop_event.is_set():
+            connection.close()
+            return
+        for slot in self._channels:
+            self._open_channel(slot)
+
+    def _on_connection_open_error(self, connection, error):
+        logger.error(f"Ошибка подключения издателя к RabbitMQ: {error}")
+        connection.ioloop.stop()
+
+    def _on_connection_closed(self, connection, reason):
+        self._ready.clear()
+        if not self._stop_event.is_set():
+            logger.warning(f"Соединение издателя закрыто: {reason}")
+        connection.ioloop.stop()
+
+    def _open_channel(self, slot: _ConfirmChannel):
+        self._connection.channel(on_open_callback=partial(self._on_channel_open, slot))
+
+    def _on_channel_open(self, slot: _ConfirmChannel, channel):
+        slot.channel = channel
+        slot.delivery_tag = 0
+        channel.add_on_close_callback(partial(self._on_channel_closed, slot))
+        channel.confirm_delivery(ack_nack_callback=partial(self._on_delivery_confirmation, slot),
+                                 callback=partial(self._on_confirm_ok, slot))
+
+    def _on_confirm_ok(self, slot: _ConfirmChannel, _frame):
+        slot.ready = True
+        if not self._ready.is_set():
+            self._ready.set()
+            logger.info(f"Издатель RabbitMQ подключен (publisher confirms, каналов: {self.channel_count})")
+            # publish(), прошедший проверку _ready до потери соединения, мог положить
+            # сообщение в очередь и запланировать пробуждение на IO loop закрытого
+            # соединения: флаг пробуждения сбрасывается, очередь публикуется здесь
+            self._drain_outbox()
+
+    def _on_channel_closed(self, slot: _ConfirmChannel, channel, reason):
+        slot.channel = None
+        slot.ready = False
+        self._fail_pending(slot, f"Канал издателя закрыт: {reason}")
+        if not any(s.ready for s in self._channels):
+            self._ready.clear()
+
+        connection = self._connection
+        if self._stop_event.is_set() or connection is None or not connection.is_open:
+            return
+        # Канал легковесен: переоткрываем только его, соединение сохраняется
+        logger.warning(f"Канал издателя #{slot.index} закрыт: {reason}, переоткрываем")
+        self._open_channel(slot)
+
+    def _select_channel(self, shard_key: Optional[str] = None) -> Optional[_ConfirmChannel]:
+        """
+        Готовый канал пула: по хэшу shard_key либо следующий по кругу.
+        Если выбранный канал переоткрывается, берется следующий готовый.
+        """
+        if shard_key is None:
+            start = next(self._next_channel)
+        else:
+            start = zlib.crc32(shard_key.encode())
+        for offset in range(self.channel_count):
+            slot = self._channels[(start + offset) % self.channel_count]
+            if slot.ready and slot.channel is not None and slot.channel.is_open:
+                return slot
+        return None
+
+    def _drain_outbox(self):
+        """Публикация всех накопившихся сообщений за одно пробуждение IO loop"""
+        with self._wakeup_lock:
+            self._wakeup_scheduled = False
+        while True:
+            try:
+                item = self._outbox.get_nowait()
+            except queue.Empty:
+                return
+            self._publish(*item)
+
+    def _fail_outbox(self, reason: str):
+        """Завершение неопубликованных сообщений ошибкой соединения"""
+        with self._wakeup_lock:
+            self._wakeup_scheduled = False
+        while True:
+            try:
+                future = self._outbox.get_nowait()[-1]
+            except queue.Empty:
+                return
+            if not future.done():
+                future.set_exception(ConnectionError(reason))
+
+    def _publish(self, exchange: str, routing_key: str, body, properties: pika.BasicProperties,
+                 shard_key: Optional[str], future: Future):
+        """basic_publish в потоке IO loop"""
+        slot = self._select_channel(shard_key)
+        if slot is None:
+            future.set_exception(ConnectionError("Нет открытых каналов издателя"))
+            return
+        try:
+            slot.channel.basic_publish(exchange=exchange, routing_key=routing_key,
+                                       body=body, properties=properties)
+        except Exception as e:
+            future.set_exception(e)
+            return
+        slot.delivery_tag += 1
+        slot.pending[slot.delivery_tag] = future
+        self._drained.clear()
+
+    def _on_delivery_confirmation(self, slot: _ConfirmChannel, frame):
+        """Обработка Basic.Ack / Basic.Nack, в том числе пачкой (multiple=True)"""
+        method = frame.method
+        ack = isinstance(method, pika.spec.Basic.Ack)
+        if method.multiple:
+            while slot.pending:
+                tag, future = next(iter(slot.pending.items()))
+                if tag > method.delivery_tag:
+                    break
+                del slot.pending[tag]
+                future.set_result(ack)
+        else:
+            future = slot.pending.pop(method.delivery_tag, None)
+            if future is not None:
+                future.set_result(ack)
+        self._update_drained()
+
+    def _fail_pending(self, slot: _ConfirmChannel, reason: str):
+        """Завершение неподтвержденных публикаций канала ошибкой соединения"""
+        pending, slot.pending = slot.pending, OrderedDict()
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError(reason))
+        self._update_drained()
+
+    def _update_drained(self):
+        if not any(slot.pending for slot in self._channels):
+            self._drained.set()
+
+    def _close_connection(self):
+        connection = self._connection
+        if connection is None:
+            return
+        if connection.is_open:
+            connection.close()
+        elif connection.is_closed:
+            connection.ioloop.stop()
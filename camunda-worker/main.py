@@ -4,8 +4,9 @@
 """
 import sys
 import os
+import queue
+import signal
 import threading
-import time
 
 # Импорт env_loader ПЕРВЫМ для определения среды
 sys.path.insert(0, "/opt/exchanger.py")
@@ -36,23 +37,30 @@ def setup_logging():
         "<level>{message}</level>"
     )
     
-    # Консольный вывод
+    # Консольный вывод (через фоновый поток loguru, как и файловые)
     logger.add(
         sys.stdout,
         format=log_format,
         level=worker_config.log_level,
-        colorize=True
+        colorize=True,
+        enqueue=True
     )
     
-    # Файловый вывод - путь зависит от среды
+    # Файловый вывод - путь зависит от среды.
+    # enqueue=True: запись на диск выполняется фоновым потоком loguru,
+    # рабочие потоки не блокируются на файловом I/O
     logger.add(
         get_log_path("camunda-worker.log"),
         format=log_format,
         level=worker_config.log_level,
-        rotation="100 MB",
+        rotation="500 MB",
         retention="30 days",
         compression="zip",
-        encoding="utf-8"
+        encoding="utf-8",
+        buffering=65536,
+        enqueue=True,
+        backtrace=False,
+        diagnose=False
     )
     
     # Файл ошибок - путь зависит от среды
@@ -63,7 +71,11 @@ def setup_logging():
         rotation="50 MB",
         retention="60 days",
         compression="zip",
-        encoding="utf-8"
+        encoding="utf-8",
+        buffering=65536,
+        enqueue=True,
+        backtrace=False,
+        diagnose=False
     )
 
 
@@ -114,54 +126,69 @@ def main():
         else:
             logger.warning("⚠️  SSL Patch: НЕ применен!")
         
-        # Создание основного worker
-        worker = UniversalCamundaWorker()
+        # События состояния компонентов: (компонент, состояние, ошибка).
+        # Основной поток блокируется на очереди и просыпается только при изменении состояния
+        status_queue: "queue.Queue[tuple]" = queue.Queue()
         
-        # Флаг для управления работой
-        worker_running = threading.Event()
-        shutdown_event = threading.Event()
+        # Создание основного worker: о готовности (после подключений и запуска
+        # потоков) worker сообщает событием "ready"
+        worker = UniversalCamundaWorker(
+            on_ready=lambda: status_queue.put(("worker", "ready", None))
+        )
         
         def run_worker():
             """Запуск основного worker в отдельном потоке"""
+            error = None
             try:
                 logger.info("Запуск Universal Camunda Worker...")
-                worker_running.set()
                 worker.start()
             except Exception as e:
+                error = e
                 logger.error(f"Ошибка в Universal Camunda Worker: {e}")
             finally:
-                worker_running.clear()
-                shutdown_event.set()
+                status_queue.put(("worker", "stopped", error))
+        
+        def handle_signal(signum, frame):
+            """SIGINT/SIGTERM: только постановка события, завершение выполняет основной поток"""
+            logger.info(f"Получен сигнал {signum}, завершение работы...")
+            status_queue.put(("main", "signal", None))
+        
+        # Обработчики устанавливаются после создания worker и заменяют его
+        # собственные (sys.exit из обработчика прерывал бы основной поток
+        # до корректного завершения)
+        signal.signal(signal.SIGINT, handle_signal)
+        signal.signal(signal.SIGTERM, handle_signal)
         
         # Запуск worker
         worker_thread = threading.Thread(target=run_worker, daemon=True)
         worker_thread.start()
         
-        logger.info("Universal Camunda Worker запущен")
-        logger.info("- External Tasks: обработка задач из Camunda")
-        logger.info("- Response Processing: встроенная обработка ответов из RabbitMQ")
-        logger.info(f"- Heartbeat Interval: {worker_config.heartbeat_interval}s")
-        logger.info("Нажмите Ctrl+C для завершения")
-        
-        # Ожидание завершения
-        try:
-            while not shutdown_event.is_set():
-                # Проверка состояния worker с интервалом HEARTBEAT_INTERVAL
-                if shutdown_event.wait(worker_config.heartbeat_interval):
-                    break
-                
-                # Логирование состояния только при изменении или проблемах
-                if not worker_running.is_set():
-                    logger.error("Worker остановлен, завершение приложения")
-                    break
-                    
-        except KeyboardInterrupt:
-            logger.info("Получен сигнал прерывания от пользователя")
+        # Ожидание событий состояния компонентов
+        worker_stopped = False
+        while True:
+            component, state, error = status_queue.get()
+            if state == "ready":
+                logger.info("Universal Camunda Worker запущен")
+                logger.info("- External Tasks: обработка задач из Camunda")
+                logger.info("- Response Processing: встроенная обработка ответов из RabbitMQ")
+                logger.info(f"- Heartbeat Interval: {worker_config.heartbeat_interval}s")
+                logger.info("Нажмите Ctrl+C для завершения")
+                continue
+            
+            if state == "signal":
+                break
+            
+            worker_stopped = True
+            if error is not None:
+                logger.error(f"Компонент {component} остановлен с ошибкой: {error}")
+            else:
+                logger.info(f"Компонент {component} остановлен, завершение приложения")
+            break
         
         # Корректное завершение
         logger.info("Завершение работы...")
         
-        if worker_running.is_set():
+        if not worker_stopped:
             worker.shutdown()
         
         # Ожидание завершения потока
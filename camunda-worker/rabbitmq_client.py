@@ -1,13 +1,100 @@
 """
 RabbitMQ клиент для отправки задач от Camunda
 """
-import json
+import hashlib
+import orjson
 import pika
+import threading
 import time
 import requests
-from typing import Dict, Any, Optional
+import struct
+from urllib.parse import quote
+from concurrent.futures import Future
+from functools import partial
+from typing import Dict, Any, List, Optional, Tuple
 from loguru import logger
 from config import rabbitmq_config, routing_config, response_config
+from confirm_publisher import ConfirmPublisher
+from response_consumer import ResponseConsumer
+
+
+# Общие свойства устойчивых JSON сообщений
+_PERSISTENT_JSON = dict(
+    delivery_mode=2,  # Устойчивое сообщение
+    content_type='application/json'
+)
+
+# Свойства сообщений об ошибках задач: без заголовков и timestamp,
+# один неизменяемый экземпляр на все публикации
+_ERROR_PROPS = pika.BasicProperties(**_PERSISTENT_JSON)
+
+
+# Паузы между попытками полного переподключения в секундах
+_RECONNECT_BACKOFF = (0.1, 0.5, 2, 5)
+
+
+# Необязательные поля задачи Camunda: (ключ в сообщении, ключ в задаче).
+# Поля со значением None не включаются в сообщение
+_OPTIONAL_TASK_FIELDS = (
+    ("process_definition_key", "processDefinitionKey"),
+    ("activity_instance_id", "activityInstanceId"),
+    ("worker_id", "workerId"),
+    ("retries", "retries"),
+    ("created_time", "createTime"),
+    ("tenant_id", "tenantId"),
+    ("business_key", "businessKey"),
+)
+
+
+def _dumps(data: Dict[str, Any]) -> bytes:
+    """Сериализация тела сообщения в JSON (UTF-8 без экранирования, как json.dumps(..., ensure_ascii=False))"""
+    return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
+
+# Заголовок x-meta сообщения задачи: длины полей (big-endian uint16),
+# затем сами поля в UTF-8 в порядке _TASK_META_FIELDS
+_TASK_META_FIELDS = ("camunda_topic", "target_system", "task_id", "process_instance_id")
+_META_STRUCT = struct.Struct('>HHHH')
+# Максимальная длина поля x-meta в байтах (длина хранится в uint16)
+META_FIELD_MAX_BYTES = 0xFFFF
+
+
+def pack_task_meta(topic: str, system: str, task_id: Optional[str],
+                   process_instance_id: Optional[str]) -> bytes:
+    """
+    Упаковка метаданных задачи в один бинарный заголовок x-meta (None -> пустая строка).
+    
+    Raises:
+        ValueError: Поле длиннее META_FIELD_MAX_BYTES байт в UTF-8
+    """
+    values = [(value or "").encode() for value in (topic, system, task_id, process_instance_id)]
+    for name, value in zip(_TASK_META_FIELDS, values):
+        if len(value) > META_FIELD_MAX_BYTES:
+            raise ValueError(
+                f"Поле {name} заголовка x-meta слишком длинное: {len(value)} байт "
+                f"(максимум {META_FIELD_MAX_BYTES})"
+            )
+    return _META_STRUCT.pack(*map(len, values)) + b"".join(values)
+
+
+def unpack_task_meta(meta: bytes) -> Dict[str, str]:
+    """
+    Распаковка заголовка x-meta в словарь {camunda_topic, target_system, task_id, process_instance_id}.
+    
+    Raises:
+        ValueError: Заголовок усечен или длины полей не совпадают с размером данных
+    """
+    if len(meta) < _META_STRUCT.size:
+        raise ValueError(f"Некорректный заголовок x-meta: {len(meta)} байт")
+    lengths = _META_STRUCT.unpack_from(meta)
+    if _META_STRUCT.size + sum(lengths) != len(meta):
+        raise ValueError(f"Некорректный заголовок x-meta: длины полей {lengths}, размер {len(meta)} байт")
+    offset = _META_STRUCT.size
+    result = {}
+    for name, length in zip(_TASK_META_FIELDS, lengths):
+        result[name] = meta[offset:offset + length].decode()
+        offset += length
+    return result
 
 
 class RabbitMQClient:
@@ -20,26 +107,50 @@ class RabbitMQClient:
         self.connection: Optional[pika.BlockingConnection] = None
         self.channel: Optional[pika.channel.Channel] = None
         
+        # Состояние основного соединения. BlockingConnection не предоставляет
+        # callback'ов закрытия, поэтому флаг ведется путями подключения,
+        # закрытия и ошибок AMQP на основном канале
+        self._alive = False
+        # Запрос переподключения из путей публикации: сами публикации не
+        # проверяют соединение, переподключение выполняет фоновый поток
+        self._needs_reconnect = threading.Event()
+        
+        # Публикация выполняется через отдельное соединение с асинхронными
+        # подтверждениями; BlockingConnection не потокобезопасен, поэтому
+        # потоки обработки не публикуют через основной канал.
+        # Издатель создается лениво при первой публикации
+        self.publisher = None
+        self._publisher_lock = threading.Lock()
+        self.confirm_timeout = 30
+        
+        # Отпечаток топологии, успешно объявленной в этом процессе
+        self._declared_topology: Optional[str] = None
+        
+        # HTTP сессия Management API (keep-alive, создается при первом запросе)
+        self._management_session: Optional[requests.Session] = None
+        
+    def connection_parameters(self) -> pika.ConnectionParameters:
+        """Параметры подключения к RabbitMQ (общие для всех соединений клиента)"""
+        credentials = pika.PlainCredentials(
+            username=self.config.username,
+            password=self.config.password
+        )
+        
+        return pika.ConnectionParameters(
+            host=self.config.host,
+            port=self.config.port,
+            virtual_host=self.config.virtual_host,
+            credentials=credentials,
+            heartbeat=600,
+            blocked_connection_timeout=300,
+        )
+    
     def connect(self) -> bool:
         """Подключение к RabbitMQ"""
         try:
-            # Настройка подключения
-            credentials = pika.PlainCredentials(
-                username=self.config.username,
-                password=self.config.password
-            )
-            
-            parameters = pika.ConnectionParameters(
-                host=self.config.host,
-                port=self.config.port,
-                virtual_host=self.config.virtual_host,
-                credentials=credentials,
-                heartbeat=600,
-                blocked_connection_timeout=300,
-            )
-            
-            self.connection = pika.BlockingConnection(parameters)
+            self.connection = pika.BlockingConnection(self.connection_parameters())
             self.channel = self.connection.channel()
+            self._alive = True
             
             logger.info(f"Подключение к RabbitMQ успешно: {self.config.host}:{self.config.port}")
             return True
@@ -48,6 +159,30 @@ class RabbitMQClient:
             logger.error(f"Ошибка подключения к RabbitMQ: {e}")
             return False
     
+    def _topology_fingerprint(self) -> str:
+        """SHA-256 описания топологии: exchange, очереди и привязки"""
+        topology = {
+            "alternate_exchange": [self.config.alternate_exchange_name, self.config.alternate_exchange_type],
+            "tasks_exchange": [self.config.tasks_exchange_name, self.config.tasks_exchange_type],
+            "responses_exchange": [self.config.responses_exchange_name, self.config.responses_exchange_type],
+            "responses_queue": self.config.responses_queue_name,
+            "bindings": self.routing.ROUTING_BINDINGS,
+        }
+        return hashlib.sha256(orjson.dumps(topology, option=orjson.OPT_SORT_KEYS)).hexdigest()
+    
+    def ensure_infrastructure(self) -> bool:
+        """
+        Объявление инфраструктуры, если она еще не объявлена этим процессом.
+        
+        Объекты durable и переживают переподключение, поэтому при неизменной
+        топологии повторные exchange_declare/queue_declare/queue_bind
+        (по одному round trip на каждый) пропускаются.
+        """
+        if self._declared_topology == self._topology_fingerprint():
+            logger.debug("Топология RabbitMQ не изменилась, повторное объявление пропущено")
+            return True
+        return self.setup_infrastructure()
+    
     def setup_infrastructure(self) -> bool:
         """Создание exchange, очередей и привязок с Alternate Exchange"""
         try:
@@ -125,100 +260,125 @@ class RabbitMQClient:
             )
             logger.debug(f"Очередь ошибок создана: {error_queue}")
             
+            self._declared_topology = self._topology_fingerprint()
             return True
             
         except Exception as e:
             logger.error(f"Ошибка создания инфраструктуры RabbitMQ: {e}")
+            self._check_channel_error(e)
             return False
     
+    def _build_task_message(self, topic: str, task_data: Dict[str, Any],
+                            now: float) -> Tuple[str, str, bytes, pika.BasicProperties]:
+        """Routing key, система, тело и свойства сообщения задачи"""
+        # Определение routing key и системы (кэшируется по топику)
+        routing_key, system = self.routing.resolve(topic)
+        
+        # Подготовка сообщения
+        message = {
+            "task_id": task_data.get("id"),
+            "topic": topic,
+            "system": system,
+            "variables": task_data.get("variables", {}),
+            "process_variables": task_data.get("processVariables", {}),
+            "process_instance_id": task_data.get("processInstanceId"),
+            "activity_id": task_data.get("activityId"),
+            "priority": task_data.get("priority", 0),
+            "timestamp": int(now * 1000),
+            # Добавляем метаданные BPMN
+            "metadata": task_data.get("metadata", {})
+        }
+        # Необязательные поля Camunda добавляются только при наличии значения
+        for message_key, task_key in _OPTIONAL_TASK_FIELDS:
+            value = task_data.get(task_key)
+            if value is not None:
+                message[message_key] = value
+        
+        properties = pika.BasicProperties(
+            **_PERSISTENT_JSON,
+            timestamp=int(now),
+            headers={
+                'x-meta': pack_task_meta(topic, system, task_data.get("id"), task_data.get("processInstanceId"))
+            }
+        )
+        return routing_key, system, _dumps(message), properties
+    
     def publish_task(self, topic: str, task_data: Dict[str, Any]) -> bool:
         """Публикация задачи в соответствующую очередь"""
         try:
-            if not self.channel:
-                logger.error("Нет активного соединения с RabbitMQ")
-                return False
-            
-            # Определение routing key
-            routing_key = self.routing.get_routing_key(topic)
-            system = self.routing.get_system_for_topic(topic)
-            
-            # Подготовка сообщения
-            message = {
-                "task_id": task_data.get("id"),
-                "topic": topic,
-                "system": system,
-                "variables": task_data.get("variables", {}),
-                "process_variables": task_data.get("processVariables", {}),
-                "process_instance_id": task_data.get("processInstanceId"),
-                "process_definition_key": task_data.get("processDefinitionKey"),  # Добавляем ключ процесса
-                "activity_id": task_data.get("activityId"),
-                "activity_instance_id": task_data.get("activityInstanceId"),
-                "worker_id": task_data.get("workerId"),
-                "retries": task_data.get("retries"),
-                "created_time": task_data.get("createTime"),
-                "priority": task_data.get("priority", 0),
-                "tenant_id": task_data.get("tenantId"),
-                "business_key": task_data.get("businessKey"),
-                "timestamp": int(time.time() * 1000),
-                # Добавляем метаданные BPMN
-                "metadata": task_data.get("metadata", {})
-            }
+            routing_key, system, body, properties = self._build_task_message(topic, task_data, time.time())
             
             # Публикация сообщения
-            self.channel.basic_publish(
+            self._publish(
                 exchange=self.config.tasks_exchange_name,
                 routing_key=routing_key,
-                body=json.dumps(message, ensure_ascii=False),
-                properties=pika.BasicProperties(
-                    delivery_mode=2,  # Устойчивое сообщение
-                    timestamp=int(time.time()),
-                    content_type='application/json',
-                    headers={
-                        'camunda_topic': topic,
-                        'target_system': system,
-                        'task_id': task_data.get("id"),
-                        'process_instance_id': task_data.get("processInstanceId")
-                    }
-                )
+                body=body,
+                properties=properties,
+                shard_key=topic
             )
             
             logger.debug(f"Задача опубликована: {topic} -> {routing_key} (система: {system})")
             return True
             
+        except (pika.exceptions.AMQPError, ConnectionError) as e:
+            logger.error(f"Ошибка соединения при публикации задачи {topic}: {e}")
+            self.request_reconnect()
+            return False
         except Exception as e:
             logger.error(f"Ошибка публикации задачи {topic}: {e}")
-            # Попытка автоматического переподключения при ошибках соединения
-            if self._handle_connection_error(e):
-                # Повторная попытка публикации после переподключения
-                try:
-                    self.channel.basic_publish(
-                        exchange=self.config.tasks_exchange_name,
-                        routing_key=routing_key,
-                        body=json.dumps(message, ensure_ascii=False),
-                        properties=pika.BasicProperties(
-                            delivery_mode=2,
-                            timestamp=int(time.time()),
-                            content_type='application/json',
-                            headers={
-                                'camunda_topic': topic,
-                                'target_system': system,
-                                'task_id': task_data.get("id"),
-                                'process_instance_id': task_data.get("processInstanceId")
-                            }
-                        )
-                    )
-                    logger.info(f"Задача успешно опубликована после переподключения: {topic}")
-                    return True
-                except Exception as retry_error:
-                    logger.error(f"Ошибка повторной публикации задачи {topic}: {retry_error}")
             return False
     
+    def publish_tasks(self, batch: List[Tuple[str, Dict[str, Any]]]) -> List[bool]:
+        """
+        Публикация пачки задач (topic, task_data) с одним ожиданием подтверждений.
+        
+        Все сообщения строятся с общей меткой времени и передаются издателю
+        без ожидания подтверждения каждого; подтверждения собираются один раз
+        в конце. Повторная публикация при потере соединения не выполняется -
+        неудачные задачи (False в результате) повторяет вызывающий код.
+        
+        Returns:
+            Результат публикации для каждой задачи пачки, в том же порядке
+        """
+        publisher = self._get_publisher()
+        now = time.time()
+        futures: List[Optional[Future]] = []
+        for topic, task_data in batch:
+            try:
+                routing_key, _system, body, properties = self._build_task_message(topic, task_data, now)
+                futures.append(publisher.publish(
+                    self.config.tasks_exchange_name, routing_key, body, properties, shard_key=topic
+                ))
+            except Exception as e:
+                logger.error(f"Ошибка подготовки задачи {topic}: {e}")
+                futures.append(None)
+        
+        # Одно ожидание подтверждений на всю пачку
+        deadline = time.monotonic() + self.confirm_timeout
+        results = []
+        for (topic, task_data), future in zip(batch, futures):
+            if future is None:
+                results.append(False)
+                continue
+            try:
+                confirmed = future.result(timeout=max(0, deadline - time.monotonic()))
+                if not confirmed:
+                    logger.error(f"Брокер отклонил задачу {task_data.get('id')} (Basic.Nack)")
+                results.append(confirmed)
+            except (pika.exceptions.AMQPError, ConnectionError) as e:
+                logger.error(f"Ошибка соединения при публикации задачи {topic}: {e}")
+                self.request_reconnect()
+                results.append(False)
+            except Exception as e:
+                logger.error(f"Ошибка публикации задачи {topic}: {e}")
+                results.append(False)
+        
+        logger.debug("Опубликовано задач пачкой: {}/{}", sum(results), len(batch))
+        return results
+    
     def publish_error(self, topic: str, task_id: str, error_message: str) -> bool:
         """Публикация сообщения об ошибке"""
         try:
-            if not self.channel:
-                return False
-            
             error_data = {
                 "task_id": task_id,
                 "topic": topic,
@@ -227,70 +387,139 @@ class RabbitMQClient:
                 "type": "task_error"
             }
             
-            # Отправка в очередь ошибок
-            self.channel.basic_publish(
+            # Отправка в очередь ошибок без ожидания подтверждения:
+            # результат отслеживается в фоне, поток обработки не блокируется
+            future = self._get_publisher().publish(
                 exchange=self.config.tasks_exchange_name,
                 routing_key="errors.camunda_tasks",
-                body=json.dumps(error_data, ensure_ascii=False),
-                properties=pika.BasicProperties(
-                    delivery_mode=2,
-                    content_type='application/json'
-                )
+                body=_dumps(error_data),
+                properties=_ERROR_PROPS
             )
+            future.add_done_callback(partial(self._log_unconfirmed, f"ошибки задачи {task_id}"))
             
             logger.warning(f"Ошибка задачи опубликована: {task_id} - {error_message}")
             return True
             
         except Exception as e:
             logger.error(f"Ошибка публикации ошибки: {e}")
-            # Попытка автоматического переподключения при ошибках соединения
-            if self._handle_connection_error(e):
-                # Повторная попытка публикации после переподключения
-                try:
-                    self.channel.basic_publish(
-                        exchange=self.config.tasks_exchange_name,
-                        routing_key="errors.camunda_tasks",
-                        body=json.dumps(error_data, ensure_ascii=False),
-                        properties=pika.BasicProperties(
-                            delivery_mode=2,
-                            content_type='application/json'
-                        )
-                    )
-                    logger.info(f"Ошибка задачи успешно опубликована после переподключения: {task_id}")
-                    return True
-                except Exception as retry_error:
-                    logger.error(f"Ошибка повторной публикации ошибки: {retry_error}")
             return False
     
     def is_connected(self) -> bool:
-        """Проверка активности соединения"""
+        """Проверка активности соединения (без обращения к объектам pika)"""
+        return self._alive
+    
+    def _check_channel_error(self, error: Exception):
+        """Ошибка AMQP на основном канале означает, что канал (или соединение) закрыт"""
+        if isinstance(error, pika.exceptions.AMQPError):
+            self._alive = False
+            self.request_reconnect()
+    
+    def request_reconnect(self):
+        """Запрос переподключения; выполняется потоком мониторинга, а не вызывающим потоком"""
+        self._needs_reconnect.set()
+    
+    def wait_reconnect_request(self, timeout: float) -> bool:
+        """Ожидание запроса переподключения; True - запрос получен (и сброшен)"""
+        if self._needs_reconnect.wait(timeout):
+            self._needs_reconnect.clear()
+            return True
+        return False
+    
+    def _get_publisher(self):
+        """Издатель (запускается при первом обращении)"""
+        publisher = self.publisher
+        if publisher is not None:
+            return publisher
+        with self._publisher_lock:
+            if self.publisher is None:
+                publisher = ConfirmPublisher(
+                    self.connection_parameters(),
+                    channel_count=self.config.publish_channels,
+                    queue_size=self.config.publish_queue_size
+                )
+                publisher.start()
+                if not publisher.wait_ready(timeout=10):
+                    logger.warning("Издатель RabbitMQ не подключился за 10s")
+                self.publisher = publisher
+            return self.publisher
+    
+    def _publish(self, exchange: str, routing_key: str, body, properties: pika.BasicProperties,
+                 shard_key: Optional[str] = None):
+        """
+        Публикация с ожиданием подтверждения брокером.
+        
+        Потоки публикуют конвейером через пул каналов издателя, подтверждения
+        приходят пачками. При потере соединения публикация повторяется один
+        раз после переподключения издателя; отказ брокера (Nack) пробрасывается.
+        """
+        publisher = self._get_publisher()
         try:
-            return (
-                self.connection is not None and 
-                not self.connection.is_closed and
-                self.channel is not None and
-                not self.channel.is_closed
+            confirmed = publisher.publish(exchange, routing_key, body, properties, shard_key).result(
+                timeout=self.confirm_timeout
             )
-        except:
-            return False
+        except ConnectionError as e:
+            logger.warning(f"Обнаружена ошибка соединения при публикации: {e}, ожидаем переподключения...")
+            if not publisher.wait_ready(timeout=publisher.reconnect_delay * 2):
+                raise
+            confirmed = publisher.publish(exchange, routing_key, body, properties, shard_key).result(
+                timeout=self.confirm_timeout
+            )
+            logger.info(f"Сообщение успешно опубликовано после переподключения: {routing_key}")
+        if not confirmed:
+            raise RuntimeError(f"Брокер отклонил сообщение (Basic.Nack): {routing_key}")
     
-    def _handle_connection_error(self, error) -> bool:
-        """Обработка ошибок соединения с автоматическим переподключением"""
-        error_str = str(error)
-        if "Connection reset by peer" in error_str or "IndexError" in error_str or "pop from an empty deque" in error_str:
-            logger.warning(f"Обнаружена ошибка соединения: {error_str}, переподключаемся...")
-            return self.reconnect()
-        return False
+    def _log_unconfirmed(self, description: str, future: Future):
+        """Логирование неудачной публикации без ожидания подтверждения"""
+        error = future.exception()
+        if error is not None:
+            logger.error(f"Не удалось опубликовать {description}: {error}")
+            if isinstance(error, (pika.exceptions.AMQPError, ConnectionError)):
+                self.request_reconnect()
+        elif not future.result():
+            logger.error(f"Брокер отклонил публикацию {description} (Basic.Nack)")
     
     def reconnect(self) -> bool:
-        """Переподключение к RabbitMQ"""
+        """
+        Переподключение к RabbitMQ.
+        
+        Большинство ошибок закрывают только канал, поэтому сначала канал
+        переоткрывается на живом соединении (миллисекунды, без TCP и AMQP
+        рукопожатий). Полное переподключение выполняется только если
+        соединение закрыто, с нарастающими паузами _RECONNECT_BACKOFF.
+        """
         logger.info("Попытка переподключения к RabbitMQ...")
-        self.disconnect()
-        time.sleep(5)  # Задержка перед переподключением
-        return self.connect() and self.setup_infrastructure()
+        if self._reopen_channel():
+            return True
+        
+        self._close_connection()
+        for attempt, delay in enumerate(_RECONNECT_BACKOFF, 1):
+            time.sleep(delay)
+            if self.connect() and self.ensure_infrastructure():
+                return True
+            logger.warning(f"Попытка переподключения {attempt}/{len(_RECONNECT_BACKOFF)} к RabbitMQ не удалась")
+        return False
     
-    def disconnect(self):
-        """Закрытие соединения"""
+    def _reopen_channel(self) -> bool:
+        """Открытие нового канала на существующем соединении"""
+        connection = self.connection
+        if connection is None or connection.is_closed:
+            return False
+        try:
+            if self.channel and self.channel.is_open:
+                self.channel.close()
+        except Exception as e:
+            logger.debug(f"Ошибка закрытия канала RabbitMQ: {e}")
+        try:
+            self.channel = connection.channel()
+        except Exception as e:
+            logger.warning(f"Не удалось переоткрыть канал RabbitMQ: {e}")
+            return False
+        self._alive = True
+        logger.info("Канал RabbitMQ переоткрыт без переподключения")
+        return True
+    
+    def _close_connection(self):
+        """Закрытие основного соединения (инфраструктура, информация об очередях, потребление)"""
         try:
             if self.channel and not self.channel.is_closed:
                 self.channel.close()
@@ -298,13 +527,25 @@ class RabbitMQClient:
             if self.connection and not self.connection.is_closed:
                 self.connection.close()
                 
-            logger.info("Соединение с RabbitMQ закрыто")
-            
         except Exception as e:
             logger.error(f"Ошибка при закрытии соединения RabbitMQ: {e}")
         finally:
             self.connection = None
             self.channel = None
+            self._alive = False
+    
+    def disconnect(self):
+        """Закрытие соединения и издателя (с ожиданием оставшихся подтверждений)"""
+        with self._publisher_lock:
+            publisher, self.publisher = self.publisher, None
+        if publisher is not None:
+            publisher.stop()
+        
+        self._close_connection()
+        if self._management_session is not None:
+            self._management_session.close()
+            self._management_session = None
+        logger.info("Соединение с RabbitMQ закрыто")
     
     def get_queue_info(self, queue_name: str) -> Optional[Dict[str, Any]]:
         """Получение информации об очереди"""
@@ -321,26 +562,29 @@ class RabbitMQClient:
             
         except Exception as e:
             logger.error(f"Ошибка получения информации об очереди {queue_name}: {e}")
+            self._check_channel_error(e)
             return None
     
     def get_all_queues_info(self) -> Dict[str, Dict[str, Any]]:
         """Получение информации о всех очередях (включая динамически созданные)"""
         info = {}
         
-        # Пытаемся получить все очереди через Management API
+        # Пытаемся получить все очереди одним запросом к Management API
         try:
             all_queues = self._get_all_queues_via_api()
             if all_queues:
-                # Получаем информацию о каждой очереди
-                for queue_name in all_queues:
-                    queue_info = self.get_queue_info(queue_name)
-                    if queue_info:
-                        info[queue_name] = queue_info
-                        
-                        # Добавляем дополнительную информацию для известных очередей
-                        if queue_name == "default.queue":
-                            info[queue_name]["source"] = "alternate_exchange"
-                            info[queue_name]["alternate_exchange"] = self.config.alternate_exchange_name
+                for queue in all_queues:
+                    queue_name = queue["name"]
+                    info[queue_name] = {
+                        "queue": queue_name,
+                        "message_count": queue.get("messages") or 0,
+                        "consumer_count": queue.get("consumers") or 0
+                    }
+                    
+                    # Добавляем дополнительную информацию для известных очередей
+                    if queue_name == "default.queue":
+                        info[queue_name]["source"] = "alternate_exchange"
+                        info[queue_name]["alternate_exchange"] = self.config.alternate_exchange_name
                             
                 logger.debug(f"Получена информация о {len(info)} очередях через Management API")
                 return info
@@ -349,52 +593,77 @@ class RabbitMQClient:
             logger.warning(f"Не удалось получить очереди через Management API: {e}")
             logger.info("Используем fallback метод с предопределенными очередями")
         
-        # Fallback: используем предопределенные очереди
-        # Информация об очередях задач
-        for queue_name in self.routing.ROUTING_BINDINGS.keys():
-            queue_info = self.get_queue_info(queue_name)
-            if queue_info:
-                info[queue_name] = queue_info
-        
-        # Информация об очереди ответов
-        response_queue_info = self.get_queue_info(self.config.responses_queue_name)
-        if response_queue_info:
-            info[self.config.responses_queue_name] = response_queue_info
-            
-        # Информация об очереди ошибок
-        error_queue_info = self.get_queue_info("errors.camunda_tasks.queue")
-        if error_queue_info:
-            info["errors.camunda_tasks.queue"] = error_queue_info
+        # Fallback: passive declare предопределенных очередей на отдельном канале.
+        # Для отсутствующей очереди брокер закрывает канал (404): основной канал
+        # при этом не затрагивается, новый канал открывается только после такой ошибки
+        queue_names = [
+            *self.routing.ROUTING_BINDINGS.keys(),
+            self.config.responses_queue_name,
+            "errors.camunda_tasks.queue",
+            "default.queue",
+        ]
+        probe = None
+        try:
+            for queue_name in queue_names:
+                if probe is None or probe.is_closed:
+                    probe = self.connection.channel()
+                try:
+                    method = probe.queue_declare(queue=queue_name, passive=True)
+                except pika.exceptions.ChannelClosedByBroker:
+                    logger.debug(f"Очередь {queue_name} не существует")
+                    continue
+                info[queue_name] = {
+                    "queue": queue_name,
+                    "message_count": method.method.message_count,
+                    "consumer_count": method.method.consumer_count
+                }
+        except Exception as e:
+            logger.error(f"Ошибка получения информации об очередях: {e}")
+            self._check_channel_error(e)
+        finally:
+            if probe is not None and probe.is_open:
+                try:
+                    probe.close()
+                except Exception:
+                    pass
         
-        # Информация о default queue (теперь через AE)
-        default_queue_info = self.get_queue_info("default.queue")
-        if default_queue_info:
-            info["default.queue"] = default_queue_info
+        # default.queue получает сообщения через Alternate Exchange
+        if "default.queue" in info:
             info["default.queue"]["source"] = "alternate_exchange"
             info["default.queue"]["alternate_exchange"] = self.config.alternate_exchange_name
             
         return info
     
     def _get_all_queues_via_api(self) -> Optional[list]:
-        """Получение списка всех очередей через RabbitMQ Management API"""
+        """
+        Получение очередей virtual host со статистикой через RabbitMQ Management API.
+        
+        Один HTTP запрос вместо passive queue_declare на каждую очередь.
+        
+        Returns:
+            Список словарей с полями name, messages, consumers
+        """
         try:
             # Построение URL для Management API
             # Обычно Management API работает на порту 15672
             management_port = 15672
-            api_url = f"http://{self.config.host}:{management_port}/api/queues"
+            vhost = quote(self.config.virtual_host, safe="")
+            api_url = f"http://{self.config.host}:{management_port}/api/queues/{vhost}"
+            
+            if self._management_session is None:
+                session = requests.Session()
+                session.auth = (self.config.username, self.config.password)
+                self._management_session = session
             
             # Выполняем HTTP запрос
-            response = requests.get(
+            response = self._management_session.get(
                 api_url,
-                auth=(self.config.username, self.config.password),
+                params={"columns": "name,messages,consumers"},
                 timeout=10
             )
             
             if response.status_code == 200:
-                queues_data = response.json()
-                # Извлекаем только имена очередей
-                queue_names = [queue['name'] for queue in queues_data]
-                return queue_names
+                return orjson.loads(response.content)
             else:
                 logger.warning(f"Management API вернул код {response.status_code}")
                 return None
@@ -406,25 +675,31 @@ class RabbitMQClient:
             logger.warning(f"Неожиданная ошибка при работе с Management API: {e}")
             return None
     
-    def consume_responses(self, callback_function, auto_ack: bool = False):
-        """Запуск потребления сообщений из очереди ответов"""
-        try:
-            if not self.channel:
-                logger.error("Нет активного соединения с RabbitMQ")
-                return False
-            
-            self.channel.basic_consume(
-                queue=self.config.responses_queue_name,
-                on_message_callback=callback_function,
-                auto_ack=auto_ack
-            )
-            
-            logger.debug(f"Начато потребление ответов из очереди: {self.config.responses_queue_name}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Ошибка запуска потребления ответов: {e}")
-            return False
+    def consume_responses_async(self, submit, prefetch_count: int = 100, ack_batch_size: int = 1,
+                                ack_interval: float = 0.2) -> ResponseConsumer:
+        """
+        Запуск асинхронного потребления ответов на отдельном SelectConnection.
+        
+        IO loop потребителя работает в собственном потоке и продолжает
+        обслуживать heartbeat, пока ответы обрабатываются в submit().
+        
+        Args:
+            submit: Функция постановки сообщения в обработку, возвращает Future
+                    (True - ACK, False - NACK с возвратом, None - NACK без возврата)
+            prefetch_count: Количество неподтвержденных сообщений на канале
+            ack_batch_size: Количество успешно обработанных сообщений на один basic_ack(multiple=True)
+            ack_interval: Максимальная задержка подтверждения неполной пачки в секундах
+        """
+        consumer = ResponseConsumer(
+            parameters=self.connection_parameters(),
+            queue_name=self.config.responses_queue_name,
+            submit=submit,
+            prefetch_count=prefetch_count,
+            ack_batch_size=ack_batch_size,
+            ack_interval=ack_interval
+        )
+        consumer.start()
+        return consumer
     
     def start_consuming(self):
         """Запуск блокирующего потребления сообщений"""
@@ -438,6 +713,7 @@ class RabbitMQClient:
             
         except Exception as e:
             logger.error(f"Ошибка потребления сообщений: {e}")
+            self._check_channel_error(e)
     
     def stop_consuming(self):
         """Остановка потребления сообщений"""
@@ -452,26 +728,22 @@ class RabbitMQClient:
     def send_task_response(self, response_data: Dict[str, Any]) -> bool:
         """Отправка ответа на задачу в очередь ответов"""
         try:
-            if not self.channel:
-                logger.error("Нет активного соединения с RabbitMQ")
-                return False
-            
             # Добавление метаинформации
+            now = time.time()
             response_message = {
                 **response_data,
-                "timestamp": int(time.time() * 1000),
+                "timestamp": int(now * 1000),
                 "response_source": "external_system"
             }
             
             # Публикация ответа
-            self.channel.basic_publish(
+            self._publish(
                 exchange=self.config.responses_exchange_name,
                 routing_key=self.config.responses_queue_name,
-                body=json.dumps(response_message, ensure_ascii=False),
+                body=_dumps(response_message),
                 properties=pika.BasicProperties(
-                    delivery_mode=2,  # Устойчивое сообщение
-                    timestamp=int(time.time()),
-                    content_type='application/json',
+                    **_PERSISTENT_JSON,
+                    timestamp=int(now),
                     headers={
                         'response_type': response_data.get('response_type'),
                         'task_id': response_data.get('task_id'),
@@ -483,6 +755,10 @@ class RabbitMQClient:
             logger.debug(f"Ответ на задачу отправлен: {response_data.get('task_id')}")
             return True
             
+        except (pika.exceptions.AMQPError, ConnectionError) as e:
+            logger.error(f"Ошибка соединения при отправке ответа на задачу: {e}")
+            self.request_reconnect()
+            return False
         except Exception as e:
             logger.error(f"Ошибка отправки ответа на задачу: {e}")
             return False
@@ -524,11 +800,8 @@ class RabbitMQClient:
             True если сообщение успешно опубликовано, False в случае ошибки
         """
         try:
-            if not self.channel:
-                logger.error("Нет активного соединения с RabbitMQ для публикации ошибки")
-                return False
-            
             # Формируем полное сообщение об ошибке
+            now = time.time()
             error_message = {
                 "error_info": {
                     "type": error_info.get("type", "unknown_error"),
@@ -536,24 +809,23 @@ class RabbitMQClient:
                     "camunda_error_type": error_info.get("camunda_error_type"),
                     "camunda_error_message": error_info.get("camunda_error_message"),
                     "http_status_code": error_info.get("http_status_code"),
-                    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(now)),
                     "source_queue": self.config.responses_queue_name
                 },
                 "original_message": original_message,
                 "task_id": task_id,
                 "activity_id": activity_id,
-                "error_timestamp": int(time.time() * 1000)
+                "error_timestamp": int(now * 1000)
             }
             
             # Публикация в очередь ошибок
-            self.channel.basic_publish(
+            self._publish(
                 exchange=self.config.tasks_exchange_name,
                 routing_key="errors.camunda_tasks",
-                body=json.dumps(error_message, ensure_ascii=False),
+                body=_dumps(error_message),
                 properties=pika.BasicProperties(
-                    delivery_mode=2,  # Устойчивое сообщение
-                    timestamp=int(time.time()),
-                    content_type='application/json',
+                    **_PERSISTENT_JSON,
+                    timestamp=int(now),
                     headers={
                         'error_type': error_info.get("type", "unknown_error"),
                         'task_id': task_id,
@@ -569,30 +841,10 @@ class RabbitMQClient:
             )
             return True
             
+        except (pika.exceptions.AMQPError, ConnectionError) as e:
+            logger.critical(f"Критическая ошибка публикации в очередь ошибок (соединение): {e}")
+            self.request_reconnect()
+            return False
         except Exception as e:
-            logger.error(f"Критическая ошибка публикации в очередь ошибок: {e}")
-            # Попытка переподключения при ошибках соединения
-            if self._handle_connection_error(e):
-                try:
-                    # Повторная попытка после переподключения
-                    self.channel.basic_publish(
-                        exchange=self.config.tasks_exchange_name,
-                        routing_key="errors.camunda_tasks",
-                        body=json.dumps(error_message, ensure_ascii=False),
-                        properties=pika.BasicProperties(
-                            delivery_mode=2,
-                            timestamp=int(time.time()),
-                            content_type='application/json',
-                            headers={
-                                'error_type': error_info.get("type", "unknown_error"),
-                                'task_id': task_id,
-                                'activity_id': activity_id,
-                                'source': 'response_processing'
-                            }
-                        )
-                    )
-                    logger.info(f"Ошибка обработки успешно опубликована после переподключения: {task_id}")
-                    return True
-                except Exception as retry_error:
-                    logger.critical(f"Не удалось опубликовать ошибку даже после переподключения: {retry_error}")
+            logger.critical(f"Критическая ошибка публикации в очередь ошибок: {e}")
             return False 
\ No newline at end of file
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Асинхронный потребитель очереди ответов на базе pika.SelectConnection
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import partial
+from typing import Callable, Optional
+
+import pika
+from loguru import logger
+
+
+class ResponseConsumer:
+    """
+    Потребитель очереди ответов с собственным IO loop.
+
+    Сообщения доставляются push-моделью (basic_consume) и передаются в
+    submit(body), который возвращает Future с результатом обработки:
+    True - ACK, False - NACK с возвратом в очередь, None - NACK без возврата
+    (сообщение отбрасывается). Обработка (HTTP запросы
+    к Camunda) выполняется вне IO loop, а ACK/NACK выполняются в потоке
+    IO loop через add_callback_threadsafe.
+
+    Успешно обработанные сообщения подтверждаются пачкой: один
+    basic_ack(multiple=True) на ack_batch_size сообщений или раз в
+    ack_interval секунд. Сообщения обрабатываются параллельно и завершаются
+    не по порядку, поэтому пачкой подтверждается только непрерывный префикс
+    доставок, обработанных успешно; NACK выполняется сразу и по одному.
+    """
+
+    def __init__(self, parameters: pika.ConnectionParameters, queue_name: str,
+                 submit: Callable[[bytes], Future], prefetch_count: int = 100,
+                 reconnect_delay: int = 5, ack_batch_size: int = 1, ack_interval: float = 0.2):
+        """
+        Args:
+            parameters: Параметры подключения к RabbitMQ
+            queue_name: Имя очереди ответов
+            submit: Функция постановки сообщения в обработку, возвращает Future[Optional[bool]]
+            prefetch_count: Количество неподтвержденных сообщений на канале
+            reconnect_delay: Пауза перед переподключением в секундах
+            ack_batch_size: Количество успешно обработанных сообщений на один basic_ack(multiple=True)
+            ack_interval: Максимальная задержка подтверждения неполной пачки в секундах
+        """
+        self.parameters = parameters
+        self.queue_name = queue_name
+        self.submit = submit
+        self.prefetch_count = prefetch_count
+        self.reconnect_delay = reconnect_delay
+        self.ack_batch_size = max(1, ack_batch_size)
+        if prefetch_count and self.ack_batch_size > prefetch_count:
+            # Брокер не доставит больше prefetch_count неподтвержденных сообщений
+            logger.warning(
+                f"Размер пачки ACK ({ack_batch_size}) больше prefetch ({prefetch_count}), "
+                f"используется {prefetch_count}"
+            )
+            self.ack_batch_size = max(1, prefetch_count)
+        self.ack_interval = ack_interval
+
+        # Доставки текущего канала в порядке delivery_tag: True - обработана
+        # успешно и ждет пакетного ACK, False - еще обрабатывается.
+        # Используется только в потоке IO loop
+        self._unsettled: "OrderedDict[int, bool]" = OrderedDict()
+        self._acks_ready = 0
+        self._ack_timer = None
+
+        self._connection: Optional[pika.SelectConnection] = None
+        self._channel = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Запуск IO loop потребителя в отдельном потоке"""
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="ResponseConsumer")
+        self._thread.start()
+
+    def stop(self, timeout: float = 10):
+        """Остановка потребителя: закрытие соединения и завершение IO loop"""
+        self._stop_event.set()
+        connection = self._connection
+        if connection is not None:
+            try:
+                connection.ioloop.add_callback_threadsafe(self._close_connection)
+            except Exception as e:
+                logger.debug(f"IO loop потребителя ответов уже остановлен: {e}")
+
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=timeout)
+        logger.info("Потребитель очереди ответов остановлен")
+
+    def is_consuming(self) -> bool:
+        """Проверка, что канал открыт и потребление активно"""
+        channel = self._channel
+        return channel is not None and channel.is_open
+
+    def _run(self):
+        """Цикл IO loop с переподключением при потере соединения"""
+        while not self._stop_event.is_set():
+            try:
+                self._connection = pika.SelectConnection(
+                    parameters=self.parameters,
+                    on_open_callback=self._on_connection_open,
+                    on_open_error_callback=self._on_connection_open_error,
+                    on_close_callback=self._on_connection_closed
+                )
+                self._connection.ioloop.start()
+            except Exception as e:
+                logger.error(f"Ошибка IO loop потребителя ответов: {e}")
+            finally:
+                self._channel = None
+
+            if not self._stop_event.is_set():
+                logger.warning(f"Переподключение потребителя ответов через {self.reconnect_delay}s...")
+                self._stop_event.wait(self.reconnect_delay)
+
+        self._connection = None
+
+    def _on_connection_open(self, connection):
+        if self._stop_event.is_set():
+            connection.close()
+            return
+        logger.info("Потребитель ответов подключен к RabbitMQ")
+        connection.channel(on_open_callback=self._on_channel_open)
+
+    def _on_connection_open_error(self, connection, error):
+        logger.error(f"Ошибка подключения потребителя ответов к RabbitMQ: {error}")
+        connection.ioloop.stop()
+
+    def _on_connection_closed(self, connection, reason):
+        self._channel = None
+        if not self._stop_event.is_set():
+            logger.warning(f"Соединение потребителя ответов закрыто: {reason}")
+        connection.ioloop.stop()
+
+    def _on_channel_open(self, channel):
+        self._channel = channel
+        self._reset_acks()
+        channel.add_on_close_callback(self._on_channel_closed)
+        channel.basic_qos(prefetch_count=self.prefetch_count, callback=self._on_qos_ok)
+
+    def _on_channel_closed(self, channel, reason):
+        logger.warning(f"Канал потребителя ответов закрыт: {reason}")
+        self._channel = None
+        # Переоткрытие выполняется через переподключение
+        self._close_connection()
+
+    def _on_qos_ok(self, _frame):
+        self._channel.basic_consume(queue=self.queue_name, on_message_callback=self._on_message)
+        logger.info(f"Начато потребление ответов из очереди: {self.queue_name} (prefetch={self.prefetch_count})")
+
+    def _on_message(self, channel, method, properties, body):
+        """Передача сообщения в обработку без блокировки IO loop"""
+        self._unsettled[method.delivery_tag] = False
+        try:
+            future = self.submit(body)
+        except Exception as e:
+            logger.error(f"Не удалось передать ответ в обработку: {e}")
+            self._settle(channel, method.delivery_tag, False)
+            return
+        future.add_done_callback(partial(self._on_processed, channel, method.delivery_tag))
+
+    def _on_processed(self, channel, delivery_tag: int, future: Future):
+        """Вызывается в потоке обработки: ACK/NACK передается в поток IO loop"""
+        if future.cancelled():
+            ack = False
+        elif future.exception() is not None:
+            logger.error(f"Необработанная ошибка обработки ответа: {future.exception()}")
+            ack = False
+        else:
+            ack = future.result()
+
+        connection = self._connection
+        if connection is None:
+            return
+        try:
+            connection.ioloop.add_callback_threadsafe(partial(self._settle, channel, delivery_tag, ack))
+        except Exception as e:
+            # Соединение закрыто - сообщение будет доставлено повторно
+            logger.warning(f"Не удалось подтвердить сообщение {delivery_tag}: {e}")
+
+    def _settle(self, channel, delivery_tag: int, ack: Optional[bool]):
+        """ACK/NACK в потоке IO loop"""
+        if channel is not self._channel or not channel.is_open:
+            # Канал переоткрыт - брокер доставит сообщение повторно
+            return
+        if not ack:
+            self._unsettled.pop(delivery_tag, None)
+            channel.basic_nack(delivery_tag=delivery_tag, requeue=ack is not None)
+            # NACK мог освободить префикс уже обработанных доставок
+            self._schedule_ack_flush()
+            return
+        if delivery_tag not in self._unsettled:
+            return
+        self._unsettled[delivery_tag] = True
+        self._acks_ready += 1
+        if self._acks_ready >= self.ack_batch_size:
+            self._flush_acks()
+        else:
+            self._schedule_ack_flush()
+
+    def _schedule_ack_flush(self):
+        if self._acks_ready and self._ack_timer is None:
+            self._ack_timer = self._connection.ioloop.call_later(self.ack_interval, self._on_ack_timer)
+
+    def _on_ack_timer(self):
+        self._ack_timer = None
+        self._flush_acks()
+
+    def _flush_acks(self):
+        """Один basic_ack(multiple=True) на непрерывный префикс успешно обработанных доставок"""
+        last_tag = None
+        while self._unsettled:
+            tag, processed = next(iter(self._unsettled.items()))
+            if not processed:
+                break
+            del self._unsettled[tag]
+            self._acks_ready -= 1
+            last_tag = tag
+
+        channel = self._channel
+        if last_tag is not None and channel is not None and channel.is_open:
+            channel.basic_ack(delivery_tag=last_tag, multiple=True)
+
+    def _reset_acks(self):
+        """Сброс учета доставок: после переоткрытия канала брокер доставит их повторно"""
+        if self._ack_timer is not None and self._connection is not None:
+            self._connection.ioloop.remove_timeout(self._ack_timer)
+        self._ack_timer = None
+        self._unsettled.clear()
+        self._acks_ready = 0
+
+    def _close_connection(self):
+        connection = self._connection
+        if connection is None:
+            return
+        if self._channel is not None and self._channel.is_open:
+            # Подтверждение уже обработанных сообщений до закрытия канала
+            self._flush_acks()
+        if connection.is_open:
+            connection.close()
+        elif connection.is_closed:
+            connection.ioloop.stop()
@@ -1,18 +1,61 @@
 """
 Response Handler для обработки ответов из RabbitMQ и завершения задач в Camunda
 """
-import json
+import asyncio
 import time
 import signal
 import sys
-from typing import Dict, Any, Optional
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import Callable, Dict, Any, Optional, Tuple
+import threading
 from threading import Thread, Event
+import aiohttp
+import orjson
 import pika
-import requests
 from loguru import logger
 
 from config import camunda_config, rabbitmq_config, worker_config, response_config
 from rabbitmq_client import RabbitMQClient
+from response_consumer import ResponseConsumer
+
+
+# Тип переменной Camunda по точному типу значения Python (bool не попадает в int);
+# значения остальных типов передаются как Json
+_CAMUNDA_TYPES = {str: "String", bool: "Boolean", int: "Integer", float: "Double"}
+
+
+# Ключ уже сериализованного значения: {"__json__": "<строка JSON>"} передается
+# в Camunda как есть, без повторного разбора и сериализации
+PRESERIALIZED_JSON_KEY = "__json__"
+
+
+def _json_value(value: Any) -> str:
+    """Значение переменной типа Json (Camunda ожидает строку в value)"""
+    if type(value) is dict and len(value) == 1 and type(value.get(PRESERIALIZED_JSON_KEY)) is str:
+        return value[PRESERIALIZED_JSON_KEY]
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+@lru_cache(maxsize=256)
+def _compile_formatter(signature: Tuple[Tuple[Any, type], ...]) -> Callable[[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """
+    Функция форматирования переменных для набора (имя, тип значения).
+    
+    Ответы одной системы приходят с одинаковым составом и типами переменных,
+    поэтому для каждой такой схемы один раз генерируется функция, которая
+    строит результат одним литералом словаря - без цикла и выбора типа.
+    """
+    entries = []
+    for key, value_type in signature:
+        camunda_type = _CAMUNDA_TYPES.get(value_type)
+        if camunda_type is not None:
+            entries.append(f"{key!r}: {{'value': v[{key!r}], 'type': {camunda_type!r}}}")
+        else:
+            entries.append(f"{key!r}: {{'value': _json_value(v[{key!r}]), 'type': 'Json'}}")
+    namespace = {"_json_value": _json_value}
+    exec(f"def _format(v):\n    return {{{', '.join(entries)}}}\n", namespace)
+    return namespace["_format"]
 
 
 class TaskResponseHandler:
@@ -24,8 +67,25 @@ class TaskResponseHandler:
         self.worker_config = worker_config
         self.response_config = response_config
         
+        # Типы ответов, вычисленные один раз (проверяются на каждое сообщение)
+        response_types = self.response_config.RESPONSE_TYPES
+        self._type_complete = response_types["COMPLETE"]
+        self._type_failure = response_types["FAILURE"]
+        self._type_bpmn_error = response_types["BPMN_ERROR"]
+        self._valid_types = frozenset(response_types.values())
+        self._required_fields = frozenset(self.response_config.REQUIRED_FIELDS)
+        
         # Компоненты
         self.rabbitmq_client = RabbitMQClient()
+        self.response_consumer: Optional[ResponseConsumer] = None
+        
+        # Обработка ответов (HTTP запросы к Camunda) в asyncio loop отдельного
+        # потока: запросы к Camunda выполняются конкурентно, число одновременных
+        # запросов ограничено prefetch канала ответов
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[Thread] = None
+        self._http: Optional[aiohttp.ClientSession] = None
+        self._inflight: Optional[asyncio.Semaphore] = None
         
         # Базовый URL для API
         base_url = self.camunda_config.base_url.rstrip('/')
@@ -34,6 +94,11 @@ class TaskResponseHandler:
         else:
             self.api_base_url = f"{base_url}/engine-rest"
         
+        # Общий префикс URL операций над задачами и неизменная часть payload:
+        # на каждый ответ остаются только конкатенация с task_id и копия словаря
+        self._task_url_prefix = self.api_base_url + "/external-task/"
+        self._base_payload = {"workerId": self.camunda_config.worker_id}
+        
         # Управление работой
         self.shutdown_event = Event()
         self.is_running = False
@@ -47,15 +112,78 @@ class TaskResponseHandler:
             "start_time": None
         }
         
-        # Настройка обработки сигналов
-        signal.signal(signal.SIGINT, self._signal_handler)
-        signal.signal(signal.SIGTERM, self._signal_handler)
+        # Обработчики сигналов устанавливаются в start() (только из основного потока)
+        self._signals_installed = False
+    
+    def _start_http_loop(self):
+        """Запуск asyncio loop с HTTP сессией к Camunda в отдельном потоке"""
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = Thread(target=self._loop.run_forever, daemon=True, name="ResponseLoop")
+        self._loop_thread.start()
+        asyncio.run_coroutine_threadsafe(self._open_http(), self._loop).result(timeout=10)
+    
+    async def _open_http(self):
+        """HTTP сессия с keep-alive пулом соединений (создается внутри loop)"""
+        auth = None
+        if self.camunda_config.auth_enabled:
+            auth = aiohttp.BasicAuth(self.camunda_config.auth_username, self.camunda_config.auth_password)
+        self._http = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=64, limit_per_host=32, ssl=False),
+            timeout=aiohttp.ClientTimeout(total=30),
+            auth=auth
+        )
+        self._inflight = asyncio.Semaphore(self.worker_config.response_prefetch_count)
+    
+    async def _close_http(self):
+        if self._http is not None:
+            await self._http.close()
+    
+    def _stop_http_loop(self):
+        """Закрытие HTTP сессии и остановка asyncio loop"""
+        loop = self._loop
+        if loop is None or not loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_http(), loop).result(timeout=5)
+        except Exception as e:
+            logger.warning(f"Ошибка закрытия HTTP сессии: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        if self._loop_thread is not None:
+            self._loop_thread.join(timeout=5)
+    
+    async def _post(self, url: str, payload: Dict[str, Any]):
+        """POST запрос к Camunda: (HTTP статус, тело ответа)"""
+        async with self._inflight:
+            async with self._http.post(url, json=payload) as response:
+                return response.status, await response.text()
     
     def _signal_handler(self, signum, frame):
         """Обработчик сигналов завершения"""
         logger.info(f"Response Handler получен сигнал {signum}, завершение работы...")
         self.shutdown()
     
+    def _install_signal_handlers(self):
+        """
+        Установка обработчиков SIGINT/SIGTERM.
+        
+        signal.signal допустим только в основном потоке: при запуске из другого
+        потока (встраивание, тесты) обработчики не устанавливаются, завершение
+        выполняет владелец через shutdown().
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return
+        signal.signal(signal.SIGINT, self._signal_handler)
+        signal.signal(signal.SIGTERM, self._signal_handler)
+        self._signals_installed = True
+    
+    def _restore_signal_handlers(self):
+        """Возврат стандартных обработчиков сигналов"""
+        if not self._signals_installed or threading.current_thread() is not threading.main_thread():
+            return
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        self._signals_installed = False
+    
     def initialize(self) -> bool:
         """Инициализация компонентов"""
         try:
@@ -79,35 +207,32 @@ class TaskResponseHandler:
             return False
     
     def _validate_response_message(self, message_data: Dict[str, Any]) -> bool:
-        """Валидация ответного сообщения"""
-        try:
-            # Проверка обязательных полей
-            for field in self.response_config.REQUIRED_FIELDS:
-                if field not in message_data:
-                    logger.error(f"Отсутствует обязательное поле: {field}")
-                    return False
-            
-            # Проверка типа ответа
-            response_type = message_data.get("response_type")
-            if response_type not in self.response_config.RESPONSE_TYPES.values():
-                logger.error(f"Неизвестный тип ответа: {response_type}")
-                return False
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"Ошибка валидации сообщения: {e}")
+        """Валидация ответного сообщения (сообщение уже разобрано как JSON)"""
+        if not isinstance(message_data, dict):
+            logger.error(f"Ответное сообщение не является объектом: {type(message_data).__name__}")
+            return False
+        
+        # Проверка обязательных полей
+        missing = self._required_fields - message_data.keys()
+        if missing:
+            logger.error(f"Отсутствуют обязательные поля: {', '.join(sorted(missing))}")
             return False
+        
+        # Проверка типа ответа
+        response_type = message_data.get("response_type")
+        if response_type not in self._valid_types:
+            logger.error(f"Неизвестный тип ответа: {response_type}")
+            return False
+        
+        return True
     
-    def _complete_task(self, task_id: str, variables: Optional[Dict[str, Any]] = None, 
+    async def _complete_task(self, task_id: str, variables: Optional[Dict[str, Any]] = None, 
                       local_variables: Optional[Dict[str, Any]] = None) -> bool:
         """Завершение задачи в Camunda"""
         try:
-            url = f"{self.api_base_url}/external-task/{task_id}/complete"
+            url = self._task_url_prefix + task_id + "/complete"
             
-            payload = {
-                "workerId": self.camunda_config.worker_id
-            }
+            payload = {**self._base_payload}
             
             if variables:
                 payload["variables"] = self._format_variables(variables)
@@ -115,29 +240,26 @@ class TaskResponseHandler:
             if local_variables:
                 payload["localVariables"] = self._format_variables(local_variables)
             
-            response = requests.post(url, json=payload, timeout=30)
+            status, text = await self._post(url, payload)
             
-            if response.status_code == 204:
+            if status == 204:
                 logger.info(f"Задача {task_id} успешно завершена")
                 return True
             else:
-                logger.error(f"Ошибка завершения задачи {task_id}: HTTP {response.status_code} - {response.text}")
+                logger.error(f"Ошибка завершения задачи {task_id}: HTTP {status} - {text}")
                 return False
                 
         except Exception as e:
             logger.error(f"Ошибка завершения задачи {task_id}: {e}")
             return False
     
-    def _fail_task(self, task_id: str, error_message: str, error_details: Optional[str] = None,
+    async def _fail_task(self, task_id: str, error_message: str, error_details: Optional[str] = None,
                   retries: Optional[int] = None, retry_timeout: Optional[int] = None) -> bool:
         """Пометка задачи как неуспешной в Camunda"""
         try:
-            url = f"{self.api_base_url}/external-task/{task_id}/failure"
+            url = self._task_url_prefix + task_id + "/failure"
             
-            payload = {
-                "workerId": self.camunda_config.worker_id,
-                "errorMessage": error_message
-            }
+            payload = {**self._base_payload, "errorMessage": error_message}
             
             if error_details:
                 payload["errorDetails"] = error_details
@@ -148,41 +270,37 @@ class TaskResponseHandler:
             if retry_timeout is not None:
                 payload["retryTimeout"] = retry_timeout
             
-            response = requests.post(url, json=payload, timeout=30)
+            status, text = await self._post(url, payload)
             
-            if response.status_code == 204:
+            if status == 204:
                 logger.info(f"Задача {task_id} помечена как неуспешная")
                 return True
             else:
-                logger.error(f"Ошибка пометки задачи {task_id} как неуспешной: HTTP {response.status_code}")
+                logger.error(f"Ошибка пометки задачи {task_id} как неуспешной: HTTP {status}")
                 return False
                 
         except Exception as e:
             logger.error(f"Ошибка пометки задачи {task_id} как неуспешной: {e}")
             return False
     
-    def _bpmn_error_task(self, task_id: str, error_code: str, error_message: str,
+    async def _bpmn_error_task(self, task_id: str, error_code: str, error_message: str,
                         variables: Optional[Dict[str, Any]] = None) -> bool:
         """Создание BPMN ошибки для задачи"""
         try:
-            url = f"{self.api_base_url}/external-task/{task_id}/bpmnError"
+            url = self._task_url_prefix + task_id + "/bpmnError"
             
-            payload = {
-                "workerId": self.camunda_config.worker_id,
-                "errorCode": error_code,
-                "errorMessage": error_message
-            }
+            payload = {**self._base_payload, "errorCode": error_code, "errorMessage": error_message}
             
             if variables:
                 payload["variables"] = self._format_variables(variables)
             
-            response = requests.post(url, json=payload, timeout=30)
+            status, text = await self._post(url, payload)
             
-            if response.status_code == 204:
+            if status == 204:
                 logger.info(f"BPMN ошибка создана для задачи {task_id}: {error_code}")
                 return True
             else:
-                logger.error(f"Ошибка создания BPMN ошибки для {task_id}: HTTP {response.status_code}")
+                logger.error(f"Ошибка создания BPMN ошибки для {task_id}: HTTP {status}")
                 return False
                 
         except Exception as e:
@@ -193,35 +311,32 @@ class TaskResponseHandler:
     
     def _format_variables(self, variables: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
         """Форматирование переменных для Camunda API"""
-        formatted = {}
-        for key, value in variables.items():
-            if isinstance(value, str):
-                formatted[key] = {"value": value, "type": "String"}
-            elif isinstance(value, bool):
-                formatted[key] = {"value": value, "type": "Boolean"}
-            elif isinstance(value, int):
-                formatted[key] = {"value": value, "type": "Integer"}
-            elif isinstance(value, float):
-                formatted[key] = {"value": value, "type": "Double"}
-            else:
-                # Для сложных типов используем JSON
-                formatted[key] = {"value": json.dumps(value), "type": "Json"}
-        return formatted
+        signature = tuple((key, type(value)) for key, value in variables.items())
+        return _compile_formatter(signature)(variables)
+    
+    def _submit_response(self, body: bytes) -> Future:
+        """Постановка ответного сообщения в asyncio loop обработки (вызывается из IO loop потребителя)"""
+        return asyncio.run_coroutine_threadsafe(self._process_response_message(body), self._loop)
     
-    def _process_response_message(self, ch, method, properties, body):
-        """Обработка ответного сообщения из RabbitMQ"""
+    async def _process_response_message(self, body: bytes) -> Optional[bool]:
+        """
+        Обработка ответного сообщения из RabbitMQ
+        
+        Returns:
+            True - ACK, False - NACK с возвратом в очередь,
+            None - NACK без возврата (сообщение не прошло валидацию)
+        """
         try:
             # Парсинг сообщения
-            message_data = json.loads(body.decode('utf-8'))
+            message_data = orjson.loads(body)
             self.stats["processed_responses"] += 1
             
-            logger.info(f"Получен ответ на задачу: {message_data.get('task_id')}")
+            logger.opt(lazy=True).debug("Получен ответ на задачу: {}", lambda: message_data.get('task_id'))
             
             # Валидация сообщения
             if not self._validate_response_message(message_data):
                 logger.error("Сообщение не прошло валидацию")
-                ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
-                return
+                return None
             
             task_id = message_data["task_id"]
             response_type = message_data["response_type"]
@@ -234,8 +349,8 @@ class TaskResponseHandler:
             # Обработка разных типов ответов
             success = False
             
-            if response_type == self.response_config.RESPONSE_TYPES["COMPLETE"]:
-                success = self._complete_task(
+            if response_type == self._type_complete:
+                success = await self._complete_task(
                     task_id,
                     message_data.get("variables"),
                     message_data.get("local_variables")
@@ -243,8 +358,8 @@ class TaskResponseHandler:
                 if success:
                     self.stats["successful_completions"] += 1
                     
-            elif response_type == self.response_config.RESPONSE_TYPES["FAILURE"]:
-                success = self._fail_task(
+            elif response_type == self._type_failure:
+                success = await self._fail_task(
                     task_id,
                     message_data.get("error_message", "Task failed"),
                     message_data.get("error_details"),
@@ -252,8 +367,8 @@ class TaskResponseHandler:
                     message_data.get("retry_timeout")
                 )
                 
-            elif response_type == self.response_config.RESPONSE_TYPES["BPMN_ERROR"]:
-                success = self._bpmn_error_task(
+            elif response_type == self._type_bpmn_error:
+                success = await self._bpmn_error_task(
                     task_id,
                     message_data.get("error_code", "BUSINESS_ERROR"),
                     message_data.get("error_message", "Business error occurred"),
@@ -268,19 +383,15 @@ class TaskResponseHandler:
             
             # Подтверждение или отклонение сообщения
             if success:
-                ch.basic_ack(delivery_tag=method.delivery_tag)
-                logger.info(f"Ответ на задачу {task_id} успешно обработан")
+                logger.debug("Ответ на задачу {} успешно обработан", task_id)
             else:
-                ch.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
                 self.stats["failed_completions"] += 1
                 logger.error(f"Ошибка обработки ответа на задачу {task_id}")
+            return success
                 
         except Exception as e:
             logger.error(f"Ошибка обработки ответного сообщения: {e}")
-            try:
-                ch.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
-            except:
-                pass
+            return False
     
     def start(self) -> bool:
         """Запуск обработчика ответов"""
@@ -290,17 +401,22 @@ class TaskResponseHandler:
                 return False
             
             logger.info("Запуск Task Response Handler...")
+            self._install_signal_handlers()
             self.stats["start_time"] = time.time()
             self.is_running = True
+            self._start_http_loop()
+            
+            # Асинхронное потребление ответов (SelectConnection в собственном потоке)
+            self.response_consumer = self.rabbitmq_client.consume_responses_async(
+                self._submit_response,
+                prefetch_count=self.worker_config.response_prefetch_count,
+                ack_batch_size=self.worker_config.response_ack_batch_size,
+                ack_interval=self.worker_config.response_ack_interval
+            )
             
-            # Настройка потребления ответов
-            if not self.rabbitmq_client.consume_responses(self._process_response_message):
-                logger.error("Не удалось настроить потребление ответов")
-                return False
-            
-            # Запуск потребления (блокирующий вызов)
+            # Ожидание завершения (блокирующий вызов)
             logger.info("Response Handler запущен и ожидает ответы...")
-            self.rabbitmq_client.start_consuming()
+            self.shutdown_event.wait()
             
         except KeyboardInterrupt:
             logger.info("Получен сигнал прерывания")
@@ -317,11 +433,15 @@ class TaskResponseHandler:
         logger.info("Завершение работы Task Response Handler...")
         self.is_running = False
         
-        # Остановка потребления
-        self.rabbitmq_client.stop_consuming()
+        # Остановка потребления и обработки
+        if self.response_consumer:
+            self.response_consumer.stop()
+        self._stop_http_loop()
+        self.shutdown_event.set()
         
         # Закрытие RabbitMQ соединения
         self.rabbitmq_client.disconnect()
+        self._restore_signal_handlers()
         
         # Финальная статистика
         if self.stats["start_time"]:
@@ -345,6 +465,7 @@ class TaskResponseHandler:
             "uptime_seconds": uptime,
             "stats": self.stats.copy(),
             "rabbitmq_connected": self.rabbitmq_client.is_connected(),
+            "consuming": bool(self.response_consumer and self.response_consumer.is_consuming()),
             "response_queue_info": self.rabbitmq_client.get_queue_info(
                 self.rabbitmq_config.responses_queue_name
             )
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Общая HTTP сессия сервисных скриптов для Camunda REST API
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
+
+# Добавление родительского каталога в sys.path для импорта модулей проекта
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import camunda_config
+
+# Отключение предупреждений SSL для самоподписанных сертификатов
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+
+def camunda_engine_url(base_url: Optional[str] = None) -> str:
+    """
+    Базовый URL REST API: /engine-rest добавляется, если его еще нет в base_url
+
+    Args:
+        base_url: URL Camunda (по умолчанию CAMUNDA_BASE_URL из конфигурации)
+    """
+    base_url = (base_url or camunda_config.base_url).rstrip('/')
+    if base_url.endswith('/engine-rest'):
+        return base_url
+    return f"{base_url}/engine-rest"
+
+
+def camunda_auth() -> Optional[HTTPBasicAuth]:
+    """Basic auth для Camunda (None, если аутентификация отключена)"""
+    if not camunda_config.auth_enabled:
+        return None
+    return HTTPBasicAuth(camunda_config.auth_username, camunda_config.auth_password)
+
+
+def make_camunda_session(pool_maxsize: int = 10, retries: int = 3) -> requests.Session:
+    """
+    HTTP сессия для запросов к Camunda.
+
+    Запросы переиспользуют keep-alive соединения вместо TCP/TLS рукопожатия
+    на каждый вызов. Повтор при 502/503/504 выполняется только для
+    идемпотентных методов (POST не повторяется).
+
+    Args:
+        pool_maxsize: Размер пула соединений (не меньше числа потоков, выполняющих запросы)
+        retries: Количество повторов при 502/503/504 (0 - без повторов)
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=pool_maxsize,
+        max_retries=Retry(total=retries, backoff_factor=0.3, status_forcelist=(502, 503, 504), raise_on_status=False)
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.verify = False
+    session.auth = camunda_auth()
+    return session
+
+
+def fetch_parallel(*calls: Callable[[], Any]) -> List[Any]:
+    """
+    Параллельное выполнение независимых запросов к Camunda
+
+    Соединения берутся из пула сессии, поэтому число вызовов не должно
+    превышать pool_maxsize. Результаты возвращаются в порядке вызовов.
+    """
+    with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+        futures = [executor.submit(call) for call in calls]
+        return [future.result() for future in futures]
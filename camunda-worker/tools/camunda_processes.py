@@ -9,22 +9,31 @@
 """
 
 import argparse
-import json
 import sys
-import urllib3
-from datetime import datetime
-from typing import Dict, List, Optional
+import time
+import orjson
 import requests
-from requests.auth import HTTPBasicAuth
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
 
 # Добавление родительского каталога в sys.path для импорта модулей проекта
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import camunda_config
+from camunda_http import camunda_engine_url, fetch_parallel, make_camunda_session
+
+# Время жизни ответов в памяти (секунды): разделы вывода и статистика
+# запрашивают одни и те же данные с интервалом в секунды
+RESPONSE_CACHE_TTL = 5.0
+
+# Размер страницы при постраничной выборке списков (firstResult/maxResults)
+PAGE_SIZE = 500
 
-# Отключение предупреждений SSL для самоподписанных сертификатов
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+# Количество записей, выводимых в разделах по умолчанию
+DEFAULT_LIMIT = 500
 
 
 class CamundaProcessService:
@@ -32,61 +41,131 @@ class CamundaProcessService:
     
     def __init__(self):
         self.base_url = camunda_config.base_url.rstrip('/')
-        # Если base_url уже содержит /engine-rest, не добавляем его еще раз
-        if self.base_url.endswith('/engine-rest'):
-            self.engine_url = self.base_url
-        else:
-            self.engine_url = f"{self.base_url}/engine-rest"
-        self.auth = None
+        self.engine_url = camunda_engine_url(self.base_url)
+        self.auth_enabled = camunda_config.auth_enabled
+        self.http = make_camunda_session(pool_maxsize=16)
         
-        if camunda_config.auth_enabled:
-            self.auth = HTTPBasicAuth(
-                camunda_config.auth_username,
-                camunda_config.auth_password
-            )
+        # URL запроса -> (время получения, данные ответа)
+        self._response_cache: Dict[str, Tuple[float, Any]] = {}
+    
+    def close(self):
+        """Закрытие HTTP сессии"""
+        self.http.close()
     
     def _make_request(self, endpoint: str, params: Dict = None) -> Optional[Dict]:
         """Выполнить HTTP запрос к Camunda REST API"""
         url = f"{self.engine_url}/{endpoint}"
+        cache_key = f"{url}?{urlencode(params or {})}"
+        
+        # Повторный запрос в пределах TTL обслуживается из памяти
+        recent = self._response_cache.get(cache_key)
+        if recent and time.monotonic() - recent[0] < RESPONSE_CACHE_TTL:
+            return recent[1]
         
         try:
-            response = requests.get(
-                url, 
-                auth=self.auth,
-                params=params or {},
-                verify=False,  # Отключение проверки SSL
-                timeout=30
-            )
-            response.raise_for_status()
-            return response.json()
+            response = self.http.get(url, params=params, timeout=30)
+            if response.status_code >= 400:
+                print(f"❌ Ошибка при запросе к {url}: HTTP {response.status_code}")
+                return None
+            data = orjson.loads(response.content)
+            self._response_cache[cache_key] = (time.monotonic(), data)
+            return data
             
         except requests.exceptions.RequestException as e:
             print(f"❌ Ошибка при запросе к {url}: {e}")
             return None
+        except orjson.JSONDecodeError as e:
+            print(f"❌ Некорректный JSON в ответе {url}: {e}")
+            return None
+    
+    def _get_list(self, endpoint: str, params: Dict, sort_by: str, max_results: Optional[int] = None) -> List[Dict]:
+        """
+        Получить список с фильтрацией и постраничной выборкой на стороне Camunda.
+        
+        Без сортировки порядок записей между страницами не гарантирован: запросы
+        отправляются с sortBy=sort_by (уникальное поле) и sortOrder=asc.
+        
+        Args:
+            sort_by: Поле сортировки, допустимое для endpoint
+            max_results: Максимальное количество записей (None - все записи,
+                         выбираются страницами по PAGE_SIZE до неполной страницы)
+        """
+        params = {**params, 'sortBy': sort_by, 'sortOrder': 'asc'}
+        if max_results is not None:
+            return self._make_request(endpoint, {**params, 'firstResult': 0, 'maxResults': max_results}) or []
+        
+        items = []
+        while True:
+            page = self._make_request(endpoint, {**params, 'firstResult': len(items), 'maxResults': PAGE_SIZE}) or []
+            items.extend(page)
+            if len(page) < PAGE_SIZE:
+                return items
+    
+    def _count(self, endpoint: str, params: Dict) -> Optional[int]:
+        """Количество записей по тем же фильтрам (endpoint/count); None при ошибке"""
+        result = self._make_request(f"{endpoint}/count", params)
+        return result.get('count') if result else None
     
     def get_process_definitions(self) -> List[Dict]:
         """Получить список определений процессов"""
         definitions = self._make_request("process-definition")
         return definitions or []
     
-    def get_process_instances(self, active_only: bool = True) -> List[Dict]:
-        """Получить список экземпляров процессов"""
+    @staticmethod
+    def _process_instance_params(active_only: bool, process_definition_key: Optional[str]) -> Dict:
+        """Фильтры экземпляров процессов (общие для списка и /count)"""
         params = {}
         if active_only:
             params['active'] = 'true'
-        
-        instances = self._make_request("process-instance", params)
-        return instances or []
+        if process_definition_key:
+            params['processDefinitionKey'] = process_definition_key
+        return params
+    
+    @staticmethod
+    def _external_task_params(topic_name: Optional[str], process_definition_key: Optional[str]) -> Dict:
+        """Фильтры внешних задач (общие для списка и /count)"""
+        params = {}
+        if topic_name:
+            params['topicName'] = topic_name
+        if process_definition_key:
+            params['processDefinitionKey'] = process_definition_key
+        return params
+    
+    @staticmethod
+    def _user_task_params(process_definition_key: Optional[str]) -> Dict:
+        """Фильтры пользовательских задач (общие для списка и /count)"""
+        return {'processDefinitionKey': process_definition_key} if process_definition_key else {}
     
-    def get_external_tasks(self) -> List[Dict]:
+    def get_process_instances(self, active_only: bool = True, max_results: Optional[int] = None,
+                              process_definition_key: Optional[str] = None) -> List[Dict]:
+        """Получить список экземпляров процессов"""
+        params = self._process_instance_params(active_only, process_definition_key)
+        return self._get_list("process-instance", params, "instanceId", max_results)
+    
+    def count_process_instances(self, active_only: bool = True,
+                                process_definition_key: Optional[str] = None) -> Optional[int]:
+        """Количество экземпляров процессов"""
+        return self._count("process-instance", self._process_instance_params(active_only, process_definition_key))
+    
+    def get_external_tasks(self, max_results: Optional[int] = None, topic_name: Optional[str] = None,
+                           process_definition_key: Optional[str] = None) -> List[Dict]:
         """Получить список внешних задач"""
-        tasks = self._make_request("external-task")
-        return tasks or []
+        params = self._external_task_params(topic_name, process_definition_key)
+        return self._get_list("external-task", params, "id", max_results)
+    
+    def count_external_tasks(self, topic_name: Optional[str] = None,
+                             process_definition_key: Optional[str] = None) -> Optional[int]:
+        """Количество внешних задач"""
+        return self._count("external-task", self._external_task_params(topic_name, process_definition_key))
     
-    def get_user_tasks(self) -> List[Dict]:
+    def get_user_tasks(self, max_results: Optional[int] = None,
+                       process_definition_key: Optional[str] = None) -> List[Dict]:
         """Получить список пользовательских задач"""
-        tasks = self._make_request("task")
-        return tasks or []
+        return self._get_list("task", self._user_task_params(process_definition_key), "id", max_results)
+    
+    def count_user_tasks(self, process_definition_key: Optional[str] = None) -> Optional[int]:
+        """Количество пользовательских задач"""
+        return self._count("task", self._user_task_params(process_definition_key))
     
     def get_engine_info(self) -> Dict:
         """Получить информацию о движке Camunda"""
@@ -112,102 +191,101 @@ def format_datetime(dt_string: str) -> str:
         return dt_string
 
 
+def _section_count(shown: int, total: Optional[int]) -> str:
+    """Количество записей в заголовке раздела: при усечении по --limit - показано и всего"""
+    if total is not None and total > shown:
+        return f"показано {shown} из {total}, ограничение --limit"
+    return str(shown)
+
+
+def _write_records(header: str, empty_message: str, records: List[str]):
+    """Вывод раздела одним вызовом sys.stdout.write вместо print на каждую строку"""
+    chunks = ["\n" + "="*80, header, "="*80]
+    if records:
+        chunks.extend(records)
+    else:
+        chunks.append(empty_message)
+    sys.stdout.write("\n".join(chunks) + "\n")
+
+
 def print_process_definitions(definitions: List[Dict]):
     """Вывести определения процессов"""
-    print("\n" + "="*80)
-    print(f"📋 ОПРЕДЕЛЕНИЯ ПРОЦЕССОВ ({len(definitions)})")
-    print("="*80)
-    
-    if not definitions:
-        print("Нет определений процессов")
-        return
-    
-    for i, definition in enumerate(definitions, 1):
-        print(f"\n{i}. {definition.get('name', 'Без имени')}")
-        print(f"   ID: {definition.get('id')}")
-        print(f"   Key: {definition.get('key')}")
-        print(f"   Version: {definition.get('version')}")
-        print(f"   Category: {definition.get('category', 'N/A')}")
-        print(f"   Suspended: {'Да' if definition.get('suspended') else 'Нет'}")
-        print(f"   Deployment ID: {definition.get('deploymentId')}")
+    records = [
+        f"\n{i}. {definition.get('name', 'Без имени')}\n"
+        f"   ID: {definition.get('id')}\n"
+        f"   Key: {definition.get('key')}\n"
+        f"   Version: {definition.get('version')}\n"
+        f"   Category: {definition.get('category', 'N/A')}\n"
+        f"   Suspended: {'Да' if definition.get('suspended') else 'Нет'}\n"
+        f"   Deployment ID: {definition.get('deploymentId')}"
+        for i, definition in enumerate(definitions, 1)
+    ]
+    _write_records(f"📋 ОПРЕДЕЛЕНИЯ ПРОЦЕССОВ ({len(definitions)})", "Нет определений процессов", records)
 
 
-def print_process_instances(instances: List[Dict]):
+def print_process_instances(instances: List[Dict], total: Optional[int] = None):
     """Вывести экземпляры процессов"""
-    print("\n" + "="*80)
-    print(f"🏃 АКТИВНЫЕ ЭКЗЕМПЛЯРЫ ПРОЦЕССОВ ({len(instances)})")
-    print("="*80)
-    
-    if not instances:
-        print("Нет активных экземпляров процессов")
-        return
-    
-    for i, instance in enumerate(instances, 1):
-        print(f"\n{i}. Instance ID: {instance.get('id')}")
-        print(f"   Process Definition ID: {instance.get('definitionId')}")
-        print(f"   Process Definition Key: {instance.get('processDefinitionKey')}")
-        print(f"   Business Key: {instance.get('businessKey', 'N/A')}")
-        print(f"   Case Instance ID: {instance.get('caseInstanceId', 'N/A')}")
-        print(f"   Suspended: {'Да' if instance.get('suspended') else 'Нет'}")
-        print(f"   Tenant ID: {instance.get('tenantId', 'N/A')}")
+    records = [
+        f"\n{i}. Instance ID: {instance.get('id')}\n"
+        f"   Process Definition ID: {instance.get('definitionId')}\n"
+        f"   Process Definition Key: {instance.get('processDefinitionKey')}\n"
+        f"   Business Key: {instance.get('businessKey', 'N/A')}\n"
+        f"   Case Instance ID: {instance.get('caseInstanceId', 'N/A')}\n"
+        f"   Suspended: {'Да' if instance.get('suspended') else 'Нет'}\n"
+        f"   Tenant ID: {instance.get('tenantId', 'N/A')}"
+        for i, instance in enumerate(instances, 1)
+    ]
+    _write_records(f"🏃 АКТИВНЫЕ ЭКЗЕМПЛЯРЫ ПРОЦЕССОВ ({_section_count(len(instances), total)})", "Нет активных экземпляров процессов", records)
 
 
-def print_external_tasks(tasks: List[Dict]):
+def print_external_tasks(tasks: List[Dict], total: Optional[int] = None):
     """Вывести внешние задачи"""
-    print("\n" + "="*80)
-    print(f"⚡ ВНЕШНИЕ ЗАДАЧИ ({len(tasks)})")
-    print("="*80)
-    
-    if not tasks:
-        print("Нет внешних задач")
-        return
-    
+    records = []
     for i, task in enumerate(tasks, 1):
-        print(f"\n{i}. Task ID: {task.get('id')}")
-        print(f"   Topic Name: {task.get('topicName')}")
-        print(f"   Worker ID: {task.get('workerId', 'N/A')}")
-        print(f"   Process Instance ID: {task.get('processInstanceId')}")
-        print(f"   Process Definition ID: {task.get('processDefinitionId')}")
-        print(f"   Process Definition Key: {task.get('processDefinitionKey')}")
-        print(f"   Activity ID: {task.get('activityId')}")
-        print(f"   Activity Instance ID: {task.get('activityInstanceId')}")
-        print(f"   Execution ID: {task.get('executionId')}")
-        print(f"   Retries: {task.get('retries')}")
-        print(f"   Suspended: {'Да' if task.get('suspended') else 'Нет'}")
-        print(f"   Priority: {task.get('priority')}")
-        print(f"   Business Key: {task.get('businessKey', 'N/A')}")
-        print(f"   Tenant ID: {task.get('tenantId', 'N/A')}")
+        record = (
+            f"\n{i}. Task ID: {task.get('id')}\n"
+            f"   Topic Name: {task.get('topicName')}\n"
+            f"   Worker ID: {task.get('workerId', 'N/A')}\n"
+            f"   Process Instance ID: {task.get('processInstanceId')}\n"
+            f"   Process Definition ID: {task.get('processDefinitionId')}\n"
+            f"   Process Definition Key: {task.get('processDefinitionKey')}\n"
+            f"   Activity ID: {task.get('activityId')}\n"
+            f"   Activity Instance ID: {task.get('activityInstanceId')}\n"
+            f"   Execution ID: {task.get('executionId')}\n"
+            f"   Retries: {task.get('retries')}\n"
+            f"   Suspended: {'Да' if task.get('suspended') else 'Нет'}\n"
+            f"   Priority: {task.get('priority')}\n"
+            f"   Business Key: {task.get('businessKey', 'N/A')}\n"
+            f"   Tenant ID: {task.get('tenantId', 'N/A')}"
+        )
         
         # Время блокировки
         lock_time = task.get('lockExpirationTime')
         if lock_time:
-            print(f"   Lock Expiration: {format_datetime(lock_time)}")
+            record += f"\n   Lock Expiration: {format_datetime(lock_time)}"
+        records.append(record)
+    _write_records(f"⚡ ВНЕШНИЕ ЗАДАЧИ ({_section_count(len(tasks), total)})", "Нет внешних задач", records)
 
 
-def print_user_tasks(tasks: List[Dict]):
+def print_user_tasks(tasks: List[Dict], total: Optional[int] = None):
     """Вывести пользовательские задачи"""
-    print("\n" + "="*80)
-    print(f"👤 ПОЛЬЗОВАТЕЛЬСКИЕ ЗАДАЧИ ({len(tasks)})")
-    print("="*80)
-    
-    if not tasks:
-        print("Нет пользовательских задач")
-        return
-    
-    for i, task in enumerate(tasks, 1):
-        print(f"\n{i}. Task ID: {task.get('id')}")
-        print(f"   Name: {task.get('name', 'Без имени')}")
-        print(f"   Description: {task.get('description', 'N/A')}")
-        print(f"   Assignee: {task.get('assignee', 'Не назначен')}")
-        print(f"   Owner: {task.get('owner', 'N/A')}")
-        print(f"   Process Instance ID: {task.get('processInstanceId')}")
-        print(f"   Process Definition Key: {task.get('processDefinitionKey')}")
-        print(f"   Task Definition Key: {task.get('taskDefinitionKey')}")
-        print(f"   Execution ID: {task.get('executionId')}")
-        print(f"   Created: {format_datetime(task.get('created'))}")
-        print(f"   Due Date: {format_datetime(task.get('due'))}")
-        print(f"   Priority: {task.get('priority')}")
-        print(f"   Suspended: {'Да' if task.get('suspended') else 'Нет'}")
+    records = [
+        f"\n{i}. Task ID: {task.get('id')}\n"
+        f"   Name: {task.get('name', 'Без имени')}\n"
+        f"   Description: {task.get('description', 'N/A')}\n"
+        f"   Assignee: {task.get('assignee', 'Не назначен')}\n"
+        f"   Owner: {task.get('owner', 'N/A')}\n"
+        f"   Process Instance ID: {task.get('processInstanceId')}\n"
+        f"   Process Definition Key: {task.get('processDefinitionKey')}\n"
+        f"   Task Definition Key: {task.get('taskDefinitionKey')}\n"
+        f"   Execution ID: {task.get('executionId')}\n"
+        f"   Created: {format_datetime(task.get('created'))}\n"
+        f"   Due Date: {format_datetime(task.get('due'))}\n"
+        f"   Priority: {task.get('priority')}\n"
+        f"   Suspended: {'Да' if task.get('suspended') else 'Нет'}"
+        for i, task in enumerate(tasks, 1)
+    ]
+    _write_records(f"👤 ПОЛЬЗОВАТЕЛЬСКИЕ ЗАДАЧИ ({_section_count(len(tasks), total)})", "Нет пользовательских задач", records)
 
 
 def print_engine_info(info: Dict):
@@ -230,10 +308,12 @@ def print_statistics(service: CamundaProcessService):
     print("📊 ОБЩАЯ СТАТИСТИКА")
     print("="*80)
     
-    definitions = service.get_process_definitions()
-    instances = service.get_process_instances()
-    external_tasks = service.get_external_tasks()
-    user_tasks = service.get_user_tasks()
+    definitions, instances, external_tasks, user_tasks = fetch_parallel(
+        service.get_process_definitions,
+        service.get_process_instances,
+        service.get_external_tasks,
+        service.get_user_tasks,
+    )
     
     print(f"Определений процессов: {len(definitions)}")
     print(f"Активных экземпляров: {len(instances)}")
@@ -242,10 +322,7 @@ def print_statistics(service: CamundaProcessService):
     
     # Статистика по топикам внешних задач
     if external_tasks:
-        topics = {}
-        for task in external_tasks:
-            topic = task.get('topicName', 'unknown')
-            topics[topic] = topics.get(topic, 0) + 1
+        topics = Counter(task.get('topicName', 'unknown') for task in external_tasks)
         
         print(f"\nВнешние задачи по топикам:")
         for topic, count in sorted(topics.items()):
@@ -253,10 +330,7 @@ def print_statistics(service: CamundaProcessService):
     
     # Статистика по процессам
     if instances:
-        processes = {}
-        for instance in instances:
-            key = instance.get('processDefinitionKey', 'unknown')
-            processes[key] = processes.get(key, 0) + 1
+        processes = Counter(instance.get('processDefinitionKey', 'unknown') for instance in instances)
         
         print(f"\nАктивные экземпляры по процессам:")
         for process_key, count in sorted(processes.items()):
@@ -265,18 +339,25 @@ def print_statistics(service: CamundaProcessService):
 
 def export_to_json(service: CamundaProcessService, filename: str):
     """Экспортировать все данные в JSON файл"""
+    engine_info, definitions, instances, external_tasks, user_tasks = fetch_parallel(
+        service.get_engine_info,
+        service.get_process_definitions,
+        service.get_process_instances,
+        service.get_external_tasks,
+        service.get_user_tasks,
+    )
     data = {
         "timestamp": datetime.now().isoformat(),
-        "engine_info": service.get_engine_info(),
-        "process_definitions": service.get_process_definitions(),
-        "process_instances": service.get_process_instances(),
-        "external_tasks": service.get_external_tasks(),
-        "user_tasks": service.get_user_tasks()
+        "engine_info": engine_info,
+        "process_definitions": definitions,
+        "process_instances": instances,
+        "external_tasks": external_tasks,
+        "user_tasks": user_tasks,
     }
     
     try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
         print(f"\n✅ Данные экспортированы в файл: {filename}")
     except Exception as e:
         print(f"\n❌ Ошибка при экспорте в файл {filename}: {e}")
@@ -296,6 +377,7 @@ def main():
   python camunda_processes.py --user-tasks      # Только пользовательские задачи
   python camunda_processes.py --stats           # Только статистика
   python camunda_processes.py --export data.json # Экспорт в JSON
+  python camunda_processes.py --external-tasks --topic send_email --limit 50
         """
     )
     
@@ -313,18 +395,26 @@ def main():
                        help='Экспортировать данные в JSON файл')
     parser.add_argument('--all-instances', action='store_true',
                        help='Показать все экземпляры (включая завершенные)')
+    parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT,
+                       help=f'Максимум записей в разделе (по умолчанию {DEFAULT_LIMIT}, 0 - все)')
+    parser.add_argument('--topic', metavar='TOPIC',
+                       help='Фильтр внешних задач по топику')
+    parser.add_argument('--process-key', metavar='KEY',
+                       help='Фильтр экземпляров и задач по ключу процесса')
     
     args = parser.parse_args()
     
     # Если не указаны конкретные разделы, показать все
     show_all = not any([args.definitions, args.instances, args.external_tasks, 
                        args.user_tasks, args.stats, args.export])
+    limit = args.limit or None
     
+    service = None
     try:
         service = CamundaProcessService()
         
         print(f"🔗 Подключение к Camunda: {service.base_url}")
-        print(f"🔐 Аутентификация: {'Включена' if service.auth else 'Отключена'}")
+        print(f"🔐 Аутентификация: {'Включена' if service.auth_enabled else 'Отключена'}")
         
         # Проверка подключения
         engine_info = service.get_engine_info()
@@ -349,18 +439,36 @@ def main():
         
         # Показать экземпляры процессов
         if show_all or args.instances:
-            instances = service.get_process_instances(active_only=not args.all_instances)
-            print_process_instances(instances)
+            instances = service.get_process_instances(
+                active_only=not args.all_instances,
+                max_results=limit,
+                process_definition_key=args.process_key
+            )
+            # Полное количество запрашивается, только если список мог быть усечен
+            total = None
+            if limit and len(instances) >= limit:
+                total = service.count_process_instances(not args.all_instances, args.process_key)
+            print_process_instances(instances, total)
         
         # Показать внешние задачи
         if show_all or args.external_tasks:
-            external_tasks = service.get_external_tasks()
-            print_external_tasks(external_tasks)
+            external_tasks = service.get_external_tasks(
+                max_results=limit,
+                topic_name=args.topic,
+                process_definition_key=args.process_key
+            )
+            total = None
+            if limit and len(external_tasks) >= limit:
+                total = service.count_external_tasks(args.topic, args.process_key)
+            print_external_tasks(external_tasks, total)
         
         # Показать пользовательские задачи
         if show_all or args.user_tasks:
-            user_tasks = service.get_user_tasks()
-            print_user_tasks(user_tasks)
+            user_tasks = service.get_user_tasks(max_results=limit, process_definition_key=args.process_key)
+            total = None
+            if limit and len(user_tasks) >= limit:
+                total = service.count_user_tasks(args.process_key)
+            print_user_tasks(user_tasks, total)
         
         # Показать статистику
         if show_all or args.stats:
@@ -374,6 +482,9 @@ def main():
     except Exception as e:
         print(f"\n❌ Неожиданная ошибка: {e}")
         sys.exit(1)
+    finally:
+        if service is not None:
+            service.close()
 
 
 if __name__ == "__main__":
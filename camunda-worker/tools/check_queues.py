@@ -3,6 +3,12 @@
 Проверка состояния RabbitMQ очередей
 """
 
+import argparse
+import time
+from datetime import datetime
+
+import pika
+
 # Добавление родительского каталога в sys.path для импорта модулей проекта
 import os
 import sys
@@ -10,8 +16,88 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from rabbitmq_client import RabbitMQClient
 
+# Очистка экрана терминала перед перерисовкой в режиме --watch
+CLEAR_SCREEN = "\033[2J\033[H"
+
+
+def print_queues_state(client: RabbitMQClient):
+    """Вывести состояние очередей через уже подключенный клиент"""
+    # Получение информации об очередях
+    queues_info = client.get_all_queues_info()
+    
+    # Получение информации об Alternate Exchange
+    ae_info = client.get_alternate_exchange_info()
+    
+    if ae_info:
+        print(f"\n🔄 Alternate Exchange: {ae_info.get('alternate_exchange')}")
+        print(f"   Тип: {ae_info.get('type')}")
+        print(f"   Описание: {ae_info.get('description')}")
+    
+    if queues_info:
+        print(f"\n📊 Найдено очередей: {len(queues_info)}")
+        
+        for queue_name, info in queues_info.items():
+            msg_count = info.get("message_count", 0)
+            consumer_count = info.get("consumer_count", 0)
+            source = info.get("source", "direct")
+            
+            status_icon = "📬" if msg_count > 0 else "📭"
+            consumer_icon = "👥" if consumer_count > 0 else "🚫"
+            source_icon = "🔄" if source == "alternate_exchange" else "🎯"
+            
+            print(f"\n{status_icon} {queue_name}: {source_icon}")
+            print(f"   📨 Сообщений: {msg_count}")
+            print(f"   {consumer_icon} Потребителей: {consumer_count}")
+            
+            if source == "alternate_exchange":
+                ae_name = info.get("alternate_exchange", "N/A")
+                print(f"   🔄 Источник: Alternate Exchange ({ae_name})")
+            
+            if msg_count > 0:
+                print(f"   ⚠️ В очереди есть необработанные сообщения!")
+    else:
+        print("❌ Не удалось получить информацию об очередях")
+
+
+def watch_queues(client: RabbitMQClient, interval: float):
+    """
+    Периодическая перерисовка состояния очередей.
+    
+    Используется одно соединение на все итерации; переподключение
+    выполняется только если соединение было потеряно.
+    """
+    try:
+        while True:
+            if not client.is_connected() and not client.connect():
+                print(f"❌ Соединение с RabbitMQ потеряно, повтор через {interval} с")
+            else:
+                print(CLEAR_SCREEN, end="")
+                print(f"🐰 ПРОВЕРКА RABBITMQ ОЧЕРЕДЕЙ ({datetime.now():%H:%M:%S}, обновление каждые {interval} с)")
+                print("=" * 40)
+                print_queues_state(client)
+            if not client.is_connected():
+                time.sleep(interval)
+                continue
+            try:
+                # Ожидание через pika: heartbeat обрабатываются, соединение не рвется
+                client.connection.sleep(interval)
+            except pika.exceptions.AMQPError:
+                # Соединение потеряно - переподключение на следующей итерации
+                client.disconnect()
+    except KeyboardInterrupt:
+        print("\n⏹️ Наблюдение остановлено")
+
+
 def main():
     """Проверить состояние всех очередей"""
+    parser = argparse.ArgumentParser(description="Проверка состояния RabbitMQ очередей")
+    parser.add_argument('--watch', type=float, metavar='INTERVAL',
+                       help='Обновлять состояние каждые INTERVAL секунд (соединение не переоткрывается)')
+    args = parser.parse_args()
+    
+    if args.watch is not None and args.watch <= 0:
+        parser.error("--watch: интервал должен быть больше нуля")
+    
     print("🐰 ПРОВЕРКА RABBITMQ ОЧЕРЕДЕЙ")
     print("=" * 40)
     
@@ -20,45 +106,15 @@ def main():
     if client.connect():
         print("✅ Подключение к RabbitMQ успешно")
         
-        # Получение информации об очередях
-        queues_info = client.get_all_queues_info()
-        
-        # Получение информации об Alternate Exchange
-        ae_info = client.get_alternate_exchange_info()
-        
-        if ae_info:
-            print(f"\n🔄 Alternate Exchange: {ae_info.get('alternate_exchange')}")
-            print(f"   Тип: {ae_info.get('type')}")
-            print(f"   Описание: {ae_info.get('description')}")
-        
-        if queues_info:
-            print(f"\n📊 Найдено очередей: {len(queues_info)}")
-            
-            for queue_name, info in queues_info.items():
-                msg_count = info.get("message_count", 0)
-                consumer_count = info.get("consumer_count", 0)
-                source = info.get("source", "direct")
-                
-                status_icon = "📬" if msg_count > 0 else "📭"
-                consumer_icon = "👥" if consumer_count > 0 else "🚫"
-                source_icon = "🔄" if source == "alternate_exchange" else "🎯"
-                
-                print(f"\n{status_icon} {queue_name}: {source_icon}")
-                print(f"   📨 Сообщений: {msg_count}")
-                print(f"   {consumer_icon} Потребителей: {consumer_count}")
-                
-                if source == "alternate_exchange":
-                    ae_name = info.get("alternate_exchange", "N/A")
-                    print(f"   🔄 Источник: Alternate Exchange ({ae_name})")
-                
-                if msg_count > 0:
-                    print(f"   ⚠️ В очереди есть необработанные сообщения!")
-        else:
-            print("❌ Не удалось получить информацию об очередях")
-        
-        client.disconnect()
+        try:
+            if args.watch is not None:
+                watch_queues(client, args.watch)
+            else:
+                print_queues_state(client)
+        finally:
+            client.disconnect()
     else:
         print("❌ Не удалось подключиться к RabbitMQ")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main() 
@@ -33,6 +33,9 @@ python process_manager.py delete TestProcess
 python universal-worker.py/tools/process_manager.py stop Process_3f946f12_5071_4a9f_9960_0f57b4c05e45 --force
 python process_manager.py delete TestProcess --force
 
+# Показать, что будет сделано, без изменений в Camunda
+python process_manager.py stop TestProcess --dry-run
+
 # Показать справку по командам
 python process_manager.py --help
 python process_manager.py start --help
@@ -40,21 +43,28 @@ python process_manager.py start --help
 
 import argparse
 import json
+import orjson
 import sys
-import urllib3
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Any, Dict, List, Optional, Tuple
 import requests
-from requests.auth import HTTPBasicAuth
 
 # Добавление родительского каталога в sys.path для импорта модулей проекта
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import camunda_config
+from camunda_http import camunda_engine_url, fetch_parallel, make_camunda_session
+
+# Число параллельных запросов при поштучных операциях над задачами
+REQUEST_WORKERS = 16
 
-# Отключение предупреждений SSL для самоподписанных сертификатов
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+# Ожидание завершения batch операции: верхняя граница и начальная пауза опроса (секунды).
+# Ожидание прекращается сразу после выполнения заданий batch, граница - худший случай
+BATCH_WAIT_TIMEOUT = 30.0
+BATCH_POLL_INITIAL_DELAY = 0.1
 
 
 class CamundaProcessManager:
@@ -62,59 +72,37 @@ class CamundaProcessManager:
     
     def __init__(self):
         self.base_url = camunda_config.base_url.rstrip('/')
-        # Если base_url уже содержит /engine-rest, не добавляем его еще раз
-        if self.base_url.endswith('/engine-rest'):
-            self.engine_url = self.base_url
-        else:
-            self.engine_url = f"{self.base_url}/engine-rest"
-        self.auth = None
-        
-        if camunda_config.auth_enabled:
-            self.auth = HTTPBasicAuth(
-                camunda_config.auth_username,
-                camunda_config.auth_password
-            )
+        self.engine_url = camunda_engine_url(self.base_url)
+        self.http = make_camunda_session(pool_maxsize=REQUEST_WORKERS)
+    
+    def close(self):
+        """Закрыть HTTP сессию"""
+        self.http.close()
     
     def _make_request(self, method: str, endpoint: str, data: Dict = None, params: Dict = None) -> Optional[Dict]:
         """Выполнить HTTP запрос к Camunda REST API"""
         url = f"{self.engine_url}/{endpoint}"
         
+        method = method.upper()
+        if method not in ('GET', 'POST', 'DELETE'):
+            raise ValueError(f"Unsupported HTTP method: {method}")
+        
         try:
-            if method.upper() == 'GET':
-                response = requests.get(
-                    url, 
-                    auth=self.auth,
-                    params=params or {},
-                    verify=False,
-                    timeout=30
-                )
-            elif method.upper() == 'POST':
-                response = requests.post(
-                    url,
-                    auth=self.auth,
-                    json=data or {},
-                    params=params or {},
-                    verify=False,
-                    timeout=30
-                )
-            elif method.upper() == 'DELETE':
-                response = requests.delete(
-                    url,
-                    auth=self.auth,
-                    params=params or {},
-                    verify=False,
-                    timeout=30
-                )
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
+            response = self.http.request(
+                method,
+                url,
+                params=params,
+                json=(data or {}) if method == 'POST' else None,
+                timeout=30
+            )
             
             response.raise_for_status()
             
             # Некоторые DELETE запросы возвращают пустой ответ
-            if response.status_code == 204 or not response.text.strip():
+            if response.status_code == 204 or not response.content.strip():
                 return {"status": "success"}
             
-            return response.json()
+            return orjson.loads(response.content)
             
         except requests.exceptions.RequestException as e:
             print(f"❌ Ошибка при запросе к {url}: {e}")
@@ -126,6 +114,9 @@ class CamundaProcessManager:
                     print(f"   HTTP статус: {e.response.status_code}")
                     print(f"   Ответ сервера: {e.response.text[:200]}")
             return None
+        except orjson.JSONDecodeError as e:
+            print(f"❌ Некорректный JSON в ответе {url}: {e}")
+            return None
 
     # === МЕТОДЫ ДЛЯ РАБОТЫ С ОПРЕДЕЛЕНИЯМИ ПРОЦЕССОВ ===
     
@@ -159,16 +150,39 @@ class CamundaProcessManager:
         params = {"cascade": "true" if cascade else "false"}
         result = self._make_request("DELETE", endpoint, params=params)
         return result is not None
+    
+    def delete_process_definitions_by_key(self, process_key: str, tenant_id: Optional[str] = None,
+                                          cascade: bool = True) -> bool:
+        """
+        Удалить все версии процесса с ключом одним запросом.
+        
+        Без tenant_id удаляются версии, не принадлежащие тенанту; версии тенанта -
+        отдельным запросом с его tenant_id.
+        """
+        endpoint = f"process-definition/key/{process_key}"
+        if tenant_id:
+            endpoint += f"/tenant-id/{tenant_id}"
+        params = {"cascade": "true" if cascade else "false"}
+        result = self._make_request("DELETE", f"{endpoint}/delete", params=params)
+        return result is not None
 
     # === МЕТОДЫ ДЛЯ РАБОТЫ С ЭКЗЕМПЛЯРАМИ ПРОЦЕССОВ ===
     
-    def get_process_instances_by_key(self, process_key: str) -> List[Dict]:
-        """Получить все активные экземпляры процесса по ключу"""
+    def get_process_instances_by_key(self, process_key: str, max_results: Optional[int] = None) -> List[Dict]:
+        """Получить активные экземпляры процесса по ключу (все или первые max_results)"""
         endpoint = "process-instance"
         params = {"processDefinitionKey": process_key}
+        if max_results is not None:
+            params["firstResult"] = 0
+            params["maxResults"] = max_results
         instances = self._make_request("GET", endpoint, params=params)
         return instances or []
     
+    def count_process_instances_by_key(self, process_key: str) -> int:
+        """Количество активных экземпляров процесса (без загрузки списка)"""
+        result = self._make_request("GET", "process-instance/count", params={"processDefinitionKey": process_key})
+        return result.get("count", 0) if result else 0
+    
     def start_process_by_key(self, process_key: str, variables: Dict[str, Any] = None, 
                            business_key: str = None, version: str = None) -> Optional[Dict]:
         """Запустить процесс по ключу"""
@@ -213,30 +227,121 @@ class CamundaProcessManager:
         result = self._make_request("DELETE", endpoint, params=params)
         return result is not None
     
-    def stop_all_process_instances(self, process_key: str) -> int:
-        """Остановить все экземпляры процесса и вернуть количество остановленных"""
+    def delete_process_instances(self, instance_ids: List[str], reason: str = "Удалено через Process Manager") -> Optional[Dict]:
+        """
+        Удалить экземпляры процессов одной batch операцией Camunda.
+        
+        Удаление выполняется на стороне Camunda асинхронно (batch jobs).
+        
+        Returns:
+            Описание созданного batch или None при ошибке
+        """
+        data = {"processInstanceIds": instance_ids, "deleteReason": reason}
+        return self._make_request("POST", "process-instance/delete", data)
+    
+    def get_batch_statistics(self, batch_id: str) -> Optional[Dict]:
+        """Статистика batch операции: пустой словарь, если batch уже удален; None при ошибке"""
+        statistics = self._make_request("GET", "batch/statistics", params={"batchId": batch_id})
+        if statistics is None:
+            return None
+        return statistics[0] if statistics else {}
+    
+    @staticmethod
+    def is_batch_done(statistics: Optional[Dict]) -> bool:
+        """
+        Batch завершен: статистика пуста (batch удален) или не осталось заданий,
+        кроме упавших (remainingJobs включает failedJobs).
+        """
+        if statistics is None:
+            return False
+        return not statistics or statistics.get('remainingJobs', 0) <= statistics.get('failedJobs', 0)
+    
+    def wait_for_batch(self, batch_id: str, timeout: float = BATCH_WAIT_TIMEOUT) -> Tuple[bool, Optional[Dict]]:
+        """
+        Ожидание завершения batch операции с ограничением по времени.
+        
+        Завершенный batch Camunda удаляет только при запуске monitor job (по умолчанию
+        раз в 30 секунд), поэтому завершение определяется по remainingJobs, а пустая
+        статистика - второй признак завершения. Статистика опрашивается с
+        экспоненциально растущей паузой (100, 200, 400... мс).
+        
+        Returns:
+            (завершен ли batch, последняя статистика; пустой словарь - batch удален)
+        """
+        deadline = time.monotonic() + timeout
+        delay = BATCH_POLL_INITIAL_DELAY
+        while True:
+            statistics = self.get_batch_statistics(batch_id)
+            done = self.is_batch_done(statistics)
+            remaining = deadline - time.monotonic()
+            if done or remaining <= 0:
+                return done, statistics
+            time.sleep(min(delay, remaining))
+            delay *= 2
+    
+    def count_process_instances_by_ids(self, instance_ids: List[str]) -> Optional[int]:
+        """Количество еще существующих экземпляров из списка ID; None при ошибке"""
+        result = self._make_request("POST", "process-instance/count", {"processInstanceIds": instance_ids})
+        return result.get("count", 0) if result else None
+    
+    def stop_all_process_instances(self, process_key: str) -> Tuple[int, bool]:
+        """
+        Остановить все экземпляры процесса.
+        
+        Удаление выполняется batch операцией Camunda асинхронно: количество
+        остановленных - это экземпляры из запроса, которых уже нет в Camunda.
+        
+        Returns:
+            (количество остановленных экземпляров, завершена ли batch операция)
+        """
         instances = self.get_process_instances_by_key(process_key)
-        stopped_count = 0
+        if not instances:
+            return 0, True
         
-        for instance in instances:
-            instance_id = instance.get('id')
-            if self.delete_process_instance(instance_id, f"Массовая остановка процесса {process_key}"):
-                stopped_count += 1
-                print(f"   ✅ Остановлен экземпляр: {instance_id}")
-            else:
-                print(f"   ❌ Не удалось остановить экземпляр: {instance_id}")
+        # Один запрос на все экземпляры вместо DELETE на каждый
+        instance_ids = [instance.get('id') for instance in instances]
+        batch = self.delete_process_instances(instance_ids, f"Массовая остановка процесса {process_key}")
+        if batch is None:
+            print(f"   ❌ Не удалось остановить экземпляры ({len(instance_ids)})")
+            return 0, False
+        
+        batch_id = batch.get('id')
+        print(f"   ✅ Создана batch операция удаления: {batch_id} ({len(instance_ids)} экземпляров)")
         
-        return stopped_count
+        done, statistics = self.wait_for_batch(batch_id)
+        failed_jobs = statistics.get('failedJobs', 0) if statistics else 0
+        if not done:
+            remaining_jobs = statistics.get('remainingJobs', 0) - failed_jobs if statistics else '?'
+            print(f"   ⏳ Batch выполняется: выполнено {statistics.get('completedJobs', 0) if statistics else '?'}, "
+                  f"осталось {remaining_jobs}")
+        elif failed_jobs:
+            print(f"   ⚠️ Batch операция завершена с ошибками: выполнено {statistics.get('completedJobs', 0)}, "
+                  f"ошибок {failed_jobs}")
+        else:
+            print("   ✅ Batch операция завершена")
+        
+        remaining_count = self.count_process_instances_by_ids(instance_ids)
+        if remaining_count is None:
+            return 0, done
+        return len(instance_ids) - remaining_count, done
 
     # === МЕТОДЫ ДЛЯ РАБОТЫ С EXTERNAL TASKS ===
     
-    def get_external_tasks_by_process_key(self, process_key: str) -> List[Dict]:
-        """Получить все External Tasks для процесса"""
+    def get_external_tasks_by_process_key(self, process_key: str, max_results: Optional[int] = None) -> List[Dict]:
+        """Получить External Tasks для процесса (все или первые max_results)"""
         endpoint = "external-task"
         params = {"processDefinitionKey": process_key}
+        if max_results is not None:
+            params["firstResult"] = 0
+            params["maxResults"] = max_results
         tasks = self._make_request("GET", endpoint, params=params)
         return tasks or []
     
+    def count_external_tasks_by_process_key(self, process_key: str) -> int:
+        """Количество External Tasks процесса (без загрузки списка)"""
+        result = self._make_request("GET", "external-task/count", params={"processDefinitionKey": process_key})
+        return result.get("count", 0) if result else 0
+    
     def delete_external_task(self, task_id: str) -> bool:
         """Удалить External Task (разблокировать)"""
         endpoint = f"external-task/{task_id}/unlock"
@@ -248,9 +353,14 @@ class CamundaProcessManager:
         tasks = self.get_external_tasks_by_process_key(process_key)
         cleaned_count = 0
         
-        for task in tasks:
-            task_id = task.get('id')
-            if self.delete_external_task(task_id):
+        # Batch операции разблокировки в Camunda нет: запросы выполняются
+        # параллельно, результаты выводятся в исходном порядке задач
+        task_ids = [task.get('id') for task in tasks]
+        with ThreadPoolExecutor(max_workers=REQUEST_WORKERS) as executor:
+            results = list(executor.map(self.delete_external_task, task_ids))
+        
+        for task_id, cleaned in zip(task_ids, results):
+            if cleaned:
                 cleaned_count += 1
                 print(f"   ✅ Очищена задача: {task_id}")
             else:
@@ -323,7 +433,15 @@ def print_processes_list(processes: List[Dict]):
 
 def print_process_detailed_info(manager: CamundaProcessManager, process_key: str):
     """Вывести подробную информацию о процессе"""
-    definitions = manager.get_process_definitions_by_key(process_key)
+    # Версии, количества и первые экземпляры/задачи не зависят друг от друга:
+    # запрашиваются параллельно, общее время - один запрос вместо пяти
+    definitions, instances_count, instances, tasks_count, tasks = fetch_parallel(
+        lambda: manager.get_process_definitions_by_key(process_key),
+        lambda: manager.count_process_instances_by_key(process_key),
+        lambda: manager.get_process_instances_by_key(process_key, max_results=5),
+        lambda: manager.count_external_tasks_by_process_key(process_key),
+        lambda: manager.get_external_tasks_by_process_key(process_key, max_results=3),
+    )
     
     if not definitions:
         print(f"❌ Процесс с ключом '{process_key}' не найден")
@@ -351,30 +469,29 @@ def print_process_detailed_info(manager: CamundaProcessManager, process_key: str
         status = "🔴 Приостановлен" if definition.get('suspended') else "🟢 Активен"
         print(f"   Версия {definition.get('version')}: {definition.get('id')} ({status})")
     
-    # Активные экземпляры
-    instances = manager.get_process_instances_by_key(process_key)
-    print(f"\n🚀 Активные экземпляры: {len(instances)}")
+    # Активные экземпляры: количество и первые 5 запрашиваются у Camunda,
+    # полный список не загружается
+    print(f"\n🚀 Активные экземпляры: {instances_count}")
     
-    if instances:
-        for instance in instances[:5]:  # Показываем первые 5
+    if instances_count:
+        for instance in instances:
             business_key = instance.get('businessKey', 'N/A')
             print(f"   {instance.get('id')} (Business Key: {business_key})")
         
-        if len(instances) > 5:
-            print(f"   ... и еще {len(instances) - 5} экземпляров")
+        if instances_count > 5:
+            print(f"   ... и еще {instances_count - 5} экземпляров")
     
-    # External Tasks
-    external_tasks = manager.get_external_tasks_by_process_key(process_key)
-    print(f"\n🔧 External Tasks: {len(external_tasks)}")
+    # External Tasks: количество и первые 3
+    print(f"\n🔧 External Tasks: {tasks_count}")
     
-    if external_tasks:
-        for task in external_tasks[:3]:  # Показываем первые 3
+    if tasks_count:
+        for task in tasks:
             topic = task.get('topicName', 'N/A')
             worker_id = task.get('workerId', 'N/A')
             print(f"   {task.get('id')} (Topic: {topic}, Worker: {worker_id})")
         
-        if len(external_tasks) > 3:
-            print(f"   ... и еще {len(external_tasks) - 3} задач")
+        if tasks_count > 3:
+            print(f"   ... и еще {tasks_count - 3} задач")
 
 
 def confirm_dangerous_action(action: str, target: str) -> bool:
@@ -382,6 +499,12 @@ def confirm_dangerous_action(action: str, target: str) -> bool:
     print(f"\n⚠️  ВНИМАНИЕ: Вы собираетесь {action} '{target}'")
     print("Это действие необратимо!")
     
+    # Без терминала (cron, скрипты) подтверждение ввести некому: завершение
+    # с ошибкой вместо бесконечного ожидания input()
+    if not sys.stdin.isatty():
+        print("❌ Нет интерактивного терминала для подтверждения. Используйте --yes")
+        sys.exit(1)
+    
     confirmation = input(f"Для подтверждения введите название процесса '{target}': ")
     
     if confirmation != target:
@@ -461,24 +584,31 @@ def cmd_stop(manager: CamundaProcessManager, args):
     """Команда: остановить все экземпляры процесса"""
     print(f"🔗 Подключение к Camunda: {manager.base_url}")
     
+    # Определение процесса и количества запрашиваются параллельно
+    # (только количества, списки загружаются при остановке)
+    definition, instances_count, tasks_count = fetch_parallel(
+        lambda: manager.get_process_definition_by_key(args.process_key),
+        lambda: manager.count_process_instances_by_key(args.process_key),
+        lambda: manager.count_external_tasks_by_process_key(args.process_key),
+    )
+    
     # Проверяем существование процесса
-    definition = manager.get_process_definition_by_key(args.process_key)
     if not definition:
         print(f"❌ Процесс с ключом '{args.process_key}' не найден")
         return
     
-    # Получаем информацию о процессе
-    instances = manager.get_process_instances_by_key(args.process_key)
-    external_tasks = manager.get_external_tasks_by_process_key(args.process_key)
-    
     print(f"📋 Процесс: {definition.get('name', 'Без названия')}")
-    print(f"🚀 Активных экземпляров: {len(instances)}")
-    print(f"🔧 External Tasks: {len(external_tasks)}")
+    print(f"🚀 Активных экземпляров: {instances_count}")
+    print(f"🔧 External Tasks: {tasks_count}")
     
-    if not instances and not external_tasks:
+    if not instances_count and not tasks_count:
         print("💡 Нет активных экземпляров или задач для остановки")
         return
     
+    if args.dry_run:
+        print(f"\n🧪 DRY RUN: будет остановлено экземпляров: {instances_count}, очищено External Tasks: {tasks_count}")
+        return
+    
     # Подтверждение
     if not args.force:
         if not confirm_dangerous_action("остановить все экземпляры процесса", args.process_key):
@@ -486,14 +616,19 @@ def cmd_stop(manager: CamundaProcessManager, args):
     
     # Остановка экземпляров
     stopped_count = 0
-    if instances:
-        print(f"\n⏳ Остановка {len(instances)} экземпляров...")
-        stopped_count = manager.stop_all_process_instances(args.process_key)
+    batch_done = True
+    if instances_count:
+        print(f"\n⏳ Остановка {instances_count} экземпляров...")
+        stopped_count, batch_done = manager.stop_all_process_instances(args.process_key)
     
-    # Очистка External Tasks
+    # Очистка External Tasks - только после завершения удаления экземпляров:
+    # задачи удаляемых экземпляров Camunda удаляет вместе с ними
     cleaned_count = 0
-    if external_tasks:
-        print(f"\n⏳ Очистка {len(external_tasks)} External Tasks...")
+    if not batch_done:
+        print("\n⏳ Удаление экземпляров продолжается асинхронно в Camunda: очистка External Tasks "
+              "пропущена, повторите stop после завершения batch операции")
+    elif tasks_count:
+        print(f"\n⏳ Очистка {tasks_count} External Tasks...")
         cleaned_count = manager.cleanup_external_tasks(args.process_key)
     
     print(f"\n✅ Операция завершена:")
@@ -505,8 +640,11 @@ def cmd_delete(manager: CamundaProcessManager, args):
     """Команда: удалить процесс"""
     print(f"🔗 Подключение к Camunda: {manager.base_url}")
     
-    # Получаем все версии процесса
-    definitions = manager.get_process_definitions_by_key(args.process_key)
+    # Получаем все версии процесса и количество активных экземпляров (параллельно)
+    definitions, instances_count = fetch_parallel(
+        lambda: manager.get_process_definitions_by_key(args.process_key),
+        lambda: manager.count_process_instances_by_key(args.process_key),
+    )
     if not definitions:
         print(f"❌ Процесс с ключом '{args.process_key}' не найден")
         return
@@ -516,31 +654,39 @@ def cmd_delete(manager: CamundaProcessManager, args):
         print(f"   Версия {definition.get('version')}: {definition.get('id')}")
     
     # Проверяем активные экземпляры
-    instances = manager.get_process_instances_by_key(args.process_key)
-    if instances and not args.force:
-        print(f"\n⚠️  Найдено {len(instances)} активных экземпляров!")
+    if instances_count and not args.force:
+        print(f"\n⚠️  Найдено {instances_count} активных экземпляров!")
         print("Сначала остановите их командой: python process_manager.py stop <process_key>")
         print("Или используйте флаг --force для принудительного удаления")
         return
     
+    if args.dry_run:
+        print(f"\n🧪 DRY RUN: будет удалено версий процесса: {len(definitions)}")
+        return
+    
     # Подтверждение
     if not args.force:
         if not confirm_dangerous_action("удалить процесс", args.process_key):
             return
     
-    # Удаление всех версий
+    # Удаление всех версий: один запрос на тенант вместо DELETE на каждую версию
     print(f"\n⏳ Удаление {len(definitions)} версий процесса...")
     deleted_count = 0
     
+    definitions_by_tenant: Dict[Optional[str], List[Dict]] = {}
     for definition in definitions:
-        definition_id = definition.get('id')
-        version = definition.get('version')
-        
-        if manager.delete_process_definition(definition_id, cascade=True):
-            deleted_count += 1
-            print(f"   ✅ Удалена версия {version}: {definition_id}")
-        else:
-            print(f"   ❌ Не удалось удалить версию {version}: {definition_id}")
+        definitions_by_tenant.setdefault(definition.get('tenantId'), []).append(definition)
+    
+    for tenant_id, tenant_definitions in definitions_by_tenant.items():
+        deleted = manager.delete_process_definitions_by_key(args.process_key, tenant_id, cascade=True)
+        for definition in tenant_definitions:
+            definition_id = definition.get('id')
+            version = definition.get('version')
+            if deleted:
+                deleted_count += 1
+                print(f"   ✅ Удалена версия {version}: {definition_id}")
+            else:
+                print(f"   ❌ Не удалось удалить версию {version}: {definition_id}")
     
     print(f"\n✅ Операция завершена: удалено {deleted_count} из {len(definitions)} версий")
 
@@ -577,8 +723,11 @@ def main():
   # Остановить все экземпляры процесса
   python process_manager.py stop TestProcess
 
-  # Принудительная остановка без подтверждения
-  python process_manager.py stop TestProcess --force
+  # Принудительная остановка без подтверждения (для скриптов и cron)
+  python process_manager.py stop TestProcess --yes
+
+  # Показать, что будет остановлено, без изменений
+  python process_manager.py stop TestProcess --dry-run
 
   # Удалить процесс
   python process_manager.py delete TestProcess
@@ -609,17 +758,22 @@ def main():
     # Команда stop
     stop_parser = subparsers.add_parser('stop', help='Остановить все экземпляры процесса')
     stop_parser.add_argument('process_key', help='Ключ процесса')
-    stop_parser.add_argument('--force', action='store_true', 
+    stop_parser.add_argument('--force', '--yes', '-y', dest='force', action='store_true',
                            help='Принудительная остановка без подтверждения')
+    stop_parser.add_argument('--dry-run', action='store_true',
+                           help='Показать, что будет остановлено, без изменений')
     
     # Команда delete
     delete_parser = subparsers.add_parser('delete', help='Удалить процесс полностью')
     delete_parser.add_argument('process_key', help='Ключ процесса')
-    delete_parser.add_argument('--force', action='store_true',
+    delete_parser.add_argument('--force', '--yes', '-y', dest='force', action='store_true',
                              help='Принудительное удаление без подтверждения')
+    delete_parser.add_argument('--dry-run', action='store_true',
+                             help='Показать, что будет удалено, без изменений')
     
     args = parser.parse_args()
     
+    manager = None
     try:
         manager = CamundaProcessManager()
         
@@ -652,6 +806,9 @@ def main():
     except Exception as e:
         print(f"\n❌ Неожиданная ошибка: {e}")
         sys.exit(1)
+    finally:
+        if manager is not None:
+            manager.close()
 
 
 if __name__ == "__main__":
@@ -41,6 +41,7 @@ import json
 import sys
 import time
 from typing import List, Dict, Any, Optional
+import orjson
 import pika
 
 # Добавление родительского каталога в sys.path для импорта модулей проекта
@@ -48,7 +49,31 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import rabbitmq_config
-from rabbitmq_client import RabbitMQClient
+from rabbitmq_client import RabbitMQClient, unpack_task_meta
+
+# Сообщения больше этого размера (байт) при просмотре не форматируются целиком:
+# выводятся ключи верхнего уровня и начало тела (полностью - через --output)
+PREVIEW_MAX_BYTES = 4096
+
+# Чтение через basic.consume завершается, если доставки не приходят дольше
+# этого времени (секунды)
+CONSUME_IDLE_TIMEOUT = 2.0
+
+# Максимальное значение prefetch_count в AMQP (16 бит)
+MAX_PREFETCH_COUNT = 65535
+
+
+def _decode_headers(headers: Dict[str, Any]) -> Dict[str, Any]:
+    """Заголовки сообщения с распакованным бинарным заголовком x-meta"""
+    meta = headers.get('x-meta')
+    if not isinstance(meta, bytes):
+        return headers
+    decoded = {key: value for key, value in headers.items() if key != 'x-meta'}
+    try:
+        decoded.update(unpack_task_meta(meta))
+    except Exception:
+        decoded['x-meta'] = meta.hex()
+    return decoded
 
 
 class QueueReader:
@@ -142,6 +167,38 @@ class QueueReader:
         client.disconnect()
         return True
     
+    def _consume_unacked(self, queue_name: str, count: int) -> List[tuple]:
+        """
+        Получить до count сообщений через basic.consume без подтверждения.
+        
+        Брокер отправляет сообщения потоком, без отдельного basic.get (и RTT) на
+        каждое. Чтение завершается, когда набрано count сообщений или доставки не
+        приходят дольше CONSUME_IDLE_TIMEOUT. Подтверждение не выполняется -
+        сообщения возвращаются в очередь при nack или закрытии канала.
+        """
+        deliveries = []
+        # Все сообщения остаются неподтвержденными, поэтому prefetch не должен быть
+        # меньше count; 0 - без ограничения (prefetch_count не больше 65535)
+        self.channel.basic_qos(prefetch_count=count if count <= MAX_PREFETCH_COUNT else 0)
+        consumer_tag = self.channel.basic_consume(
+            queue=queue_name,
+            on_message_callback=lambda channel, method, properties, body: deliveries.append((method, properties, body)),
+            auto_ack=False
+        )
+        
+        idle_deadline = time.monotonic() + CONSUME_IDLE_TIMEOUT
+        while len(deliveries) < count:
+            remaining = idle_deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            received = len(deliveries)
+            self.connection.process_data_events(time_limit=remaining)
+            if len(deliveries) > received:
+                idle_deadline = time.monotonic() + CONSUME_IDLE_TIMEOUT
+        
+        self.channel.basic_cancel(consumer_tag)
+        return deliveries[:count]
+    
     def peek_messages(self, queue_name: str, count: int = 5) -> bool:
         """Просмотр первых N сообщений из очереди (без удаления)"""
         if not self.connect():
@@ -167,52 +224,55 @@ class QueueReader:
             
             # Ограничиваем количество просматриваемых сообщений
             max_to_read = min(count, msg_count)
+            deliveries = self._consume_unacked(queue_name, max_to_read)
             messages_read = 0
-            delivery_tags = []  # Собираем delivery_tag для возврата в конце
             
-            while messages_read < max_to_read:
-                # Получаем сообщение без автоподтверждения
-                method_frame, header_frame, body = self.channel.basic_get(
-                    queue=queue_name, 
-                    auto_ack=False
-                )
-                
-                if method_frame is None:
-                    break  # Нет больше сообщений
-                
+            for method_frame, header_frame, body in deliveries:
                 messages_read += 1
-                delivery_tags.append(method_frame.delivery_tag)
                 
                 # Парсим сообщение
                 try:
-                    message_data = json.loads(body.decode('utf-8'))
-                    formatted_message = json.dumps(message_data, ensure_ascii=False, indent=2)
-                except (json.JSONDecodeError, UnicodeDecodeError):
+                    message_data = orjson.loads(body)
+                    if len(body) <= PREVIEW_MAX_BYTES:
+                        formatted_message = orjson.dumps(message_data, option=orjson.OPT_INDENT_2).decode()
+                    else:
+                        keys = list(message_data) if isinstance(message_data, dict) else type(message_data).__name__
+                        preview = body[:PREVIEW_MAX_BYTES].decode('utf-8', errors='replace')
+                        formatted_message = (
+                            f"[{len(body):,} байт, ключи: {keys}]\n   {preview}... "
+                            f"(полностью: --output)"
+                        )
+                except (orjson.JSONDecodeError, UnicodeDecodeError, TypeError):
                     formatted_message = body.decode('utf-8', errors='replace')
                 
-                # Информация о сообщении
-                print(f"\n📨 СООБЩЕНИЕ #{messages_read}")
-                print(f"├─ Delivery Tag: {method_frame.delivery_tag}")
-                print(f"├─ Exchange: {method_frame.exchange}")
-                print(f"├─ Routing Key: {method_frame.routing_key}")
-                print(f"├─ Redelivered: {'Да' if method_frame.redelivered else 'Нет'}")
+                # Информация о сообщении: блок собирается целиком и выводится одной записью
+                lines = [
+                    f"\n📨 СООБЩЕНИЕ #{messages_read}",
+                    f"├─ Delivery Tag: {method_frame.delivery_tag}",
+                    f"├─ Exchange: {method_frame.exchange}",
+                    f"├─ Routing Key: {method_frame.routing_key}",
+                    f"├─ Redelivered: {'Да' if method_frame.redelivered else 'Нет'}",
+                ]
                 
                 if header_frame:
-                    print(f"├─ Content Type: {header_frame.content_type}")
+                    lines.append(f"├─ Content Type: {header_frame.content_type}")
                     if header_frame.timestamp:
                         timestamp = time.strftime('%Y-%m-%d %H:%M:%S', 
                                                time.localtime(header_frame.timestamp))
-                        print(f"├─ Timestamp: {timestamp}")
+                        lines.append(f"├─ Timestamp: {timestamp}")
                     if header_frame.headers:
-                        print(f"├─ Headers: {header_frame.headers}")
+                        lines.append(f"├─ Headers: {_decode_headers(header_frame.headers)}")
                 
-                print(f"└─ Содержимое:")
-                print(f"   {formatted_message}")
+                lines.append(f"└─ Содержимое:")
+                lines.append(f"   {formatted_message}")
+                sys.stdout.write("\n".join(lines) + "\n")
             
-            # Возвращаем ВСЕ сообщения в очередь в конце
-            for delivery_tag in delivery_tags:
+            # Возвращаем сообщения в очередь одним NACK с multiple=True
+            # по последнему delivery_tag, как при экспорте
+            if deliveries:
                 self.channel.basic_nack(
-                    delivery_tag=delivery_tag, 
+                    delivery_tag=deliveries[-1][0].delivery_tag,
+                    multiple=True,
                     requeue=True
                 )
             
@@ -260,16 +320,11 @@ class QueueReader:
             
             print("🔄 Чтение сообщений...")
             
-            # Читаем не больше сообщений, чем есть в очереди
-            while messages_read < msg_count:
-                method_frame, header_frame, body = self.channel.basic_get(
-                    queue=queue_name, 
-                    auto_ack=False
-                )
-                
-                if method_frame is None:
-                    break  # Нет больше сообщений
-                
+            # Читаем не больше сообщений, чем есть в очереди: одним basic.consume
+            # вместо basic_get на каждое сообщение
+            deliveries = self._consume_unacked(queue_name, msg_count)
+            
+            for method_frame, header_frame, body in deliveries:
                 messages_read += 1
                 delivery_tags.append(method_frame.delivery_tag)
                 
@@ -295,13 +350,13 @@ class QueueReader:
                             '%Y-%m-%d %H:%M:%S', time.localtime(header_frame.timestamp)
                         )
                     if header_frame.headers:
-                        message_info["properties"]["headers"] = header_frame.headers
+                        message_info["properties"]["headers"] = _decode_headers(header_frame.headers)
                 
                 # Пытаемся парсить JSON
                 try:
-                    message_info["body"] = json.loads(body.decode('utf-8'))
+                    message_info["body"] = orjson.loads(body)
                     message_info["body_type"] = "json"
-                except (json.JSONDecodeError, UnicodeDecodeError):
+                except orjson.JSONDecodeError:
                     message_info["body"] = body.decode('utf-8', errors='replace')
                     message_info["body_type"] = "text"
                 
@@ -311,10 +366,12 @@ class QueueReader:
                 if messages_read % 100 == 0:
                     print(f"   Прочитано: {messages_read:,} сообщений...")
             
-            # Возвращаем ВСЕ сообщения в очередь в конце
-            for delivery_tag in delivery_tags:
+            # Возвращаем ВСЕ сообщения в очередь в конце: один NACK с multiple=True
+            # по последнему delivery_tag вместо отдельного NACK на каждое сообщение
+            if delivery_tags:
                 self.channel.basic_nack(
-                    delivery_tag=delivery_tag, 
+                    delivery_tag=delivery_tags[-1],
+                    multiple=True,
                     requeue=True
                 )
             
@@ -357,47 +414,58 @@ class QueueReader:
             print(f"🗑️ ОЧИСТКА ОЧЕРЕДИ: {queue_name}")
             print("=" * 60)
             
-            # Проверяем существование очереди и количество сообщений
-            try:
-                method = self.channel.queue_declare(queue=queue_name, passive=True)
-                msg_count = method.method.message_count
-                print(f"📊 Сообщений в очереди: {msg_count:,}")
-                
-                if msg_count == 0:
-                    print("📭 Очередь уже пуста")
-                    return True
-                    
-            except pika.exceptions.ChannelClosedByBroker:
-                print(f"❌ Очередь '{queue_name}' не существует")
-                return False
-            
-            # Подтверждение удаления
+            # Подтверждение удаления: количество сообщений нужно только для него,
+            # при --force очередь сразу очищается (queue.purge-ok содержит количество
+            # удаленных сообщений, отсутствие очереди брокер сообщает ошибкой 404)
             if not force:
+                try:
+                    method = self.channel.queue_declare(queue=queue_name, passive=True)
+                    msg_count = method.method.message_count
+                    print(f"📊 Сообщений в очереди: {msg_count:,}")
+                    
+                    if msg_count == 0:
+                        print("📭 Очередь уже пуста")
+                        return True
+                        
+                except pika.exceptions.ChannelClosedByBroker:
+                    print(f"❌ Очередь '{queue_name}' не существует")
+                    return False
+                
                 print(f"\n⚠️ ВНИМАНИЕ!")
                 print(f"Вы собираетесь УДАЛИТЬ {msg_count:,} сообщений из очереди '{queue_name}'")
                 print("Это действие НЕОБРАТИМО!")
                 
+                # Без терминала (cron, CI) подтверждение ввести некому: завершение
+                # с ошибкой вместо ожидания input()
+                if not sys.stdin.isatty():
+                    print("❌ Нет интерактивного терминала для подтверждения. Используйте --force")
+                    return False
+                
+                # На время ввода соединение закрывается: BlockingConnection не
+                # обслуживает heartbeat во время input(), и при долгом ожидании
+                # брокер разорвал бы его. Подключение - только после подтверждения
+                self.disconnect()
+                
                 confirmation = input("\nВведите 'YES' для подтверждения: ").strip()
                 
                 if confirmation != 'YES':
                     print("❌ Операция отменена")
                     return False
+                
+                if not self.connect():
+                    return False
             
-            # Очистка очереди
+            # Очистка очереди: один RPC, количество удаленных сообщений - из queue.purge-ok
             print(f"\n🔄 Очистка очереди...")
-            self.channel.queue_purge(queue=queue_name)
-            
-            # Проверяем результат
-            method = self.channel.queue_declare(queue=queue_name, passive=True)
-            remaining_count = method.method.message_count
-            
-            if remaining_count == 0:
-                print(f"✅ Очередь '{queue_name}' успешно очищена")
-                print(f"🗑️ Удалено сообщений: {msg_count:,}")
-                return True
-            else:
-                print(f"⚠️ В очереди осталось {remaining_count:,} сообщений")
+            try:
+                method = self.channel.queue_purge(queue=queue_name)
+            except pika.exceptions.ChannelClosedByBroker:
+                print(f"❌ Очередь '{queue_name}' не существует")
                 return False
+            
+            print(f"✅ Очередь '{queue_name}' успешно очищена")
+            print(f"🗑️ Удалено сообщений: {method.method.message_count:,}")
+            return True
                 
         except Exception as e:
             print(f"❌ Ошибка при очистке очереди: {e}")
@@ -459,9 +527,9 @@ def main():
     )
     
     parser.add_argument(
-        "--force",
+        "--force", "--yes", "-y",
         action="store_true",
-        help="Принудительная очистка без подтверждения"
+        help="Принудительная очистка без подтверждения (для скриптов и CI)"
     )
     
     args = parser.parse_args()
@@ -7,22 +7,19 @@
 
 import argparse
 import json
+import orjson
 import sys
-import urllib3
 import yaml
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 import requests
-from requests.auth import HTTPBasicAuth
 
 # Добавление родительского каталога в sys.path для импорта модулей проекта
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import camunda_config
-
-# Отключение предупреждений SSL для самоподписанных сертификатов
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from camunda_http import camunda_engine_url, make_camunda_session
 
 
 class CamundaProcessStarter:
@@ -30,46 +27,33 @@ class CamundaProcessStarter:
     
     def __init__(self):
         self.base_url = camunda_config.base_url.rstrip('/')
-        # Если base_url уже содержит /engine-rest, не добавляем его еще раз
-        if self.base_url.endswith('/engine-rest'):
-            self.engine_url = self.base_url
-        else:
-            self.engine_url = f"{self.base_url}/engine-rest"
-        self.auth = None
-        
-        if camunda_config.auth_enabled:
-            self.auth = HTTPBasicAuth(
-                camunda_config.auth_username,
-                camunda_config.auth_password
-            )
+        self.engine_url = camunda_engine_url(self.base_url)
+        self.http = make_camunda_session()
+        self.auth = self.http.auth
+    
+    def close(self):
+        """Закрыть HTTP сессию"""
+        self.http.close()
     
     def _make_request(self, method: str, endpoint: str, data: Dict = None, params: Dict = None) -> Optional[Dict]:
         """Выполнить HTTP запрос к Camunda REST API"""
         url = f"{self.engine_url}/{endpoint}"
         
+        method = method.upper()
+        if method not in ('GET', 'POST'):
+            raise ValueError(f"Unsupported HTTP method: {method}")
+        
         try:
-            if method.upper() == 'GET':
-                response = requests.get(
-                    url, 
-                    auth=self.auth,
-                    params=params or {},
-                    verify=False,
-                    timeout=30
-                )
-            elif method.upper() == 'POST':
-                response = requests.post(
-                    url,
-                    auth=self.auth,
-                    json=data or {},
-                    params=params or {},
-                    verify=False,
-                    timeout=30
-                )
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
+            response = self.http.request(
+                method,
+                url,
+                params=params,
+                json=(data or {}) if method == 'POST' else None,
+                timeout=30
+            )
             
             response.raise_for_status()
-            return response.json()
+            return orjson.loads(response.content)
             
         except requests.exceptions.RequestException as e:
             print(f"❌ Ошибка при запросе к {url}: {e}")
@@ -81,6 +65,9 @@ class CamundaProcessStarter:
                     print(f"   HTTP статус: {e.response.status_code}")
                     print(f"   Ответ сервера: {e.response.text[:200]}")
             return None
+        except orjson.JSONDecodeError as e:
+            print(f"❌ Некорректный JSON в ответе {url}: {e}")
+            return None
     
     def get_process_definition_by_key(self, process_key: str) -> Optional[Dict]:
         """Получить определение процесса по ключу"""
@@ -319,6 +306,13 @@ def list_process_versions(service: CamundaProcessStarter, process_key: str):
             print(f"   Тег версии: {definition.get('versionTag')}")
 
 
+def require_terminal():
+    """Без интерактивного терминала подтверждение ввести некому: завершение с ошибкой"""
+    if not sys.stdin.isatty():
+        print("❌ Нет интерактивного терминала для подтверждения. Используйте --yes")
+        sys.exit(1)
+
+
 def main():
     """Главная функция"""
     parser = argparse.ArgumentParser(
@@ -380,11 +374,14 @@ YAML конфигурация:
                        help='Показать все версии процесса')
     parser.add_argument('--dry-run', action='store_true',
                        help='Показать что будет отправлено без фактического запуска')
+    parser.add_argument('--yes', '-y', action='store_true',
+                       help='Не запрашивать подтверждение (для запуска из скриптов)')
     parser.add_argument('--config', '-c',
                        help='Файл конфигурации YAML для запуска процесса')
     
     args = parser.parse_args()
     
+    service = None
     try:
         service = CamundaProcessStarter()
         
@@ -442,10 +439,12 @@ YAML конфигурация:
         # Проверка на приостановленный процесс
         if definition.get('suspended'):
             print(f"\n⚠️  Внимание: Процесс приостановлен. Запуск может не сработать.")
-            response = input("Продолжить? (y/N): ")
-            if response.lower() != 'y':
-                print("Операция отменена")
-                return
+            if not args.yes and not args.dry_run:
+                require_terminal()
+                response = input("Продолжить? (y/N): ")
+                if response.lower() != 'y':
+                    print("Операция отменена")
+                    return
         
         # Парсинг переменных
         variables = {}
@@ -503,7 +502,8 @@ YAML конфигурация:
         
         # Подтверждение запуска
         print(f"\n🚀 Готов к запуску процесса '{args.process_key}'")
-        if not variables and not final_business_key and not args.config:
+        if not variables and not final_business_key and not args.config and not args.yes:
+            require_terminal()
             response = input("Запустить процесс? (Y/n): ")
             if response.lower() == 'n':
                 print("Операция отменена")
@@ -549,6 +549,9 @@ YAML конфигурация:
     except Exception as e:
         print(f"\n❌ Неожиданная ошибка: {e}")
         sys.exit(1)
+    finally:
+        if service is not None:
+            service.close()
 
 
 if __name__ == "__main__":
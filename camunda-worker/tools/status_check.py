@@ -3,7 +3,7 @@
 Утилита для проверки состояния Universal Camunda Worker
 """
 import json
-import requests
+import orjson
 from typing import Dict, Any
 from loguru import logger
 
@@ -14,6 +14,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import camunda_config, rabbitmq_config, routing_config
 from rabbitmq_client import RabbitMQClient
+from camunda_http import camunda_engine_url, make_camunda_session
 
 
 class StatusChecker:
@@ -23,21 +24,19 @@ class StatusChecker:
         self.camunda_config = camunda_config
         self.rabbitmq_config = rabbitmq_config
         self.routing_config = routing_config
+        
+        self.http = make_camunda_session()
+        self.api_url = camunda_engine_url(self.camunda_config.base_url)
     
     def check_camunda_connection(self) -> Dict[str, Any]:
         """Проверка соединения с Camunda"""
         try:
             # Проверяем доступность Camunda Engine REST API
-            # Формируем правильный URL с учетом возможного /engine-rest в base_url
-            base_url = self.camunda_config.base_url.rstrip('/')
-            if base_url.endswith('/engine-rest'):
-                url = f"{base_url}/engine"
-            else:
-                url = f"{base_url}/engine-rest/engine"
-            response = requests.get(url, timeout=10)
+            url = f"{self.api_url}/engine"
+            response = self.http.get(url, timeout=10)
             
             if response.status_code == 200:
-                engines = response.json()
+                engines = orjson.loads(response.content)
                 return {
                     "status": "connected",
                     "engines": engines,
@@ -90,15 +89,11 @@ class StatusChecker:
     def get_external_tasks_count(self) -> Dict[str, Any]:
         """Получение количества External Tasks в Camunda"""
         try:
-            base_url = self.camunda_config.base_url.rstrip('/')
-            if base_url.endswith('/engine-rest'):
-                url = f"{base_url}/external-task/count"
-            else:
-                url = f"{base_url}/engine-rest/external-task/count"
-            response = requests.get(url, timeout=10)
+            url = f"{self.api_url}/external-task/count"
+            response = self.http.get(url, timeout=10)
             
             if response.status_code == 200:
-                count_data = response.json()
+                count_data = orjson.loads(response.content)
                 return {
                     "status": "success",
                     "count": count_data.get("count", 0)
@@ -118,16 +113,12 @@ class StatusChecker:
     def get_external_tasks_list(self, max_results: int = 10) -> Dict[str, Any]:
         """Получение списка External Tasks"""
         try:
-            base_url = self.camunda_config.base_url.rstrip('/')
-            if base_url.endswith('/engine-rest'):
-                url = f"{base_url}/external-task"
-            else:
-                url = f"{base_url}/engine-rest/external-task"
+            url = f"{self.api_url}/external-task"
             params = {"maxResults": max_results}
-            response = requests.get(url, params=params, timeout=10)
+            response = self.http.get(url, params=params, timeout=10)
             
             if response.status_code == 200:
-                tasks = response.json()
+                tasks = orjson.loads(response.content)
                 return {
                     "status": "success",
                     "tasks": tasks,
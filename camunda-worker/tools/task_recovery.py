@@ -2,32 +2,30 @@
 """
 Утилита для восстановления зависших External Tasks
 """
-import requests
 import time
 import sys
 import os
-import json
+import orjson
 import pika
-from requests.auth import HTTPBasicAuth
 
 # Добавляем путь к модулям
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import camunda_config, rabbitmq_config
+from camunda_http import camunda_engine_url, make_camunda_session
 from loguru import logger
 
+# Очереди, наличие сообщения задачи в которых означает, что задача в обработке:
+# отправлена в систему (bitrix24.queue) или обработана (bitrix24.sent.queue)
+DELIVERY_QUEUES = ("bitrix24.queue", "bitrix24.sent.queue")
+
 
 class TaskRecovery:
     """Класс для восстановления зависших задач"""
     
     def __init__(self):
-        self.base_url = camunda_config.base_url.rstrip('/')
-        if not self.base_url.endswith('/engine-rest'):
-            self.base_url = f"{self.base_url}/engine-rest"
-        
-        self.auth = None
-        if camunda_config.auth_enabled:
-            self.auth = HTTPBasicAuth(camunda_config.auth_username, camunda_config.auth_password)
+        self.base_url = camunda_engine_url()
+        self.http = make_camunda_session()
         
         # RabbitMQ соединение
         self.rabbitmq_connection = None
@@ -74,6 +72,25 @@ class TaskRecovery:
             self.rabbitmq_connection = None
             self.rabbitmq_channel = None
     
+    def _get_channel(self):
+        """
+        Канал RabbitMQ для проверок очередей.
+        
+        Соединение открывается один раз на весь запуск. Канал, закрытый брокером
+        (например, passive declare отсутствующей очереди), открывается заново на
+        том же соединении - иначе все последующие проверки молча завершались бы ошибкой.
+        """
+        try:
+            if self.rabbitmq_connection is None or self.rabbitmq_connection.is_closed:
+                if not self.connect_rabbitmq():
+                    return None
+            elif self.rabbitmq_channel is None or self.rabbitmq_channel.is_closed:
+                self.rabbitmq_channel = self.rabbitmq_connection.channel()
+            return self.rabbitmq_channel
+        except Exception as e:
+            logger.error(f"Ошибка открытия канала RabbitMQ: {e}")
+            return None
+    
     def check_message_in_queue(self, queue_name: str, external_task_id: str) -> bool:
         """
         Проверяет наличие сообщения с указанным External Task ID в очереди
@@ -86,13 +103,13 @@ class TaskRecovery:
             True если сообщение найдено, False иначе
         """
         try:
-            if not self.rabbitmq_channel:
-                if not self.connect_rabbitmq():
-                    return False
+            channel = self._get_channel()
+            if channel is None:
+                return False
             
             # Получаем информацию об очереди
             try:
-                method = self.rabbitmq_channel.queue_declare(queue=queue_name, passive=True)
+                method = channel.queue_declare(queue=queue_name, passive=True)
                 message_count = method.method.message_count
             except Exception:
                 # Очередь не существует
@@ -105,34 +122,33 @@ class TaskRecovery:
             
             logger.debug(f"Проверяем {message_count} сообщений в очереди {queue_name} на наличие External Task ID {external_task_id}")
             
-            # Получаем все сообщения из очереди (без ACK)
-            found_messages = []
+            # Получаем сообщения из очереди (без ACK). Сообщения удерживаются
+            # неподтвержденными до конца просмотра: возвращенное по одному сообщение
+            # снова оказывается в голове очереди и basic_get получал бы его повторно
+            found = False
+            last_tag = None
             for _ in range(message_count):
-                method_frame, header_frame, body = self.rabbitmq_channel.basic_get(queue=queue_name, auto_ack=False)
+                method_frame, header_frame, body = channel.basic_get(queue=queue_name, auto_ack=False)
                 if method_frame is None:
                     break
+                last_tag = method_frame.delivery_tag
                 
                 try:
-                    message_data = json.loads(body.decode('utf-8'))
-                    message_task_id = message_data.get('task_id')
-                    
-                    if message_task_id == external_task_id:
-                        logger.debug(f"Найдено сообщение с External Task ID {external_task_id} в очереди {queue_name}")
-                        found_messages.append((method_frame.delivery_tag, message_data))
-                    else:
-                        # Возвращаем сообщение в очередь (NACK с requeue=True)
-                        self.rabbitmq_channel.basic_nack(delivery_tag=method_frame.delivery_tag, requeue=True)
-                        
-                except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                    message_data = orjson.loads(body)
+                except orjson.JSONDecodeError as e:
                     logger.warning(f"Ошибка парсинга сообщения из очереди {queue_name}: {e}")
-                    # Возвращаем некорректное сообщение в очередь
-                    self.rabbitmq_channel.basic_nack(delivery_tag=method_frame.delivery_tag, requeue=True)
+                    continue
+                
+                if isinstance(message_data, dict) and message_data.get('task_id') == external_task_id:
+                    logger.debug(f"Найдено сообщение с External Task ID {external_task_id} в очереди {queue_name}")
+                    found = True
+                    break
             
-            # Возвращаем найденные сообщения в очередь
-            for delivery_tag, message_data in found_messages:
-                self.rabbitmq_channel.basic_nack(delivery_tag=delivery_tag, requeue=True)
+            # Возвращаем все полученные сообщения в очередь одним NACK (multiple=True, requeue=True)
+            if last_tag is not None:
+                channel.basic_nack(delivery_tag=last_tag, multiple=True, requeue=True)
             
-            return len(found_messages) > 0
+            return found
             
         except Exception as e:
             logger.error(f"Ошибка проверки очереди {queue_name}: {e}")
@@ -156,21 +172,16 @@ class TaskRecovery:
             True если задача зависшая, False если не зависшая, None при ошибке подключения к RabbitMQ
         """
         try:
-            # Подключаемся к RabbitMQ если нужно
-            if not self.rabbitmq_channel:
-                if not self.connect_rabbitmq():
-                    logger.error("Не удалось подключиться к RabbitMQ для проверки зависших задач")
-                    return None  # Возвращаем None при ошибке подключения
-            
-            # Проверяем наличие сообщения в bitrix24.queue
-            if self.check_message_in_queue("bitrix24.queue", task_id):
-                logger.debug(f"Задача {task_id} найдена в bitrix24.queue - не зависшая")
-                return False
+            # Подключаемся к RabbitMQ если нужно (соединение общее для всех проверок)
+            if self._get_channel() is None:
+                logger.error("Не удалось подключиться к RabbitMQ для проверки зависших задач")
+                return None  # Возвращаем None при ошибке подключения
             
-            # Проверяем наличие сообщения в bitrix24.sent.queue
-            if self.check_message_in_queue("bitrix24.sent.queue", task_id):
-                logger.debug(f"Задача {task_id} найдена в bitrix24.sent.queue - не зависшая")
-                return False
+            # Проверяем наличие сообщения в очередях доставки
+            for queue_name in DELIVERY_QUEUES:
+                if self.check_message_in_queue(queue_name, task_id):
+                    logger.debug(f"Задача {task_id} найдена в {queue_name} - не зависшая")
+                    return False
             
             # Если сообщений нет в обеих очередях - задача может быть зависшей
             logger.debug(f"Задача {task_id} не найдена в RabbitMQ очередях - возможно зависшая")
@@ -184,14 +195,12 @@ class TaskRecovery:
         """Получить список заблокированных задач"""
         try:
             url = f"{self.base_url}/external-task"
-            params = {}
-            if worker_id:
-                params['workerId'] = worker_id
+            params = {'workerId': worker_id} if worker_id else None
             
-            response = requests.get(url, auth=self.auth, params=params, verify=False, timeout=10)
+            response = self.http.get(url, params=params, timeout=10)
             
             if response.status_code == 200:
-                tasks = response.json()
+                tasks = orjson.loads(response.content)
                 locked_tasks = [task for task in tasks if task.get('workerId') is not None]
                 return locked_tasks
             else:
@@ -206,7 +215,7 @@ class TaskRecovery:
         """Разблокировать задачу"""
         try:
             url = f"{self.base_url}/external-task/{task_id}/unlock"
-            response = requests.post(url, auth=self.auth, verify=False, timeout=10)
+            response = self.http.post(url, timeout=10)
             
             if response.status_code == 204:
                 logger.info(f"✅ Задача {task_id} успешно разблокирована")
@@ -231,7 +240,7 @@ class TaskRecovery:
                 "retryTimeout": 0
             }
             
-            response = requests.post(url, auth=self.auth, json=payload, verify=False, timeout=10)
+            response = self.http.post(url, json=payload, timeout=10)
             
             if response.status_code == 204:
                 logger.info(f"✅ Задача {task_id} помечена как неудачная")
@@ -363,8 +372,9 @@ def main():
         logger.error(f"Критическая ошибка при восстановлении задач: {e}")
         print(f"\n❌ Критическая ошибка: {e}")
     finally:
-        # Закрываем соединение с RabbitMQ
+        # Закрываем соединения с RabbitMQ и Camunda
         recovery.disconnect_rabbitmq()
+        recovery.http.close()
 
 
 if __name__ == "__main__":
@@ -2,8 +2,10 @@
 """
 Скрипт для разблокировки заблокированных External Tasks
 """
-import requests
-from requests.auth import HTTPBasicAuth
+import asyncio
+import atexit
+import aiohttp
+import orjson
 
 # Добавление родительского каталога в sys.path для импорта модулей проекта
 import os
@@ -11,74 +13,96 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import camunda_config
+from camunda_http import camunda_engine_url, make_camunda_session
 
-def unlock_task(task_id):
-    """Разблокировать конкретную задачу"""
-    print(f"🔓 Разблокировка задачи: {task_id}")
-    
-    # URL для разблокировки - правильное формирование с учетом /engine-rest
-    base_url = camunda_config.base_url.rstrip('/')
-    if base_url.endswith('/engine-rest'):
-        unlock_url = f"{base_url}/external-task/{task_id}/unlock"
-    else:
-        unlock_url = f"{base_url}/engine-rest/external-task/{task_id}/unlock"
-    
-    # Аутентификация
-    auth = None
-    if camunda_config.auth_enabled:
-        auth = HTTPBasicAuth(camunda_config.auth_username, camunda_config.auth_password)
-    
+# Общая HTTP сессия скрипта
+_session = make_camunda_session()
+atexit.register(_session.close)
+
+# Учетные данные для aiohttp сессии (вычисляются один раз при импорте)
+_AIOHTTP_AUTH = (
+    aiohttp.BasicAuth(camunda_config.auth_username, camunda_config.auth_password)
+    if camunda_config.auth_enabled else None
+)
+
+# Базовый URL REST API (вычисляется один раз)
+API_URL = camunda_engine_url()
+EXTERNAL_TASK_URL = f"{API_URL}/external-task"
+
+# Число одновременных запросов разблокировки
+UNLOCK_CONCURRENCY = 50
+
+def _unlock_url(task_id):
+    """URL разблокировки задачи"""
+    return f"{EXTERNAL_TASK_URL}/{task_id}/unlock"
+
+def _post_unlock(task_id):
+    """Запрос разблокировки: (HTTP статус, тело ответа, исключение)"""
     try:
-        print(f"🌐 URL: {unlock_url}")
-        
-        response = requests.post(unlock_url, auth=auth, verify=False, timeout=10)
-        
-        if response.status_code == 204:
-            print(f"✅ Задача {task_id} успешно разблокирована!")
-            return True
-        else:
-            print(f"❌ Ошибка разблокировки: HTTP {response.status_code}")
-            print(f"📄 Ответ: {response.text}")
-            return False
-            
+        response = _session.post(_unlock_url(task_id), timeout=10)
+        return response.status_code, response.text, None
     except Exception as e:
-        print(f"❌ Ошибка разблокировки: {e}")
+        return None, None, e
+
+async def _post_unlock_async(http, limit, task_id):
+    """Асинхронный запрос разблокировки: (HTTP статус, тело ответа, исключение)"""
+    # Таймаут запроса отсчитывается после получения слота, а не во время ожидания очереди
+    async with limit:
+        try:
+            async with http.post(_unlock_url(task_id)) as response:
+                return response.status, await response.text(), None
+        except Exception as e:
+            return None, None, e
+
+async def _unlock_many(task_ids):
+    """Разблокировка задач конкурентными запросами через одну aiohttp сессию"""
+    limit = asyncio.Semaphore(UNLOCK_CONCURRENCY)
+    async with aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=UNLOCK_CONCURRENCY, ssl=False),
+        timeout=aiohttp.ClientTimeout(total=10),
+        auth=_AIOHTTP_AUTH
+    ) as http:
+        return await asyncio.gather(*(_post_unlock_async(http, limit, task_id) for task_id in task_ids))
+
+def _report_unlock(task_id, status, text, error):
+    """Вывод результата разблокировки"""
+    if error is not None:
+        print(f"❌ Ошибка разблокировки: {error}")
         return False
+    if status == 204:
+        print(f"✅ Задача {task_id} успешно разблокирована!")
+        return True
+    print(f"❌ Ошибка разблокировки: HTTP {status}")
+    print(f"📄 Ответ: {text}")
+    return False
+
+def unlock_task(task_id):
+    """Разблокировать конкретную задачу"""
+    print(f"🔓 Разблокировка задачи: {task_id}")
+    print(f"🌐 URL: {_unlock_url(task_id)}")
+    return _report_unlock(task_id, *_post_unlock(task_id))
 
 def get_locked_tasks():
     """Получить список заблокированных задач"""
     print("🔍 Поиск заблокированных задач...")
     
-    base_url = camunda_config.base_url.rstrip('/')
-    if base_url.endswith('/engine-rest'):
-        tasks_url = f"{base_url}/external-task"
-    else:
-        tasks_url = f"{base_url}/engine-rest/external-task"
-    
-    auth = None
-    if camunda_config.auth_enabled:
-        auth = HTTPBasicAuth(camunda_config.auth_username, camunda_config.auth_password)
-    
     try:
-        response = requests.get(tasks_url, auth=auth, verify=False, timeout=10)
-        
-        if response.status_code == 200:
-            tasks = response.json()
-            locked_tasks = [task for task in tasks if task.get('workerId') is not None]
-            
-            print(f"📋 Найдено заблокированных задач: {len(locked_tasks)}")
-            
-            for i, task in enumerate(locked_tasks, 1):
-                print(f"\n🎯 Задача {i}:")
-                print(f"   ID: {task.get('id')}")
-                print(f"   Topic: {task.get('topicName')}")
-                print(f"   Worker ID: {task.get('workerId')}")
-                print(f"   Lock Expiration: {task.get('lockExpirationTime')}")
-                
-            return locked_tasks
-        else:
+        # Фильтрация на стороне Camunda: передаются только заблокированные задачи
+        response = _session.get(EXTERNAL_TASK_URL, params={"locked": "true"}, timeout=10)
+        if response.status_code != 200:
             print(f"❌ Ошибка получения задач: HTTP {response.status_code}")
             return []
+        
+        locked_tasks = orjson.loads(response.content)
+        for i, task in enumerate(locked_tasks, 1):
+            print(f"\n🎯 Задача {i}:")
+            print(f"   ID: {task.get('id')}")
+            print(f"   Topic: {task.get('topicName')}")
+            print(f"   Worker ID: {task.get('workerId')}")
+            print(f"   Lock Expiration: {task.get('lockExpirationTime')}")
+        
+        print(f"\n📋 Найдено заблокированных задач: {len(locked_tasks)}")
+        return locked_tasks
             
     except Exception as e:
         print(f"❌ Ошибка: {e}")
@@ -93,7 +117,11 @@ def unlock_all_test_tasks():
     
     unlocked_count = 0
     
-    for task in locked_tasks:
+    # Запросы разблокировки независимы: выполняются конкурентно,
+    # результаты выводятся в исходном порядке задач
+    results = asyncio.run(_unlock_many([task.get('id') for task in locked_tasks])) if locked_tasks else []
+    
+    for task, (status, text, error) in zip(locked_tasks, results):
         worker_id = task.get('workerId', '')
         task_id = task.get('id')
         
@@ -102,8 +130,9 @@ def unlock_all_test_tasks():
         print(f"   Task ID: {task_id}")
         print(f"   Worker ID: {worker_id}")
         print(f"   Topic: {task.get('topicName')}")
+        print(f"🔓 Разблокировка задачи: {task_id}")
         
-        if unlock_task(task_id):
+        if _report_unlock(task_id, status, text, error):
             unlocked_count += 1
     
     print(f"\n📊 Результат: разблокировано {unlocked_count} тестовых задач")
@@ -43,7 +43,9 @@ def setup_logging():
         colorize=True
     )
     
-    # Файловый вывод с оптимизированной ротацией - путь зависит от среды
+    # Файловый вывод с оптимизированной ротацией - путь зависит от среды.
+    # enqueue=True: запись на диск выполняется фоновым потоком loguru,
+    # потоки потребителей и публикации не блокируются на файловом I/O
     logger.add(
         get_log_path("task-creator.log"),
         format=log_format,
@@ -51,7 +53,10 @@ def setup_logging():
         rotation="20 MB",  # Уменьшено с 100MB для более частой ротации
         retention="14 days",  # Уменьшено с 30 дней
         compression="zip",
-        encoding="utf-8"
+        encoding="utf-8",
+        enqueue=True,
+        backtrace=False,
+        diagnose=False
     )
     
     # Файл ошибок - путь зависит от среды
@@ -62,7 +67,10 @@ def setup_logging():
         rotation="20 MB",
         retention="14 days",
         compression="zip",
-        encoding="utf-8"
+        encoding="utf-8",
+        enqueue=True,
+        backtrace=False,
+        diagnose=False
     )
 
 
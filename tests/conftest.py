@@ -10,6 +10,8 @@ import pytest
 
 # Добавляем корень проекта в sys.path
 sys.path.insert(0, "/opt/exchanger.py")
+# Модули camunda-worker импортируют друг друга по короткому имени (from config import ...)
+sys.path.insert(1, "/opt/exchanger.py/camunda-worker")
 
 
 def _import_module_from_path(module_name: str, file_path: str):
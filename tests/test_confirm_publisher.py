@@ -0,0 +1,130 @@
+"""
+Тесты очереди публикации издателя с подтверждениями
+Файл: camunda-worker/confirm_publisher.py (ConfirmPublisher.publish, _drain_outbox)
+"""
+import pytest
+
+from confirm_publisher import ConfirmPublisher
+
+
+class FakeIOLoop:
+    """IO loop, накапливающий callbacks без выполнения"""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def add_callback_threadsafe(self, callback):
+        self.callbacks.append(callback)
+
+    def run_callbacks(self):
+        callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback()
+
+
+class FakeConnection:
+    def __init__(self):
+        self.ioloop = FakeIOLoop()
+        self.is_open = True
+
+
+class FakeChannel:
+    """Канал, записывающий опубликованные сообщения"""
+
+    def __init__(self):
+        self.is_open = True
+        self.published = []
+
+    def basic_publish(self, exchange, routing_key, body, properties):
+        self.published.append((exchange, routing_key, body))
+
+
+def connect(publisher):
+    """Подключение издателя: новое соединение и подтверждение канала, как в потоке IO loop"""
+    connection = FakeConnection()
+    publisher._connection = connection
+    channel = FakeChannel()
+    slot = publisher._channels[0]
+    slot.channel = channel
+    publisher._on_confirm_ok(slot, None)
+    return connection, channel
+
+
+def disconnect(publisher):
+    """Потеря соединения: то же, что finally в _run"""
+    publisher._ready.clear()
+    for slot in publisher._channels:
+        slot.channel = None
+        slot.ready = False
+    publisher._fail_outbox("Соединение издателя закрыто")
+
+
+@pytest.fixture
+def publisher():
+    return ConfirmPublisher(parameters=None, channel_count=1, queue_size=10, put_timeout=0.1)
+
+
+# =========================================================================
+# Пробуждение IO loop
+# =========================================================================
+
+
+class TestWakeup:
+    def test_one_wakeup_per_batch(self, publisher):
+        connection, channel = connect(publisher)
+        for i in range(3):
+            publisher.publish("ex", "key", f"m{i}".encode(), None)
+        assert len(connection.ioloop.callbacks) == 1
+
+        connection.ioloop.run_callbacks()
+        assert [body for _ex, _key, body in channel.published] == [b"m0", b"m1", b"m2"]
+        assert publisher.queue_size() == 0
+
+    def test_not_connected(self, publisher):
+        future = publisher.publish("ex", "key", b"m", None)
+        assert isinstance(future.exception(), ConnectionError)
+
+
+# =========================================================================
+# Переподключение
+# =========================================================================
+
+
+class TestReconnect:
+    def test_publish_racing_disconnect_is_drained_after_reconnect(self, publisher):
+        old_connection, _old_channel = connect(publisher)
+
+        # Поток публикации прошел проверку _ready, после чего поток IO loop
+        # закрыл соединение до того, как сообщение попало в очередь
+        put = publisher._outbox.put
+
+        def put_after_disconnect(item, timeout=None):
+            disconnect(publisher)
+            publisher._outbox.put = put
+            put(item, timeout=timeout)
+
+        publisher._outbox.put = put_after_disconnect
+        raced = publisher.publish("ex", "key", b"raced", None)
+        # Пробуждение запланировано на IO loop закрытого соединения и не выполнится
+        assert len(old_connection.ioloop.callbacks) == 1
+        assert publisher._wakeup_scheduled
+        assert not raced.done()
+
+        connection, channel = connect(publisher)
+        assert channel.published == [("ex", "key", b"raced")]
+        assert publisher.queue_size() == 0
+        assert not publisher._wakeup_scheduled
+
+        # Следующие публикации будят IO loop нового соединения
+        publisher.publish("ex", "key", b"next", None)
+        assert len(connection.ioloop.callbacks) == 1
+        connection.ioloop.run_callbacks()
+        assert channel.published[-1] == ("ex", "key", b"next")
+
+    def test_disconnect_fails_queued_messages(self, publisher):
+        connect(publisher)
+        future = publisher.publish("ex", "key", b"m", None)
+        disconnect(publisher)
+        assert isinstance(future.exception(), ConnectionError)
+        assert publisher.queue_size() == 0
+        assert not publisher._wakeup_scheduled
@@ -0,0 +1,261 @@
+"""
+Тесты пакетного подтверждения сообщений потребителем очереди ответов
+Файл: camunda-worker/response_consumer.py (ResponseConsumer._settle, _flush_acks)
+"""
+import pytest
+
+from response_consumer import ResponseConsumer
+
+
+class FakeIOLoop:
+    """IO loop с ручным запуском таймеров"""
+
+    def __init__(self):
+        self.timers = []
+
+    def call_later(self, delay, callback):
+        timer = (delay, callback)
+        self.timers.append(timer)
+        return timer
+
+    def remove_timeout(self, timer):
+        self.timers.remove(timer)
+
+    def fire_timers(self):
+        timers, self.timers = self.timers, []
+        for _delay, callback in timers:
+            callback()
+
+
+class FakeConnection:
+    def __init__(self):
+        self.ioloop = FakeIOLoop()
+        self.is_open = True
+        self.is_closed = False
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+        self.is_open = False
+
+
+class FakeChannel:
+    """Канал, записывающий вызовы ACK/NACK"""
+
+    def __init__(self):
+        self.is_open = True
+        self.calls = []
+
+    def basic_ack(self, delivery_tag, multiple=False):
+        self.calls.append(("ack", delivery_tag, multiple))
+
+    def basic_nack(self, delivery_tag, requeue=True):
+        self.calls.append(("nack", delivery_tag, requeue))
+
+    def add_on_close_callback(self, callback):
+        pass
+
+    def basic_qos(self, prefetch_count, callback):
+        pass
+
+
+@pytest.fixture
+def consumer():
+    consumer = ResponseConsumer(
+        parameters=None, queue_name="responses", submit=None,
+        prefetch_count=100, ack_batch_size=3, ack_interval=0.2
+    )
+    consumer._connection = FakeConnection()
+    consumer._on_channel_open(FakeChannel())
+    return consumer
+
+
+def deliver(consumer, *tags):
+    """Регистрация доставок так же, как это делает _on_message"""
+    for tag in tags:
+        consumer._unsettled[tag] = False
+
+
+def settle(consumer, tag, ack):
+    consumer._settle(consumer._channel, tag, ack)
+
+
+# =========================================================================
+# Пакетный ACK
+# =========================================================================
+
+
+class TestBatchAck:
+    def test_in_order_batch(self, consumer):
+        deliver(consumer, 1, 2, 3)
+        settle(consumer, 1, True)
+        settle(consumer, 2, True)
+        assert consumer._channel.calls == []
+        settle(consumer, 3, True)
+        assert consumer._channel.calls == [("ack", 3, True)]
+        assert not consumer._unsettled
+        assert consumer._acks_ready == 0
+
+    def test_incomplete_batch_flushed_by_timer(self, consumer):
+        deliver(consumer, 1, 2)
+        settle(consumer, 1, True)
+        settle(consumer, 2, True)
+        assert consumer._channel.calls == []
+        assert len(consumer._connection.ioloop.timers) == 1
+
+        consumer._connection.ioloop.fire_timers()
+        assert consumer._channel.calls == [("ack", 2, True)]
+        assert consumer._ack_timer is None
+
+    def test_out_of_order_completion(self, consumer):
+        deliver(consumer, 1, 2, 3, 4)
+        settle(consumer, 4, True)
+        settle(consumer, 3, True)
+        settle(consumer, 2, True)
+        # Пачка набрана, но доставка 1 еще обрабатывается
+        assert consumer._channel.calls == []
+        assert list(consumer._unsettled) == [1, 2, 3, 4]
+
+        settle(consumer, 1, True)
+        assert consumer._channel.calls == [("ack", 4, True)]
+        assert consumer._acks_ready == 0
+
+    def test_prefix_stops_at_pending_delivery(self, consumer):
+        deliver(consumer, 1, 2, 3, 4)
+        settle(consumer, 1, True)
+        settle(consumer, 2, True)
+        settle(consumer, 4, True)
+        assert consumer._channel.calls == [("ack", 2, True)]
+        assert list(consumer._unsettled) == [3, 4]
+        assert consumer._acks_ready == 1
+
+    def test_unknown_tag_ignored(self, consumer):
+        deliver(consumer, 1)
+        settle(consumer, 7, True)
+        assert consumer._acks_ready == 0
+        assert list(consumer._unsettled) == [1]
+
+
+# =========================================================================
+# NACK
+# =========================================================================
+
+
+class TestNack:
+    def test_nack_requeue(self, consumer):
+        deliver(consumer, 1)
+        settle(consumer, 1, False)
+        assert consumer._channel.calls == [("nack", 1, True)]
+        assert not consumer._unsettled
+
+    def test_nack_without_requeue(self, consumer):
+        deliver(consumer, 1)
+        settle(consumer, 1, None)
+        assert consumer._channel.calls == [("nack", 1, False)]
+
+    def test_nack_in_middle_of_prefix(self, consumer):
+        deliver(consumer, 1, 2, 3)
+        settle(consumer, 1, True)
+        settle(consumer, 2, False)
+        settle(consumer, 3, True)
+        assert consumer._channel.calls == [("nack", 2, True)]
+
+        consumer._connection.ioloop.fire_timers()
+        # ACK multiple=True не затрагивает доставку 2: она уже отклонена
+        assert consumer._channel.calls == [("nack", 2, True), ("ack", 3, True)]
+        assert not consumer._unsettled
+
+    def test_nack_at_head_releases_prefix(self, consumer):
+        deliver(consumer, 1, 2, 3)
+        settle(consumer, 2, True)
+        settle(consumer, 3, True)
+        settle(consumer, 1, False)
+        assert consumer._channel.calls == [("nack", 1, True)]
+        assert len(consumer._connection.ioloop.timers) == 1
+
+        consumer._connection.ioloop.fire_timers()
+        assert consumer._channel.calls[-1] == ("ack", 3, True)
+
+
+# =========================================================================
+# Переоткрытие канала и закрытие соединения
+# =========================================================================
+
+
+class TestChannelLifecycle:
+    def test_reopen_resets_acks(self, consumer):
+        old_channel = consumer._channel
+        deliver(consumer, 1, 2)
+        settle(consumer, 1, True)
+        assert len(consumer._connection.ioloop.timers) == 1
+
+        new_channel = FakeChannel()
+        consumer._on_channel_open(new_channel)
+        assert not consumer._unsettled
+        assert consumer._acks_ready == 0
+        assert consumer._ack_timer is None
+        assert consumer._connection.ioloop.timers == []
+
+        # Завершение обработки доставки старого канала игнорируется
+        consumer._settle(old_channel, 2, True)
+        consumer._settle(old_channel, 2, False)
+        assert old_channel.calls == []
+        assert new_channel.calls == []
+
+        # Нумерация delivery_tag на новом канале начинается заново
+        deliver(consumer, 1, 2, 3)
+        for tag in (1, 2, 3):
+            settle(consumer, tag, True)
+        assert new_channel.calls == [("ack", 3, True)]
+
+    def test_closed_channel_ignored(self, consumer):
+        deliver(consumer, 1)
+        consumer._channel.is_open = False
+        settle(consumer, 1, True)
+        assert consumer._channel.calls == []
+
+    def test_flush_on_close(self, consumer):
+        channel = consumer._channel
+        connection = consumer._connection
+        deliver(consumer, 1, 2, 3)
+        settle(consumer, 1, True)
+        settle(consumer, 2, True)
+
+        consumer._close_connection()
+        assert channel.calls == [("ack", 2, True)]
+        assert connection.closed
+        assert list(consumer._unsettled) == [3]
+
+    def test_close_without_ready_acks(self, consumer):
+        deliver(consumer, 1)
+        consumer._close_connection()
+        assert consumer._channel.calls == []
+        assert consumer._connection.closed
+
+
+# =========================================================================
+# Размер пачки
+# =========================================================================
+
+
+class TestBatchSize:
+    def test_batch_limited_by_prefetch(self):
+        consumer = ResponseConsumer(
+            parameters=None, queue_name="responses", submit=None,
+            prefetch_count=5, ack_batch_size=50
+        )
+        assert consumer.ack_batch_size == 5
+
+    def test_batch_at_least_one(self):
+        consumer = ResponseConsumer(
+            parameters=None, queue_name="responses", submit=None, ack_batch_size=0
+        )
+        assert consumer.ack_batch_size == 1
+
+    def test_batch_size_one_acks_immediately(self):
+        consumer = ResponseConsumer(parameters=None, queue_name="responses", submit=None)
+        consumer._connection = FakeConnection()
+        consumer._on_channel_open(FakeChannel())
+        deliver(consumer, 1)
+        settle(consumer, 1, True)
+        assert consumer._channel.calls == [("ack", 1, True)]
@@ -0,0 +1,117 @@
+"""
+Тесты форматирования переменных ответа для Camunda API
+Файл: camunda-worker/response_handler.py (_format_variables, _compile_formatter)
+"""
+import orjson
+import pytest
+
+from response_handler import TaskResponseHandler, _compile_formatter
+
+
+def format_variables(variables):
+    """_format_variables не использует состояние обработчика"""
+    return TaskResponseHandler._format_variables(None, variables)
+
+
+def expected(variables):
+    """Эталон: выбор типа по таблице для каждого значения"""
+    types = {str: "String", bool: "Boolean", int: "Integer", float: "Double"}
+    result = {}
+    for key, value in variables.items():
+        camunda_type = types.get(type(value))
+        if camunda_type is None:
+            result[key] = {"value": orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode(), "type": "Json"}
+        else:
+            result[key] = {"value": value, "type": camunda_type}
+    return result
+
+
+# =========================================================================
+# Типы значений
+# =========================================================================
+
+
+class TestValueTypes:
+    def test_string(self):
+        assert format_variables({"name": "Задача"}) == {"name": {"value": "Задача", "type": "String"}}
+
+    def test_bool_is_not_integer(self):
+        assert format_variables({"flag": True}) == {"flag": {"value": True, "type": "Boolean"}}
+
+    def test_integer(self):
+        assert format_variables({"count": 42}) == {"count": {"value": 42, "type": "Integer"}}
+
+    def test_float(self):
+        assert format_variables({"amount": 1.5}) == {"amount": {"value": 1.5, "type": "Double"}}
+
+    def test_none_is_json_null(self):
+        assert format_variables({"empty": None}) == {"empty": {"value": "null", "type": "Json"}}
+
+    def test_nested_is_json(self):
+        result = format_variables({"data": {"items": [1, 2], "ok": True}})
+        assert result == {"data": {"value": '{"items":[1,2],"ok":true}', "type": "Json"}}
+
+    def test_list_is_json(self):
+        assert format_variables({"ids": [1, "a"]}) == {"ids": {"value": '[1,"a"]', "type": "Json"}}
+
+    def test_empty(self):
+        assert format_variables({}) == {}
+
+    def test_mixed_matches_reference(self):
+        variables = {"s": "x", "b": False, "i": 0, "f": -0.25, "n": None, "d": {"k": [None]}, "l": []}
+        assert format_variables(variables) == expected(variables)
+
+
+# =========================================================================
+# Имена переменных в сгенерированном коде
+# =========================================================================
+
+
+class TestKeys:
+    @pytest.mark.parametrize("key", ['a"b', "it's", "back\\slash", "line\nbreak", "'''", '"""', "{}", "ключ"])
+    def test_special_characters(self, key):
+        variables = {key: "value", "other": 1}
+        assert format_variables(variables) == expected(variables)
+
+    def test_order_preserved(self):
+        variables = {"z": 1, "a": 2, "m": 3}
+        assert list(format_variables(variables)) == ["z", "a", "m"]
+
+
+# =========================================================================
+# Уже сериализованный JSON ({"__json__": ...})
+# =========================================================================
+
+
+class TestPreserializedJson:
+    def test_passthrough(self):
+        raw = '{"x": 1, "y": [true]}'
+        assert format_variables({"payload": {"__json__": raw}}) == {"payload": {"value": raw, "type": "Json"}}
+
+    def test_non_string_is_serialized(self):
+        result = format_variables({"payload": {"__json__": 5}})
+        assert result == {"payload": {"value": '{"__json__":5}', "type": "Json"}}
+
+    def test_extra_keys_are_serialized(self):
+        result = format_variables({"payload": {"__json__": "[]", "other": 1}})
+        assert result == {"payload": {"value": '{"__json__":"[]","other":1}', "type": "Json"}}
+
+
+# =========================================================================
+# Кэш функций форматирования по схеме
+# =========================================================================
+
+
+class TestFormatterCache:
+    def test_same_schema_reuses_formatter(self):
+        first = _compile_formatter((("cache_key", int),))
+        assert _compile_formatter((("cache_key", int),)) is first
+
+    def test_same_keys_different_types(self):
+        assert format_variables({"v": 1}) == {"v": {"value": 1, "type": "Integer"}}
+        assert format_variables({"v": "1"}) == {"v": {"value": "1", "type": "String"}}
+        assert format_variables({"v": [1]}) == {"v": {"value": "[1]", "type": "Json"}}
+
+    def test_formatter_reads_current_values(self):
+        assert format_variables({"n": 1}) == {"n": {"value": 1, "type": "Integer"}}
+        assert format_variables({"n": 2}) == {"n": {"value": 2, "type": "Integer"}}
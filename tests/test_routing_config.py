@@ -51,6 +51,18 @@ class TestGetRoutingKey:
         assert RoutingConfig.get_routing_key("xyz") == "default.xyz"
 
 
+class TestResolve:
+    def test_matches_routing_key_and_system(self):
+        for topic in ("bitrix_create_task", "op_create_task", "unknown_topic"):
+            assert RoutingConfig.resolve(topic) == (
+                RoutingConfig.get_routing_key(topic),
+                RoutingConfig.get_system_for_topic(topic),
+            )
+
+    def test_result_is_cached(self):
+        assert RoutingConfig.resolve("bitrix_create_task") is RoutingConfig.resolve("bitrix_create_task")
+
+
 class TestGetQueueForSystem:
     def test_bitrix24_queue(self):
         assert RoutingConfig.get_queue_for_system("bitrix24") == "bitrix24.queue"
@@ -69,3 +81,16 @@ class TestSystemQueues:
     def test_contains_all_systems(self):
         expected = {"bitrix24", "openproject", "1c", "python-services", "default"}
         assert set(RoutingConfig.SYSTEM_QUEUES.keys()) == expected
+
+
+class TestTopicsNeedingMetadata:
+    def test_bitrix_topics_need_metadata(self):
+        assert "bitrix_create_task" in RoutingConfig.TOPICS_NEEDING_METADATA
+        assert "bitrix24" in RoutingConfig.TOPICS_NEEDING_METADATA
+
+    def test_other_systems_skip_metadata(self):
+        assert "op_create_task" not in RoutingConfig.TOPICS_NEEDING_METADATA
+        assert "send_email" not in RoutingConfig.TOPICS_NEEDING_METADATA
+
+    def test_only_known_topics(self):
+        assert RoutingConfig.TOPICS_NEEDING_METADATA <= set(RoutingConfig.TOPIC_TO_SYSTEM_MAPPING)
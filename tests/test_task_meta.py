@@ -0,0 +1,79 @@
+"""
+Тесты бинарного заголовка метаданных задачи x-meta
+Файл: camunda-worker/rabbitmq_client.py (pack_task_meta, unpack_task_meta)
+"""
+import pytest
+
+from rabbitmq_client import META_FIELD_MAX_BYTES, pack_task_meta, unpack_task_meta
+
+
+def roundtrip(topic, system, task_id, process_instance_id):
+    return unpack_task_meta(pack_task_meta(topic, system, task_id, process_instance_id))
+
+
+# =========================================================================
+# Упаковка и распаковка
+# =========================================================================
+
+
+class TestRoundtrip:
+    def test_all_fields(self):
+        assert roundtrip("bitrix_create_task", "bitrix24", "task-1", "pi-1") == {
+            "camunda_topic": "bitrix_create_task",
+            "target_system": "bitrix24",
+            "task_id": "task-1",
+            "process_instance_id": "pi-1",
+        }
+
+    def test_none_fields_become_empty(self):
+        result = roundtrip("topic", "system", None, None)
+        assert result["task_id"] == ""
+        assert result["process_instance_id"] == ""
+
+    def test_all_empty(self):
+        meta = pack_task_meta("", "", "", "")
+        assert meta == b"\x00" * 8
+        assert set(unpack_task_meta(meta).values()) == {""}
+
+    def test_non_ascii(self):
+        result = roundtrip("создать_задачу", "система", "задача-№1", "процесс-😀")
+        assert result["camunda_topic"] == "создать_задачу"
+        assert result["task_id"] == "задача-№1"
+        assert result["process_instance_id"] == "процесс-😀"
+
+    def test_lengths_are_utf8_bytes(self):
+        meta = pack_task_meta("я", "", "", "")
+        assert meta[:2] == b"\x00\x02"
+        assert len(meta) == 8 + 2
+
+    def test_max_length_field(self):
+        task_id = "x" * META_FIELD_MAX_BYTES
+        assert roundtrip("t", "s", task_id, None)["task_id"] == task_id
+
+
+# =========================================================================
+# Ошибки
+# =========================================================================
+
+
+class TestErrors:
+    def test_oversize_field(self):
+        with pytest.raises(ValueError, match="task_id"):
+            pack_task_meta("t", "s", "x" * (META_FIELD_MAX_BYTES + 1), None)
+
+    def test_oversize_by_utf8_bytes(self):
+        # 40000 символов кириллицы - 80000 байт UTF-8
+        with pytest.raises(ValueError, match="camunda_topic"):
+            pack_task_meta("я" * 40000, "s", None, None)
+
+    def test_truncated_header(self):
+        with pytest.raises(ValueError):
+            unpack_task_meta(b"\x00\x01")
+
+    def test_truncated_data(self):
+        with pytest.raises(ValueError):
+            unpack_task_meta(pack_task_meta("topic", "system", "id", "pi")[:-1])
+
+    def test_trailing_data(self):
+        with pytest.raises(ValueError):
+            unpack_task_meta(pack_task_meta("topic", "system", "id", "pi") + b"x")